@@ -0,0 +1,80 @@
+"""Throughput of the CICIDS2017 readers for different feature subsets.
+
+Compares `river.stream.iter_csv` (parse all columns, then drop), the projected csv reader used
+by `CICIDS2017` and the columnar cache, in rows/sec.
+
+Usage: python benchmarks/cicids_reader.py [--filename all_days_noatt.csv] [--limit 200000]
+       python benchmarks/cicids_reader.py --synthetic 200000
+"""
+
+from cicids import CICIDS2017
+from itertools import islice
+from pathlib import Path
+from river import stream
+import argparse
+import tempfile
+import time
+import csv
+
+
+def write_synthetic(path: Path, n_rows: int):
+    converters = CICIDS2017.converters[0]
+    with open(path, "w", newline="") as dataset_csv:
+        csv_writer = csv.writer(dataset_csv)
+        csv_writer.writerow(CICIDS2017.features)
+        for i in range(n_rows):
+            csv_writer.writerow([
+                CICIDS2017.plain_classes[i % len(CICIDS2017.plain_classes)] if f == CICIDS2017.LABEL_COLUMN_NAME
+                else str(i + j) if converters[f] is int
+                else str((i + j) / 7) if converters[f] is float
+                else f"{f}-{i % 100}"
+                for j, f in enumerate(CICIDS2017.features)
+            ])
+
+
+def legacy_reader(dataset: CICIDS2017):
+    return stream.iter_csv(
+        dataset.path,
+        target=CICIDS2017.LABEL_COLUMN_NAME,
+        converters={f: CICIDS2017.converters[0][f] for f in dataset.used_features},
+        drop=[f for f in CICIDS2017.features if f not in dataset.used_features],
+    )
+
+
+def rows_per_sec(iterable, limit: int) -> float:
+    start = time.perf_counter()
+    n_rows = sum(1 for _ in islice(iterable, limit))
+    return n_rows / (time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dataset-dir", type=Path, default=None)
+    parser.add_argument("--filename", default=CICIDS2017.DEFAULT_NOATT_FILENAME)
+    parser.add_argument("--limit", type=int, default=None, help="Number of rows read per measurement")
+    parser.add_argument("--synthetic", type=int, default=None, help="Benchmark on a generated file with this many rows")
+    args = parser.parse_args()
+
+    dataset_dir = args.dataset_dir
+    if args.synthetic is not None:
+        dataset_dir = Path(tempfile.mkdtemp())
+        write_synthetic(dataset_dir / args.filename, args.synthetic)
+
+    feature_sets = {
+        "DEFAULT": CICIDS2017.Features.DEFAULT,
+        "YULIANTO2019": CICIDS2017.Features.YULIANTO2019,
+        "full width": CICIDS2017.features,
+    }
+
+    print(f"{'features':>14} {'n':>4} {'iter_csv':>12} {'projected':>12} {'cache':>12}   [rows/sec]")
+    for name, features in feature_sets.items():
+        dataset = CICIDS2017(args.filename, dataset_dir=dataset_dir, used_features=features[:], use_cache=False)
+
+        legacy = rows_per_sec(legacy_reader(dataset), args.limit)
+        projected = rows_per_sec(iter(dataset), args.limit)
+
+        dataset.build_cache()
+        dataset.use_cache = True
+        cached = rows_per_sec(iter(dataset), args.limit)
+
+        print(f"{name:>14} {len(features) - 1:>4} {legacy:>12,.0f} {projected:>12,.0f} {cached:>12,.0f}")
@@ -0,0 +1,74 @@
+"""Throughput of ResamplingBaggingClassifier on increasingly imbalanced streams.
+
+With oversampling, samples of the minority class are drawn Poisson(max prior / minority prior)
+times per member. Repeating `learn_one` that many times makes the cost per minority sample grow
+with the imbalance ratio, while passing the count as the sample weight keeps it constant.
+
+Every ratio is run on at least `--n-samples` samples, and on more if needed for the stream to hold
+`--min-minority` minority samples, so that the most imbalanced streams are still measured.
+
+Usage: python benchmarks/rbc_imbalance.py [--n-samples 5000] [--min-minority 10] [--ratios 10 100 1000 10000]
+"""
+
+from river import tree
+from rbc import ResamplingBaggingClassifier
+import argparse
+import random
+import time
+
+
+def imbalanced_stream(n_samples: int, ratio: int, seed: int = 42):
+    """Binary stream with one minority sample for every `ratio` majority samples."""
+    rng = random.Random(seed)
+    for i in range(n_samples):
+        y = "minority" if i % (ratio + 1) == ratio else "majority"
+        center = 1.0 if y == "minority" else -1.0
+        yield {f"x{j}": rng.gauss(center, 1.0) for j in range(10)}, y
+
+
+def stream_length(n_samples: int, ratio: int, min_minority: int) -> int:
+    """At least `n_samples`, and enough samples for `min_minority` minority samples at `ratio`."""
+    return max(n_samples, min_minority * (ratio + 1))
+
+
+def measure(model, n_samples: int, ratio: int) -> tuple[float, float]:
+    """Overall samples/sec, and mean time of `learn_one` on minority samples in ms."""
+    minority_time, n_minority = 0.0, 0
+
+    start = time.perf_counter()
+    for x, y in imbalanced_stream(n_samples, ratio):
+        model.predict_proba_one(x)
+
+        learn_start = time.perf_counter()
+        model.learn_one(x, y)
+        if y == "minority":
+            minority_time += time.perf_counter() - learn_start
+            n_minority += 1
+
+    return n_samples / (time.perf_counter() - start), 1000 * minority_time / max(n_minority, 1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--n-samples", type=int, default=5000)
+    parser.add_argument("--min-minority", type=int, default=10)
+    parser.add_argument("--n-models", type=int, default=10)
+    parser.add_argument("--ratios", type=int, nargs="+", default=[10, 100, 1000, 10000])
+    args = parser.parse_args()
+
+    if args.min_minority <= 0:
+        parser.error(f"Invalid value {args.min_minority = }, only positive integers are supported")
+
+    print(f"{'':>8} {'':>10} {'samples/sec':>25}   {'minority learn_one [ms]':>25}")
+    print(f"{'ratio':>8} {'samples':>10} {'repeated':>12} {'weighted':>12}   {'repeated':>12} {'weighted':>12}")
+    for ratio in args.ratios:
+        n_samples = stream_length(args.n_samples, ratio, args.min_minority)
+        (repeated, repeated_ms), (weighted, weighted_ms) = [
+            measure(
+                ResamplingBaggingClassifier(tree.HoeffdingTreeClassifier(), n_models=args.n_models, seed=42, use_sample_weight=use_sample_weight),
+                n_samples,
+                ratio,
+            )
+            for use_sample_weight in [False, True]
+        ]
+        print(f"{ratio:>8} {n_samples:>10,} {repeated:>12,.0f} {weighted:>12,.0f}   {repeated_ms:>12.2f} {weighted_ms:>12.2f}")
@@ -18,8 +18,8 @@ PROJECT = "cicids-test"
 # Substitute `None` with dataset dir root path if needed
 # defaults to %project-root%/cicids2017
 DATASET_ROOT: Path = None
-# Take care! Changing n_samples and start_idx produces new dataset
-# start_idx = 0, n_samples = None -> all dataset, will strip suffix _idx=...
+# Window of the dataset used in the experiment
+# start_idx = 0, n_samples = None -> all dataset
 START_IDX = 400_000
 N_SAMPLES = 400_000
 # Convert "Attempted" to "BENIGN" - will use _noatt dataset if set
@@ -53,8 +53,6 @@ METRICS = Metrics(
 if __name__ == "__main__":
     cicids_file = generate_cicids_file(
         dataset_path=DATASET_ROOT,
-        n_samples=N_SAMPLES,
-        start_sample=START_IDX,
         convert_attempted=CONVERT_ATTEMPTED,
     )
 
@@ -62,6 +60,7 @@ if __name__ == "__main__":
         cicids_file.name,
         dataset_dir=DATASET_ROOT,
         n_samples=N_SAMPLES,
+        start_sample=START_IDX,
         convert_attempted=CONVERT_ATTEMPTED,
     )
 
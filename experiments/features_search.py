@@ -47,8 +47,6 @@ if __name__ == "__main__":
     
     cicids_file = generate_cicids_file(
         dataset_path=DATASET_ROOT,
-        start_sample=start_idx,
-        n_samples=n_samples,
         convert_attempted=convert_att,
     )
 
@@ -58,6 +56,7 @@ if __name__ == "__main__":
             cicids_file.name,
             dataset_dir=DATASET_ROOT,
             n_samples=n_samples,
+            start_sample=start_idx,
             convert_attempted=convert_att,
             used_features=feature_set
         )
@@ -39,10 +39,9 @@ if __name__ == "__main__":
 
     datasets_with_tags = []
     if analyze_cicids_sub2:
+        start_sample = 1_200_000
         cicids_file = generate_cicids_file(
             dataset_path=DATASET_ROOT,
-            start_sample=1_200_000,
-            n_samples=n_samples,
             convert_attempted=convert_att,
         )
 
@@ -50,6 +49,7 @@ if __name__ == "__main__":
             cicids_file.name,
             dataset_dir=DATASET_ROOT,
             n_samples=n_samples,
+            start_sample=start_sample,
             convert_attempted=convert_att,
         )
         datasets_with_tags.append(
@@ -60,6 +60,7 @@ if __name__ == "__main__":
             cicids_file.name,
             dataset_dir=DATASET_ROOT,
             n_samples=n_samples,
+            start_sample=start_sample,
             convert_attempted=convert_att,
             used_features=CICIDS2017.Features.YULIANTO2019,
         )
@@ -68,10 +69,9 @@ if __name__ == "__main__":
         )
 
     if analyze_cicids_sub1:
+        start_sample = 400_000
         cicids_file = generate_cicids_file(
             dataset_path=DATASET_ROOT,
-            start_sample=400_000,
-            n_samples=n_samples,
             convert_attempted=convert_att,
         )
 
@@ -79,6 +79,7 @@ if __name__ == "__main__":
             cicids_file.name,
             dataset_dir=DATASET_ROOT,
             n_samples=n_samples,
+            start_sample=start_sample,
             convert_attempted=convert_att,
         )
         datasets_with_tags.append((dataset10, ["cicsub:400k_400k", "features:DEFAULT"]))
@@ -87,6 +88,7 @@ if __name__ == "__main__":
             cicids_file.name,
             dataset_dir=DATASET_ROOT,
             n_samples=n_samples,
+            start_sample=start_sample,
             convert_attempted=convert_att,
             used_features=CICIDS2017.Features.YULIANTO2019,
         )
@@ -1,14 +1,42 @@
-from cicids import generate_cicids_file
+from cicids import CICIDS2017
+from cicids.preprocess import preprocess_cicids, DAYS_DIR, CHUNK_SIZE
+from cicids.index import build_row_index
 from pathlib import Path
+import argparse
 
 if __name__ == "__main__":
-    dataset_root: Path = None
+    parser = argparse.ArgumentParser(
+        description="Merge CICIDS2017 day files, convert attempted attacks to BENIGN and optionally extract a subset, in a single parallel pass."
+    )
+    parser.add_argument("--dataset-dir", type=Path, default=None, help="Dataset root, defaults to %%project-root%%/cicids2017")
+    parser.add_argument("--days-dir", default=DAYS_DIR, help="Directory with day files, relative to the dataset root")
+    parser.add_argument("--keep-attempted", action="store_true", help="Do not create the _noatt version")
+    parser.add_argument("--start-sample", type=int, default=0, help="First sample of the subset to extract")
+    parser.add_argument("--n-samples", type=int, default=None, help="Number of samples of the subset to extract")
+    parser.add_argument("--workers", type=int, default=None, help="Number of worker processes, defaults to the number of CPUs")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE >> 20, help="Size of the chunks processed by a single task [MiB]")
+    parser.add_argument("--index", action="store_true", help="Build the row index of the output, for reading windows with `start_sample`")
+    parser.add_argument("--cache", action="store_true", help="Build the columnar cache of the output")
+    parser.add_argument("--force", action="store_true", help="Override existing files")
+    args = parser.parse_args()
 
-    cicids_file = generate_cicids_file(
-        dataset_path=dataset_root,
-        start_sample=400_000,
-        n_samples=400_000,
-        convert_attempted=True,
+    cicids_file = preprocess_cicids(
+        dataset_path=args.dataset_dir,
+        days_dir=args.days_dir,
+        convert_attempted=not args.keep_attempted,
+        start_sample=args.start_sample,
+        n_samples=args.n_samples,
+        workers=args.workers,
+        chunk_size=args.chunk_size << 20,
+        force=args.force,
     )
 
-    print("Subset generated at: ", cicids_file)
+    print("Dataset generated at: ", cicids_file)
+
+    if args.index:
+        build_row_index(cicids_file, force=args.force)
+        print("Row index generated for: ", cicids_file)
+
+    if args.cache:
+        dataset = CICIDS2017(cicids_file.name, dataset_dir=cicids_file.parent, convert_attempted=not args.keep_attempted)
+        print("Columnar cache generated at: ", dataset.build_cache(force=args.force))
@@ -1,5 +1,7 @@
 from .cbce import CBCE
+from .linear import LinearCBCE
 
 __all__ = [
-    "CBCE"
+    "CBCE",
+    "LinearCBCE"
 ]
\ No newline at end of file
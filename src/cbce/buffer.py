@@ -0,0 +1,117 @@
+from collections import deque
+from itertools import islice
+from river import base
+
+
+class SampleBuffer:
+    """Samples buffered by `CBCE` for (re)initializing class models, shared between classes.
+
+    A class buffers every sample from the one it started buffering at (its head) to the current
+    one. Samples are stored once, however many classes buffer them, and are dropped as soon as no
+    class needs them anymore.
+
+    Parameters
+    ----------
+    max_size
+        (optional) Maximum number of samples kept for a single class. Once exceeded, the head and
+        the `max_size - 1` most recent samples are kept. The `length` of a buffer still counts
+        the dropped samples.
+
+    """
+
+    def __init__(self, max_size: int = None) -> None:
+        if max_size is not None and (not isinstance(max_size, int) or max_size < 2):
+            raise ValueError(f"Invalid value {max_size = }, it has to be an integer greater than 1")
+
+        self.max_size = max_size
+
+        self._samples: deque[dict] = deque(maxlen=max_size - 1 if max_size else None)
+        self._end = 0
+        self._starts: dict[base.typing.ClfTarget, int] = {}
+        self._heads: dict[base.typing.ClfTarget, dict] = {}
+
+        self._current = None
+        self._current_stored = False
+
+    def __store_current(self):
+        if not self._current_stored:
+            self._samples.append(self._current)
+            self._end += 1
+            self._current_stored = True
+
+    @property
+    def _first(self) -> int:
+        """Sequence number of the oldest stored sample"""
+        return self._end - len(self._samples)
+
+    def append(self, x: dict) -> None:
+        """Add the current sample to all open buffers. Has to be called for every sample, before
+        any buffer is opened at it."""
+        self._current = x
+        self._current_stored = False
+
+        if self._starts:
+            self.__store_current()
+
+    def open(self, label: base.typing.ClfTarget) -> None:
+        """Start buffering for `label` at the current sample."""
+        self.__store_current()
+
+        self._starts[label] = self._end - 1
+        self._heads[label] = self._current
+
+    def pop(self, label: base.typing.ClfTarget, *default):
+        """Stop buffering for `label`. Returns the start of its buffer, or `default` if there was none."""
+        if label not in self._starts and default:
+            return default[0]
+
+        start = self._starts.pop(label)
+        del self._heads[label]
+
+        # Drop the samples no open buffer needs
+        if not self._starts:
+            self._samples.clear()
+        else:
+            first_needed = min(self._starts.values())
+            for _ in range(min(first_needed - self._first, len(self._samples))):
+                self._samples.popleft()
+
+        return start
+
+    def __delitem__(self, label: base.typing.ClfTarget) -> None:
+        self.pop(label)
+
+    def __contains__(self, label: base.typing.ClfTarget) -> bool:
+        return label in self._starts
+
+    def __iter__(self):
+        return iter(self._starts)
+
+    def __len__(self) -> int:
+        return len(self._starts)
+
+    def length(self, label: base.typing.ClfTarget) -> int:
+        """Number of samples seen since `label` started buffering, including its head and the
+        samples dropped because of `max_size`."""
+        return self._end - self._starts[label]
+
+    def samples(self, label: base.typing.ClfTarget) -> list[dict]:
+        """The buffered samples of `label`, oldest first."""
+        offset = self._starts[label] - self._first
+
+        if offset >= 0:
+            return list(islice(self._samples, offset, None))
+        return [self._heads[label], *self._samples]
+
+    def memory_stats(self) -> dict:
+        """Number of open buffers, samples stored, samples a separate list per class would have
+        to hold and samples dropped because of `max_size`."""
+        n_buffered = sum(self.length(label) for label in self._starts)
+        n_kept = sum(len(self._samples) - max(self._starts[label] - self._first, 0) + (self._starts[label] < self._first) for label in self._starts)
+
+        return {
+            "open": len(self._starts),
+            "stored": len(self._samples),
+            "buffered": n_buffered,
+            "dropped": n_buffered - n_kept,
+        }
@@ -1,6 +1,8 @@
 import random
 from river import base
 from river.base.drift_detector import BinaryDriftDetector
+from .buffer import SampleBuffer
+from utils import DecayedPriors
 
 class NoDrift(base.BinaryDriftAndWarningDetector):
     
@@ -16,7 +18,8 @@ class CBCE(base.Wrapper, base.Classifier):
             decay_factor: float = 0.9,
             disappearance_threshold: float = 0.9 ** 1000,
             seed: int = None,
-            reset_buffer_on_warning_lowered: bool = True
+            reset_buffer_on_warning_lowered: bool = True,
+            max_buffer_size: int = None
         ) -> None:
         self.classifier = classifier
         self.drift_detector = drift_detector
@@ -28,8 +31,9 @@ class CBCE(base.Wrapper, base.Classifier):
         self.decay_factor = decay_factor
         self.disappearance_threshold = disappearance_threshold
         
-        self._class_priors: dict[base.typing.ClfTarget, float] = {}
-        self._sample_buffer: dict[base.typing.ClfTarget, list[dict]] = {}
+        self._class_priors = DecayedPriors(decay_factor)
+        self._sample_buffer = SampleBuffer(max_buffer_size)
+        self.max_buffer_size = max_buffer_size
         self._random = random.Random(seed)
         self.seed = seed
 
@@ -48,23 +52,22 @@ class CBCE(base.Wrapper, base.Classifier):
         return self._class_priors.get(cls, 0) > 0
     
     def learn_one(self, x: dict, y: base.typing.ClfTarget, **kwargs) -> base.Classifier:
-        for label in self._sample_buffer:
-            self._sample_buffer[label].append(x)
+        self._sample_buffer.append(x)
 
         # Class emergence
         if y not in self._class_priors:
             if y not in self._sample_buffer:
                 # First sample arrived, start buffering
-                self._sample_buffer[y] = [x]
+                self._sample_buffer.open(y)
 
                 self.drift_detectors[y] = self.drift_detector.clone()
 
             else:
                 # Second sample arrived, initilize model
-                self.classifiers[y] = self.__init_cb_model(y, **kwargs)
+                self.classifiers[y] = self._init_cb_model(y, **kwargs)
 
                 # Sample buffer contains the two positive samples, hence the -1
-                self._class_priors[y] = 1 / (len(self._sample_buffer[y]) - 1)
+                self._class_priors[y] = 1 / (self._sample_buffer.length(y) - 1)
 
                 # Stop buffering
                 del self._sample_buffer[y]
@@ -73,14 +76,14 @@ class CBCE(base.Wrapper, base.Classifier):
         elif self._class_priors[y] == 0:
             if y not in self._sample_buffer:
                 # First sample arrived, start buffering
-                self._sample_buffer[y] = [x]
+                self._sample_buffer.open(y)
 
                 # Activate classifier
                 self.classifiers[y] = self.inactive_classifiers[y]
                 del self.inactive_classifiers[y]
             else:
                 # Second sample arrived, initilize model
-                buffer_len = len(self._sample_buffer[y])
+                buffer_len = self._sample_buffer.length(y)
 
                 # Sample buffer contains the two positive samples, hence the -1
                 self._class_priors[y] = 1 / (buffer_len - 1)
@@ -88,18 +91,21 @@ class CBCE(base.Wrapper, base.Classifier):
                 # Stop buffering
                 del self._sample_buffer[y]
         
-        # Class disappearance
-        disappeared_labels = []
-        for label, model in self.classifiers.items():
-            if self._class_priors[label] < self.disappearance_threshold and label not in self._sample_buffer:
-                self.inactive_classifiers[label] = model
+        # Class disappearance, only the classes with the lowest priors have to be checked. Classes
+        # with a prior of 0 are either inactive already, or buffering for reoccurrence
+        disappeared_labels = set()
+        for label in self._class_priors.ascending(skip_zero=True):
+            if self._class_priors[label] >= self.disappearance_threshold:
+                break
+            if label in self.classifiers and label not in self._sample_buffer:
+                disappeared_labels.add(label)
+
+        if disappeared_labels:
+            for label in [label for label in self.classifiers if label in disappeared_labels]:
+                self.inactive_classifiers[label] = self.classifiers.pop(label)
                 self._class_priors[label] = 0
-                disappeared_labels.append(label)
-            
-        for label in disappeared_labels:
-            del self.classifiers[label]
 
-        self.__update_cb_models(x, y, **kwargs)
+        self._update_cb_models(x, y, **kwargs)
 
         for cls in self.__classes_to_reset:
             self.__reset_model(cls)
@@ -108,27 +114,51 @@ class CBCE(base.Wrapper, base.Classifier):
 
         return self
     
-    def __update_cb_models(self, x: dict, y: base.typing.ClfTarget, **kwargs):
+    def _update_cb_models(self, x: dict, y: base.typing.ClfTarget, **kwargs):
+        # Scores of the class models for `x`, computed once and then kept up to date as the models
+        # learn, instead of predicting with the whole ensemble after every update
+        scores = None
+
+        self._class_priors.step()
+        if y in self.classifiers:
+            self._class_priors.add(y, 1 - self.decay_factor)
+
         for label, model in self.classifiers.items():
             if y == label:
-                self._class_priors[y] = self.decay_factor * self._class_priors[y] + 1 - self.decay_factor
                 model.learn_one(x, 1, **kwargs)
-                self.__update_drift_detector(x, label, **kwargs)
 
             else:
-                self._class_priors[label] *= self.decay_factor
                 p = self._class_priors[label] / (1 - self._class_priors[label])
 
-                if self._random.random() < p:
-                    model.learn_one(x, -1, **kwargs)
-                    self.__update_drift_detector(x, label, **kwargs)
-    
-    def __update_drift_detector(self, x: dict, y: base.typing.ClfTarget, **kwargs):
-        pred = self.predict_one(x)
-        self.drift_detectors[y].update(pred != y)
+                if self._random.random() >= p:
+                    continue
+
+                model.learn_one(x, -1, **kwargs)
+
+            if scores is None:
+                scores = self.__scores(x)
+            else:
+                scores[label] = model.predict_proba_one(x)[1]
+
+            self._update_drift_detector(x, label, self._drift_prediction(x, scores), **kwargs)
+
+            # The model may have been reinitialized after a drift
+            if self.classifiers[label] is not model:
+                scores[label] = self.classifiers[label].predict_proba_one(x)[1]
+
+    def _drift_prediction(self, x: dict, scores: dict[base.typing.ClfTarget, float]) -> base.typing.ClfTarget:
+        """Ensemble prediction for `x` passed to the drift detectors, given the current `scores`
+        of the class models. Same as `predict_one(x)`, without querying the models again."""
+        y_pred = self.__normalize(scores)
+        return max(y_pred, key=y_pred.get) if y_pred else None
+
+    def _update_drift_detector(self, x: dict, y: base.typing.ClfTarget, y_pred: base.typing.ClfTarget, **kwargs):
+        """Update the drift detector of class `y`, given the ensemble's prediction `y_pred` for `x`
+        made right after the model of class `y` learned from `x`."""
+        self.drift_detectors[y].update(y_pred != y)
 
         if self.drift_detectors[y].warning_detected and y not in self._sample_buffer:
-            self._sample_buffer[y] = [x]
+            self._sample_buffer.open(y)
 
         elif y in self._sample_buffer and not self.drift_detectors[y].warning_detected and self.reset_buffer_on_warning_lowered:
             del self._sample_buffer[y]
@@ -137,7 +167,7 @@ class CBCE(base.Wrapper, base.Classifier):
             if y in self._sample_buffer:
                 self.drift_detectors[y]._reset()
 
-                model = self.__init_cb_model(y, **kwargs)
+                model = self._init_cb_model(y, **kwargs)
                     
                 if self.is_active(y):
                     self.classifiers[y] = model
@@ -157,25 +187,27 @@ class CBCE(base.Wrapper, base.Classifier):
         self._class_priors.pop(y, None)
         self._sample_buffer.pop(y, None)
 
-    def __init_cb_model(self, y: base.typing.ClfTarget, **kwargs):
-        buffer_len = len(self._sample_buffer[y])
+    def _init_cb_model(self, y: base.typing.ClfTarget, **kwargs):
+        buffer = self._sample_buffer.samples(y)
 
         model: base.Classifier = self.classifier.clone()
 
-        labels = [1 if i == 0 or i == buffer_len - 1 else -1 for i in range(buffer_len)]
-        for buffered_x, buffered_y in zip(self._sample_buffer[y], labels):
+        labels = [1 if i == 0 or i == len(buffer) - 1 else -1 for i in range(len(buffer))]
+        for buffered_x, buffered_y in zip(buffer, labels):
             model.learn_one(buffered_x, buffered_y, **kwargs)
 
         return model
 
-    def predict_proba_one(self, x: dict, **kwargs) -> dict[base.typing.ClfTarget, float]:
-        y_pred = {}
-
-        for label, model in self.classifiers.items():
-            y_pred[label] = model.predict_proba_one(x, **kwargs)[1]
+    def __scores(self, x: dict, **kwargs) -> dict[base.typing.ClfTarget, float]:
+        return {label: model.predict_proba_one(x, **kwargs)[1] for label, model in self.classifiers.items()}
 
-        total = sum(y_pred.values())
+    @staticmethod
+    def __normalize(scores: dict[base.typing.ClfTarget, float]) -> dict[base.typing.ClfTarget, float]:
+        total = sum(scores.values())
         
         if total:
-            return {label: score / total for label, score in y_pred.items()}
-        return {label: 1 / len(y_pred) for label in y_pred.keys()}
+            return {label: score / total for label, score in scores.items()}
+        return {label: 1 / len(scores) for label in scores.keys()}
+
+    def predict_proba_one(self, x: dict, **kwargs) -> dict[base.typing.ClfTarget, float]:
+        return self.__normalize(self.__scores(x, **kwargs))
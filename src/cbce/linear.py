@@ -0,0 +1,271 @@
+import numpy as np
+import math
+from river import base, linear_model, optim
+from .cbce import CBCE, NoDrift
+
+
+class LinearClassModel:
+    """Handle of a single class model of `LinearCBCE`, a row of the shared weight matrix."""
+
+    __slots__ = ("row",)
+
+    def __init__(self, row: int) -> None:
+        self.row = row
+
+
+class LinearCBCE(CBCE):
+    """CBCE specialised for a logistic regression base learner.
+
+    The weights of all class models are kept in a single matrix, so the scores of all classes are
+    computed with one matrix-vector product, and the positive class and the undersampled negative
+    classes learn from a sample in one masked update. The results match those of
+    `CBCE(linear_model.LogisticRegression(...))`, up to floating point rounding.
+
+    Parameters
+    ----------
+    classifier
+        (default: `linear_model.LogisticRegression()`) Prototype of the class models. Only plain
+        SGD with a constant learning rate, log loss, zero weight initialization and no L1 penalty
+        are supported.
+
+    See `CBCE` for the other parameters.
+
+    """
+
+    def __init__(
+            self,
+            classifier: linear_model.LogisticRegression = None,
+            drift_detector: base.BinaryDriftAndWarningDetector = NoDrift(),
+            decay_factor: float = 0.9,
+            disappearance_threshold: float = 0.9 ** 1000,
+            seed: int = None,
+            reset_buffer_on_warning_lowered: bool = True,
+            max_buffer_size: int = None
+        ) -> None:
+        classifier = classifier if classifier is not None else linear_model.LogisticRegression()
+        self.__check_classifier(classifier)
+
+        super().__init__(
+            classifier=classifier,
+            drift_detector=drift_detector,
+            decay_factor=decay_factor,
+            disappearance_threshold=disappearance_threshold,
+            seed=seed,
+            reset_buffer_on_warning_lowered=reset_buffer_on_warning_lowered,
+            max_buffer_size=max_buffer_size,
+        )
+
+        self._lr = classifier.optimizer.lr.learning_rate
+        self._intercept_lr = classifier.intercept_lr.learning_rate
+        self._l2 = classifier.l2
+        self._clip_gradient = classifier.clip_gradient
+        self._weight_pos = classifier.loss.weight_pos
+        self._weight_neg = classifier.loss.weight_neg
+
+        self._features: dict = {}
+        self._feature_order: tuple = ()
+        self._weights = np.zeros((0, 0))
+        self._intercepts = np.zeros(0)
+        self._n_rows = 0
+
+    @staticmethod
+    def __check_classifier(classifier):
+        if not isinstance(classifier, linear_model.LogisticRegression):
+            raise ValueError(f"LinearCBCE requires a LogisticRegression classifier, got {classifier}")
+
+        unsupported = []
+        if type(classifier.optimizer) is not optim.SGD or not isinstance(classifier.optimizer.lr, optim.schedulers.Constant):
+            unsupported.append(f"optimizer={classifier.optimizer}")
+        if not isinstance(classifier.intercept_lr, optim.schedulers.Constant):
+            unsupported.append(f"intercept_lr={classifier.intercept_lr}")
+        if type(classifier.loss) is not optim.losses.Log:
+            unsupported.append(f"loss={classifier.loss}")
+        if not isinstance(classifier.initializer, optim.initializers.Constant) or classifier.initializer.value != 0:
+            unsupported.append(f"initializer={classifier.initializer}")
+        if classifier.l1:
+            unsupported.append(f"l1={classifier.l1}")
+
+        if unsupported:
+            raise ValueError(f"Unsupported LogisticRegression settings for LinearCBCE: {', '.join(unsupported)}")
+
+    def __vectorize(self, x: dict, learn: bool = False) -> tuple[np.ndarray, np.ndarray | None]:
+        """Features of `x` in column order, and the mask of the features present in `x`, or `None`
+        if all of them are. Unknown features are added as new columns if `learn` is set."""
+        if tuple(x) == self._feature_order:
+            return np.fromiter(x.values(), dtype=float, count=len(x)), None
+
+        if learn:
+            new_features = [f for f in x if f not in self._features]
+            if new_features:
+                for f in new_features:
+                    self._features[f] = len(self._features)
+                self.__resize(len(self._weights), len(self._features))
+
+            # Dense samples with the columns' order can skip the lookups
+            if [self._features[f] for f in x] == list(range(len(self._features))):
+                self._feature_order = tuple(x)
+            else:
+                self._feature_order = ()
+
+        vector = np.zeros(len(self._features))
+        mask = np.zeros(len(self._features), dtype=bool)
+        for f, value in x.items():
+            column = self._features.get(f)
+            if column is not None:
+                vector[column] = value
+                mask[column] = True
+
+        return vector, mask
+
+    def __resize(self, n_rows: int, n_columns: int):
+        old_rows, old_columns = self._weights.shape
+        weights = np.zeros((n_rows, n_columns))
+        weights[:old_rows, :old_columns] = self._weights[:n_rows]
+
+        intercepts = np.full(n_rows, self.classifier.intercept_init)
+        intercepts[:old_rows] = self._intercepts[:n_rows]
+
+        self._weights, self._intercepts = weights, intercepts
+
+    def __allocate_row(self) -> LinearClassModel:
+        models = [*self.classifiers.values(), *self.inactive_classifiers.values()]
+
+        if self._n_rows == len(self._weights):
+            # Reclaim the rows of discarded models, then grow if still full
+            used = sorted({model.row for model in models})
+            index = {row: i for i, row in enumerate(used)}
+            for model in models:
+                model.row = index[model.row]
+
+            self._weights[:len(used)] = self._weights[used]
+            self._intercepts[:len(used)] = self._intercepts[used]
+            self._n_rows = len(used)
+
+            if self._n_rows == len(self._weights):
+                self.__resize(max(2 * len(self._weights), 8), len(self._features))
+
+        row = self._n_rows
+        self._n_rows += 1
+
+        self._weights[row] = 0
+        self._intercepts[row] = self.classifier.intercept_init
+
+        return LinearClassModel(row)
+
+    def __scores(self, rows, x: np.ndarray) -> np.ndarray:
+        # A product with all allocated rows is cheaper than gathering the requested ones first
+        return (self._weights[:self._n_rows] @ x + self._intercepts[:self._n_rows])[rows]
+
+    def __loss_gradient(self, target: float, raw: float, w: float) -> float:
+        """Same as `optim.losses.Log.gradient`, weighted and clipped as in `LogisticRegression`"""
+        z = raw * target
+        if z > 18.0:
+            gradient = math.exp(-z) * -target
+        elif z < -18.0:
+            gradient = -target
+        else:
+            gradient = -target / (math.exp(z) + 1.0)
+
+        gradient *= (self._weight_pos if target > 0 else self._weight_neg) * w
+        return max(-self._clip_gradient, min(gradient, self._clip_gradient))
+
+    def __learn(self, rows: np.ndarray, targets: list[float], x: np.ndarray, mask: np.ndarray | None, w: float = 1.0):
+        """One SGD step of the models in `rows` on the sample `x`, labelled +1/-1 by `targets`,
+        mirroring `LogisticRegression.learn_one`."""
+        raw = self.__scores(rows, x).tolist()
+        loss_gradient = np.array([self.__loss_gradient(t, r, w) for t, r in zip(targets, raw)])
+
+        self._intercepts[rows] -= self._intercept_lr * loss_gradient
+
+        gradient = loss_gradient[:, None] * x
+        if self._l2:
+            gradient += self._l2 * self._weights[rows]
+
+        if mask is None:
+            self._weights[rows] -= self._lr * gradient
+        else:
+            # Only the weights of the features present in `x` are updated, as in river
+            self._weights[np.ix_(rows, mask)] -= self._lr * gradient[:, mask]
+
+    def _init_cb_model(self, y: base.typing.ClfTarget, **kwargs):
+        model = self.__allocate_row()
+        rows = np.array([model.row])
+
+        buffer = self._sample_buffer.samples(y)
+        for i, buffered_x in enumerate(buffer):
+            label = 1.0 if i == 0 or i == len(buffer) - 1 else -1.0
+            self.__learn(rows, [label], *self.__vectorize(buffered_x, learn=True), **kwargs)
+
+        return model
+
+    def _update_cb_models(self, x: dict, y: base.typing.ClfTarget, **kwargs):
+        labels = list(self.classifiers)
+        if not labels:
+            return
+
+        self._class_priors.step()
+        if y in self.classifiers:
+            self._class_priors.add(y, 1 - self.decay_factor)
+
+        # Draw the negatives in the same order as CBCE does
+        updated = []
+        for i, label in enumerate(labels):
+            if y == label:
+                updated.append(i)
+
+            else:
+                p = self._class_priors[label] / (1 - self._class_priors[label])
+
+                if self._random.random() < p:
+                    updated.append(i)
+
+        if not updated:
+            return
+
+        vector, mask = self.__vectorize(x, learn=True)
+        models = [self.classifiers[label] for label in labels]
+        rows = np.array([model.row for model in models])
+        updated_rows = rows[updated]
+        targets = [1.0 if labels[i] == y else -1.0 for i in updated]
+
+        scores_before = self.__scores(rows, vector)
+        self.__learn(updated_rows, targets, vector, mask, **kwargs)
+        scores_after = self.__scores(updated_rows, vector)
+
+        # CBCE predicts right after each model learns, with the models preceding it already
+        # updated and the following ones not yet, so replay these predictions in order
+        proba = self.__sigmoid(scores_before)
+        for i, p in zip(updated, self.__sigmoid(scores_after).tolist()):
+            proba[i] = p
+            label = labels[i]
+
+            # Normalizing the probabilities does not change the most probable class
+            self._update_drift_detector(x, label, labels[int(np.argmax(proba))], **kwargs)
+
+            # The model may have been replaced after a drift
+            model = self.classifiers.get(label)
+            if model is not None and model is not models[i]:
+                proba[i] = self.__sigmoid(self.__scores([model.row], self.__vectorize(x)[0]))[0]
+
+    @staticmethod
+    def __sigmoid(scores: np.ndarray) -> np.ndarray:
+        """Same as `river.utils.math.sigmoid`"""
+        if scores.min() >= -30 and scores.max() <= 30:
+            return 1 / (1 + np.exp(-scores))
+
+        proba = 1 / (1 + np.exp(-np.clip(scores, -31, 31)))
+        proba[scores < -30] = 0
+        proba[scores > 30] = 1
+        return proba
+
+    def predict_proba_one(self, x: dict, **kwargs) -> dict[base.typing.ClfTarget, float]:
+        if not self.classifiers:
+            return {}
+
+        rows = np.array([model.row for model in self.classifiers.values()])
+        proba = self.__sigmoid(self.__scores(rows, self.__vectorize(x)[0]))
+
+        total = proba.sum()
+        if total:
+            return dict(zip(self.classifiers, (proba / total).tolist()))
+        return {label: 1 / len(proba) for label in self.classifiers}
@@ -0,0 +1,249 @@
+from pathlib import Path
+from tqdm import tqdm
+import numpy as np
+import hashlib
+import shutil
+import json
+import csv
+import os
+
+CACHE_DIR = ".cache"
+META_FILENAME = "meta.json"
+FINGERPRINT_SUFFIX = ".fingerprint.json"
+
+# Bytes read at once while hashing, rows converted at once while building
+HASH_CHUNK_SIZE = 1 << 24
+BUILD_CHUNK_SIZE = 1 << 16
+
+DTYPES = {
+    int: np.int64,
+    float: np.float64,
+    str: np.int32,  # Integer codes into the column's vocabulary
+}
+
+
+def file_hash(path: Path) -> str:
+    """Content hash of `path`, used to key the cache so that stale caches are never used"""
+
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _fingerprint_path(csv_path: Path) -> Path:
+    return csv_path.parent / CACHE_DIR / f"{csv_path.stem}{FINGERPRINT_SUFFIX}"
+
+
+def fingerprinted_hash(csv_path: Path) -> str:
+    """Content hash of `csv_path` (see `file_hash`), stored next to its caches along with the size
+    and modification time of the file, so that the file is only hashed again once it changes"""
+
+    stat = csv_path.stat()
+    fingerprint = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+    path = _fingerprint_path(csv_path)
+
+    try:
+        with open(path, "r") as file_fingerprint:
+            stored = json.load(file_fingerprint)
+        if {key: stored.get(key) for key in fingerprint} == fingerprint and "hash" in stored:
+            return stored["hash"]
+    except (OSError, ValueError):
+        pass
+
+    digest = file_hash(csv_path)
+
+    # Best effort, e.g. the dataset directory may be read-only
+    try:
+        path.parent.mkdir(exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.tmp-{os.getpid()}")
+        with open(tmp_path, "w") as file_fingerprint:
+            json.dump({**fingerprint, "hash": digest}, file_fingerprint)
+        os.replace(tmp_path, path)
+    except OSError:
+        pass
+
+    return digest
+
+
+def has_cache(csv_path: Path) -> bool:
+    """Whether any columnar cache of `csv_path` exists, whichever contents of the file it was
+    built from. Cheap, unlike finding the cache of the current contents (see `cache_path`)"""
+
+    cache_dir = csv_path.parent / CACHE_DIR
+    if not cache_dir.is_dir():
+        return False
+    return any(
+        path.is_dir() and path.name.startswith(f"{csv_path.stem}_") and _read_meta(path).get("source") == csv_path.name
+        for path in cache_dir.iterdir()
+    )
+
+
+def cache_path(csv_path: Path, digest: str) -> Path:
+    """Directory holding the columnar cache of `csv_path` with content hash `digest`"""
+
+    return csv_path.parent / CACHE_DIR / f"{csv_path.stem}_{digest}"
+
+
+def _count_rows(csv_path: Path) -> int:
+    with open(csv_path, "rb") as file:
+        return sum(1 for _ in file) - 1
+
+
+def build_columnar_cache(
+    csv_path: Path, converters: dict, digest: str = None, force: bool = False
+) -> Path:
+    """Convert `csv_path` into one `.npy` file per column, plus `meta.json` describing the columns.
+
+    Numeric columns are stored with their converter's type (`int` as int64, `float` as float64).
+    `str` columns (including the label) are stored as int32 codes into a per-column vocabulary
+    kept in `meta.json`. Columns without a converter are treated as `str`.
+    """
+
+    digest = digest or fingerprinted_hash(csv_path)
+    output_path = cache_path(csv_path, digest)
+
+    if output_path.is_dir():
+        if not force:
+            return output_path
+        shutil.rmtree(output_path)
+
+    n_rows = _count_rows(csv_path)
+
+    tmp_path = output_path.with_name(f"{output_path.name}.tmp-{os.getpid()}")
+    tmp_path.mkdir(parents=True, exist_ok=True)
+
+    with open(csv_path, "r", newline="") as csv_input:
+        csv_reader = csv.reader(csv_input)
+        headers = next(csv_reader)
+
+        types = [converters.get(name, str) for name in headers]
+        vocabularies = [dict() if t is str else None for t in types]
+        columns = [
+            np.lib.format.open_memmap(
+                tmp_path / f"{i}.npy", mode="w+", dtype=DTYPES[t], shape=(n_rows,)
+            )
+            for i, t in enumerate(types)
+        ]
+
+        def flush(rows: list, start: int):
+            for i, values in enumerate(zip(*rows)):
+                if vocabularies[i] is not None:
+                    vocab = vocabularies[i]
+                    values = [vocab.setdefault(v, len(vocab)) for v in values]
+                else:
+                    values = map(types[i], values)
+                columns[i][start : start + len(rows)] = np.fromiter(
+                    values, dtype=DTYPES[types[i]], count=len(rows)
+                )
+
+        written = 0
+        rows = []
+        for row in tqdm(csv_reader, total=n_rows):
+            # Skip blank lines, same as `river.stream.iter_csv`
+            if not row:
+                continue
+            rows.append(row)
+            if len(rows) == BUILD_CHUNK_SIZE:
+                flush(rows, written)
+                written += len(rows)
+                rows.clear()
+
+        if rows:
+            flush(rows, written)
+            written += len(rows)
+
+    for column in columns:
+        column.flush()
+    del columns
+
+    meta = {
+        "source": csv_path.name,
+        "hash": digest,
+        "n_rows": written,
+        "columns": [
+            {
+                "name": name,
+                "type": t.__name__,
+                "vocabulary": list(vocab) if vocab is not None else None,
+            }
+            for name, t, vocab in zip(headers, types, vocabularies)
+        ],
+    }
+    with open(tmp_path / META_FILENAME, "w") as file_meta:
+        json.dump(meta, file_meta)
+
+    # Publish atomically, so a partially written cache is never picked up
+    try:
+        os.replace(tmp_path, output_path)
+    except OSError:
+        shutil.rmtree(tmp_path, ignore_errors=True)
+
+    # Caches of previous versions of this file can never be used again
+    for stale in output_path.parent.iterdir():
+        if stale != output_path and _read_meta(stale).get("source") == csv_path.name:
+            shutil.rmtree(stale, ignore_errors=True)
+
+    return output_path
+
+
+def _read_meta(path: Path) -> dict:
+    try:
+        with open(path / META_FILENAME, "r") as file_meta:
+            return json.load(file_meta)
+    except (OSError, ValueError):
+        return {}
+
+
+def load_columnar_cache(path: Path) -> tuple[dict, dict[str, np.ndarray]]:
+    """Memory-map all columns of a cache created by `build_columnar_cache`.
+
+    Returns the cache metadata and a dict mapping column names to read-only arrays.
+    """
+
+    meta = _read_meta(path)
+
+    columns = {
+        column["name"]: np.load(path / f"{i}.npy", mmap_mode="r")[: meta["n_rows"]]
+        for i, column in enumerate(meta["columns"])
+    }
+    return meta, columns
+
+
+def iter_columnar_cache(
+    path: Path,
+    used_columns: list[str],
+    target: str,
+    start: int = 0,
+    n_rows: int = None,
+    block_size: int = 4096,
+):
+    """Stream `(x, y)` pairs from a columnar cache, in the same format as `river.stream.iter_csv`.
+
+    Only `used_columns` are read. Features are ordered as in the original csv header.
+    Reading starts at row `start`, and stops after `n_rows` rows if given.
+    """
+
+    meta, columns = load_columnar_cache(path)
+    used = [c for c in meta["columns"] if c["name"] in used_columns]
+    names = [c["name"] for c in used]
+    arrays = [columns[name] for name in names]
+    vocabularies = [
+        np.array(c["vocabulary"], dtype=object) if c["vocabulary"] is not None else None
+        for c in used
+    ]
+
+    stop = meta["n_rows"] if n_rows is None else min(start + n_rows, meta["n_rows"])
+
+    for block_start in range(start, stop, block_size):
+        block_stop = min(block_start + block_size, stop)
+        block = []
+        for array, vocab in zip(arrays, vocabularies):
+            values = array[block_start:block_stop]
+            block.append((vocab[values] if vocab is not None else values).tolist())
+
+        for values in zip(*block):
+            x = dict(zip(names, values))
+            y = x.pop(target)
+            yield x, y
@@ -1,7 +1,67 @@
-from river import stream
 from river.datasets import base
 from pathlib import Path
 from utils import get_project_root
+from .cache import build_columnar_cache, cache_path, fingerprinted_hash, has_cache, iter_columnar_cache
+from .index import build_row_index
+from itertools import islice
+import operator
+import csv
+import io
+
+
+def iter_projected_csv(
+    path: Path,
+    used_columns: list[str],
+    converters: dict,
+    target: str,
+    offset: int = None,
+    n_rows: int = None,
+):
+    """Stream `(x, y)` pairs from a csv file, in the same format as `river.stream.iter_csv`,
+    but only tokenising and converting the `used_columns`.
+
+    Column indices are computed once from the header. Each line is split only up to the last
+    used column, and only the used fields are converted. Lines containing quotes fall back
+    to the `csv` module.
+
+    If `offset` is given, reading starts at that byte offset (see `cicids.index`) instead of
+    right after the header. If `n_rows` is given, at most that many rows are read.
+    """
+
+    with open(path, "rb") as raw:
+        header = raw.readline()
+        if offset is not None:
+            raw.seek(offset)
+
+        file = io.TextIOWrapper(raw, newline="")
+        headers = next(csv.reader([header.decode(file.encoding)]))
+
+        indices = [i for i, name in enumerate(headers) if name in used_columns]
+        names = [headers[i] for i in indices]
+        used_converters = [converters.get(name, str) for name in names]
+        max_split = max(indices) + 1
+
+        getter = operator.itemgetter(*indices)
+        if len(indices) == 1:
+            # itemgetter returns a bare value instead of a tuple for a single index
+            getter = lambda fields, get=getter: (get(fields),)
+
+        def rows():
+            for line in file:
+                line = line.rstrip("\r\n")
+                if not line:
+                    continue
+
+                if '"' in line:
+                    fields = next(csv.reader([line]))
+                else:
+                    fields = line.split(",", max_split)
+
+                x = dict(zip(names, [conv(v) for conv, v in zip(used_converters, getter(fields))]))
+                y = x.pop(target)
+                yield x, y
+
+        yield from islice(rows(), n_rows)
 
 
 class CICIDS2017(base.FileDataset):
@@ -10,7 +70,11 @@ class CICIDS2017(base.FileDataset):
     Parameters
     ----------
     n_samples
-        Number of samples in the dataset.
+        Number of samples in the dataset. If given, iteration stops after this many samples.
+    start_sample
+        (default: 0) Index of the first sample of the dataset file to be read. Windows of the file
+        are read by seeking straight to their first row, using a row index (see `cicids.index`)
+        built once per file and stored alongside it.
     n_classes
         Number of classes in the dataset. Works with 2 variants 27 and 16 classes (all attempted attacks are classified as BENIGN).
     n_features
@@ -21,6 +85,9 @@ class CICIDS2017(base.FileDataset):
         Name of file containing data.
     directory
         The directory where the file is contained.
+    use_cache
+        (default: `True`) Stream from the columnar binary cache of the file (see `build_cache`)
+        when one exists for its current contents, instead of parsing the csv.
     """
 
     DEFAULT_DATSET_DIR = "cicids2017"
@@ -360,6 +427,8 @@ class CICIDS2017(base.FileDataset):
         used_features: list = None,
         convert_attempted: bool = True,
         n_samples: int = None,
+        start_sample: int = 0,
+        use_cache: bool = True,
     ):
         if filename is None:
             filename = [
@@ -393,7 +462,7 @@ class CICIDS2017(base.FileDataset):
             self.classes = CICIDS2017.plain_classes + CICIDS2017.attempted_classes
 
         super().__init__(
-            n_samples=n_samples or 2099976,  # Samples for subset or full dataset
+            n_samples=n_samples or 2099976 - start_sample,  # Samples for subset or full dataset
             n_classes=len(self.classes),
             # -1 because label is not a feature in stream
             n_features=len(self.used_features) - 1,
@@ -402,22 +471,71 @@ class CICIDS2017(base.FileDataset):
             directory=str(directory),
         )
 
+        if start_sample < 0:
+            raise ValueError(f"Invalid value {start_sample = }, it cannot be negative")
+
+        self.start_sample = start_sample
+        self._max_samples = n_samples
+        self.use_cache = use_cache
+        self._hash = None
+        self._hash_stamp = None
+
     @staticmethod
     def default_dataset_dir() -> Path:
         return get_project_root() / CICIDS2017.DEFAULT_DATSET_DIR
 
+    @property
+    def file_hash(self) -> str:
+        """Content hash of the dataset file, recomputed only when the file changes on disk. The hash
+        is also stored next to the caches of the file, so other instances do not recompute it."""
+        stat = Path(self.path).stat()
+        stamp = (stat.st_size, stat.st_mtime_ns)
+
+        if self._hash_stamp != stamp:
+            self._hash = fingerprinted_hash(Path(self.path))
+            self._hash_stamp = stamp
+
+        return self._hash
+
+    @property
+    def cache_path(self) -> Path:
+        """Location of the columnar cache matching the current contents of the dataset file."""
+        return cache_path(Path(self.path), self.file_hash)
+
+    def build_cache(self, force: bool = False) -> Path:
+        """Convert the dataset file into a typed, columnar on-disk cache, which is then used
+        transparently by every following iteration. Only has to be done once per file."""
+        return build_columnar_cache(
+            Path(self.path), self.converters[0], digest=self.file_hash, force=force
+        )
+
+    @property
+    def _repr_content(self):
+        return {**super()._repr_content, "Start sample": f"{self.start_sample:,}"}
+
     def __iter__(self):
-        drop_features = [
-            feature for feature in self.features if feature not in self.used_features
-        ]
+        # The file is not hashed at all if there is no cache of it
+        if self.use_cache and has_cache(Path(self.path)) and self.cache_path.is_dir():
+            return iter_columnar_cache(
+                self.cache_path,
+                used_columns=self.used_features,
+                target=self.LABEL_COLUMN_NAME,
+                start=self.start_sample,
+                n_rows=self._max_samples,
+            )
 
-        used_converters = {}
-        for key in self.used_features:
-            used_converters[key] = self.converters[0][key]
+        offset = None
+        if self.start_sample > 0:
+            offsets = build_row_index(Path(self.path))
+            if self.start_sample >= len(offsets):
+                return iter(())
+            offset = int(offsets[self.start_sample])
 
-        return stream.iter_csv(
+        return iter_projected_csv(
             self.path,
+            used_columns=self.used_features,
+            converters=self.converters[0],
             target=self.LABEL_COLUMN_NAME,
-            converters=used_converters,
-            drop=drop_features,
+            offset=offset,
+            n_rows=self._max_samples,
         )
@@ -0,0 +1,61 @@
+from pathlib import Path
+import numpy as np
+import sys
+
+INDEX_SUFFIX = ".idx.npz"
+
+
+def index_path(csv_path: Path) -> Path:
+    """Location of the row index of `csv_path`, stored alongside it"""
+
+    return csv_path.with_name(csv_path.name + INDEX_SUFFIX)
+
+
+def _fingerprint(csv_path: Path) -> np.ndarray:
+    stat = csv_path.stat()
+    return np.array([stat.st_size, stat.st_mtime_ns], dtype=np.int64)
+
+
+def build_row_index(csv_path: Path, force: bool = False) -> np.ndarray:
+    """Create the byte offset of every data row (header and blank lines excluded) of `csv_path`
+    and store it alongside the file, together with the file's size and modification time."""
+
+    output_path = index_path(csv_path)
+
+    if not force:
+        offsets = load_row_index(csv_path)
+        if offsets is not None:
+            return offsets
+
+    print(f"[.] Building row index of {csv_path}...", file=sys.stderr)
+
+    offsets = []
+    with open(csv_path, "rb") as file:
+        position = len(file.readline())
+        for line in file:
+            if line.strip(b"\r\n"):
+                offsets.append(position)
+            position += len(line)
+
+    offsets = np.array(offsets, dtype=np.int64)
+
+    # Write under a temporary name first, so an interrupted build is never picked up
+    tmp_path = output_path.with_name(output_path.name + ".tmp")
+    with open(tmp_path, "wb") as file:
+        np.savez(file, offsets=offsets, fingerprint=_fingerprint(csv_path))
+    tmp_path.replace(output_path)
+
+    return offsets
+
+
+def load_row_index(csv_path: Path) -> np.ndarray | None:
+    """Row offsets of `csv_path` created by `build_row_index`, or `None` if the index
+    does not exist or the file has changed since it was built."""
+
+    try:
+        with np.load(index_path(csv_path)) as index:
+            if not np.array_equal(index["fingerprint"], _fingerprint(csv_path)):
+                return None
+            return index["offsets"]
+    except (OSError, KeyError, ValueError):
+        return None
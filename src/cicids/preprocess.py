@@ -1,10 +1,19 @@
 from cicids import CICIDS2017
+from pathos.multiprocessing import Pool
 from pathlib import Path
 from tqdm import tqdm
+import time
 import csv
 import sys
+import io
+import os
 
 DAYS_DIR = "days"
+WEEKDAYS = ["monday", "tuesday", "wednesday", "thursday", "friday"]
+
+# Size of the byte ranges of day files processed by a single worker task
+CHUNK_SIZE = 1 << 26
+WRITE_BUFFER_SIZE = 1 << 24
 
 
 def _merge_cicids(
@@ -153,6 +162,199 @@ def _create_subset(
     return output_path
 
 
+def _chunk_ranges(path: Path, chunk_size: int) -> list[tuple[int, int]]:
+    """Split the data rows of `path` into byte ranges of about `chunk_size`, aligned to line starts"""
+
+    size = path.stat().st_size
+    ranges = []
+    with open(path, "rb") as file:
+        start = len(file.readline())
+        while start < size:
+            file.seek(min(start + chunk_size, size))
+            file.readline()
+            end = min(file.tell(), size)
+            ranges.append((start, end))
+            start = end
+    return ranges
+
+
+def _read_lines(path: Path, start: int, end: int) -> list[bytes]:
+    with open(path, "rb") as file:
+        file.seek(start)
+        data = file.read(end - start)
+    return [line for line in data.splitlines() if line]
+
+
+def _count_chunk_rows(task: tuple) -> int:
+    return len(_read_lines(*task))
+
+
+def _rewrite_quoted(line: bytes, id_offset: int, label_index: int) -> tuple[bytes, bytes]:
+    """Slow path of `_process_chunk` for lines which need to be handled by the `csv` module"""
+
+    row = next(csv.reader([line.decode()]))
+    row[0] = str(int(row[0]) + id_offset)
+
+    def write(row: list) -> bytes:
+        output = io.StringIO()
+        csv.writer(output, lineterminator="").writerow(row)
+        return output.getvalue().encode()
+
+    merged = write(row)
+    if label_index is not None and "- Attempted" in row[label_index]:
+        row[label_index] = "BENIGN"
+    return merged, write(row)
+
+
+def _process_chunk(task: tuple) -> dict[str, bytes]:
+    """Renumber ids, convert attempted labels and extract the subset window of a single chunk of
+    a day file, in one pass. Returns the chunk's contribution to each of the requested outputs."""
+
+    path, start, end, id_offset, first_row, label_index, outputs, window = task
+
+    merged, noatt, subset = [], [], []
+    window_start, window_stop = window
+
+    for row, line in enumerate(_read_lines(path, start, end), start=first_row):
+        if b'"' in line:
+            merged_line, noatt_line = _rewrite_quoted(line, id_offset, label_index)
+        else:
+            row_id, comma, rest = line.partition(b",")
+            merged_line = noatt_line = str(int(row_id) + id_offset).encode() + comma + rest
+
+            if label_index is not None and b"- Attempted" in merged_line:
+                fields = merged_line.split(b",")
+                if b"- Attempted" in fields[label_index]:
+                    fields[label_index] = b"BENIGN"
+                    noatt_line = b",".join(fields)
+
+        if "merged" in outputs:
+            merged.append(merged_line)
+        if "noatt" in outputs:
+            noatt.append(noatt_line)
+        if "subset" in outputs and window_start <= row < window_stop:
+            subset.append(noatt_line if label_index is not None else merged_line)
+
+    # Terminate lines the same way `csv.writer` does
+    return {
+        key: b"".join(line + b"\r\n" for line in lines)
+        for key, lines in [("merged", merged), ("noatt", noatt), ("subset", subset)]
+        if key in outputs
+    }
+
+
+def preprocess_cicids(
+    dataset_path: Path = None,
+    days_dir: str = DAYS_DIR,
+    convert_attempted: bool = True,
+    start_sample: int = 0,
+    n_samples: int = None,
+    workers: int = None,
+    chunk_size: int = CHUNK_SIZE,
+    force: bool = False,
+) -> Path:
+    """Merge the day files, renumber ids, convert attempted attacks to BENIGN and extract a subset,
+    all in a single pass over the day files.
+
+    Day files are split into chunks of about `chunk_size` bytes, which are processed concurrently by
+    a pool of `workers` processes (defaults to the number of CPUs) and written in order using large
+    buffered writes. Only outputs which do not exist yet (or all of them, with `force=True`) are
+    written. Returns the path of the file matching the given parameters, same as `generate_cicids_file`.
+    """
+
+    dataset_path = (dataset_path or CICIDS2017.default_dataset_dir()).resolve()
+    days_path = dataset_path / days_dir
+    merged_path = dataset_path / CICIDS2017.DEFAULT_MERGED_FILENAME
+    noatt_path = merged_path.with_stem(f"{merged_path.stem}_noatt")
+    final_path = noatt_path if convert_attempted else merged_path
+
+    assert days_path.is_dir(), f"Directory {days_path} does not exist."
+
+    paths = {"merged": merged_path}
+    if convert_attempted:
+        paths["noatt"] = noatt_path
+    if not (start_sample == 0 and n_samples is None):
+        paths["subset"] = dataset_path / predict_cicids_filename(convert_attempted, start_sample, n_samples)
+        final_path = paths["subset"]
+
+    for key, path in list(paths.items()):
+        if path.is_file():
+            if not force:
+                print(
+                    f"[!] {path} already exists, use `force=True` to override. Skipping...",
+                    file=sys.stderr,
+                )
+                del paths[key]
+                continue
+
+            path.unlink()
+
+    if not paths:
+        return final_path
+
+    day_paths = [days_path / f"{weekday}.csv" for weekday in WEEKDAYS]
+    for day_path in day_paths:
+        assert day_path.is_file(), f"File {day_path} does not exist!"
+
+    with open(day_paths[0], "r", newline="") as file:
+        header_line = file.readline().rstrip("\r\n")
+    headers = next(csv.reader([header_line]))
+    label_index = headers.index(CICIDS2017.LABEL_COLUMN_NAME) if convert_attempted else None
+
+    window = (start_sample, float("inf") if n_samples is None else start_sample + n_samples)
+    tasks = [(path, *chunk) for path in day_paths for chunk in _chunk_ranges(path, chunk_size)]
+
+    start_time = time.perf_counter()
+    pool = Pool(workers or os.cpu_count())
+    try:
+        # First pass only counts rows, which determines id offsets and global row indices of chunks
+        counts = list(pool.imap(_count_chunk_rows, tasks))
+
+        process_tasks = []
+        n_rows, day_offset, previous_day = 0, 0, None
+        for (path, start, end), count in zip(tasks, counts):
+            if path != previous_day:
+                day_offset, previous_day = n_rows, path
+
+            # With only the subset requested, chunks outside of its window can be skipped entirely
+            if paths.keys() != {"subset"} or (n_rows + count > window[0] and n_rows < window[1]):
+                process_tasks.append(
+                    (path, start, end, day_offset, n_rows, label_index, set(paths), window)
+                )
+            n_rows += count
+
+        files = {key: open(path, "wb", buffering=WRITE_BUFFER_SIZE) for key, path in paths.items()}
+        try:
+            for file in files.values():
+                file.write(header_line.encode() + b"\r\n")
+
+            for chunk_outputs in tqdm(pool.imap(_process_chunk, process_tasks), total=len(process_tasks)):
+                for key, data in chunk_outputs.items():
+                    files[key].write(data)
+        finally:
+            for file in files.values():
+                file.close()
+    finally:
+        pool.close()
+        pool.join()
+
+    elapsed = time.perf_counter() - start_time
+    n_bytes = sum(path.stat().st_size for path in day_paths)
+    print(
+        f"[.] Processed {n_rows:,} rows ({n_bytes / 2**20:,.1f} MiB) in {elapsed:.2f}s: "
+        f"{n_rows / elapsed:,.0f} rows/s, {n_bytes / 2**20 / elapsed:,.1f} MiB/s",
+        file=sys.stderr,
+    )
+
+    if "subset" in paths and n_samples is not None and n_rows - start_sample < n_samples:
+        print(
+            f"[!] subset generation processed {max(n_rows - start_sample, 0)} which is smaller than specified {n_samples}",
+            file=sys.stderr,
+        )
+
+    return final_path
+
+
 def generate_cicids_file(
     dataset_path: Path = None,
     start_sample: int = 0,
@@ -160,21 +362,19 @@ def generate_cicids_file(
     n_samples: int = None,
     days_dir: str = DAYS_DIR,
     force: bool = False,
+    workers: int = None,
 ) -> Path:
     """Merge, Convert and return CICIDS subset according to given parameters. Setting n_samples = None collects rest of the dataset"""
 
-    file_path = _merge_cicids(dataset_path, days_dir, force=force)
-    if convert_attempted:
-        file_path = _convert_attempted_to_benign(input_path=file_path, force=force)
-
-    if not (start_sample == 0 and n_samples is None):
-        file_path = _create_subset(
-            input_path=file_path,
-            start_sample=start_sample,
-            n_samples=n_samples,
-            force=force,
-        )
-    return file_path
+    return preprocess_cicids(
+        dataset_path=dataset_path,
+        days_dir=days_dir,
+        convert_attempted=convert_attempted,
+        start_sample=start_sample,
+        n_samples=n_samples,
+        workers=workers,
+        force=force,
+    )
 
 
 def predict_cicids_filename(
@@ -1,8 +1,19 @@
-from .runner import ExperimentRunner
+from .runner import ExperimentRunner, HyperparameterScanRunner
 from .analyzer import DatasetAnalyzer
+from .metrics_log import load_metrics, load_predictions, load_runs
+from .recompute import recompute_metrics
+from .shared import SharedDataset
+from .multi import MultiModelRunner, SuccessiveHalvingRunner
 
 __all__ = [
     "ExperimentRunner",
     "DatasetAnalyzer",
-    "HyperparameterScanRunner"
+    "load_metrics",
+    "load_predictions",
+    "load_runs",
+    "recompute_metrics",
+    "SharedDataset",
+    "HyperparameterScanRunner",
+    "MultiModelRunner",
+    "SuccessiveHalvingRunner",
 ]
\ No newline at end of file
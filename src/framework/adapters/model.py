@@ -31,7 +31,8 @@ class CBCEAdapter(PerClassMetricsMixin, DriftModelAdapterBase[CBCE]):
     
     def get_loggable_state(self) -> dict:
         state = {
-            "class_priors": self._model._class_priors,
+            "class_priors": dict(self._model._class_priors),
+            "sample_buffer": self._model._sample_buffer.memory_stats(),
         }
 
         return self.add_drift_state(self.add_per_class_state(state), active_classes=self._model.classifiers.keys())
@@ -139,7 +140,7 @@ class RBCAdapter(PerClassMetricsMixin, ModelAdapterBase[ResamplingBaggingClassif
 
     def get_loggable_state(self) -> dict:
         state = {
-            "class_priors": self._model._class_priors,
+            "class_priors": dict(self._model._class_priors),
         }
 
         return self.add_per_class_state(state)
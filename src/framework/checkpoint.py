@@ -0,0 +1,70 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+import os
+import pickle
+
+
+def checkpoint_path(out_dir: str | Path, run_id: str) -> Path:
+    """Location of the latest checkpoint of run `run_id`."""
+    return Path(out_dir) / f"{run_id}_CHECKPOINT.pkl"
+
+
+def write_atomic(path: str | Path, data: bytes) -> None:
+    """Write `data` to `path`, replacing it atomically, so that a crash never leaves a partially
+    written file behind."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as file:
+        file.write(data)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(tmp_path, path)
+
+
+def load_checkpoint(path: str | Path) -> dict:
+    with open(path, "rb") as file:
+        return pickle.load(file)
+
+
+class CheckpointWriter:
+    """Writes the checkpoints of a run in a background thread.
+
+    The state is pickled right away, which copies it, and then written to disk while the run goes
+    on. At most one checkpoint is pending: writing another one first waits for it. Errors of the
+    background writes are raised by the next `write` or by `close`.
+
+    Parameters
+    ----------
+    path
+        The checkpoint file, replaced by every write.
+
+    """
+
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self._pending: Future | None = None
+
+    def write(self, state: dict) -> None:
+        data = pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL)
+
+        self.wait()
+        self._pending = self._executor.submit(write_atomic, self.path, data)
+
+    def wait(self) -> None:
+        """Wait for the pending checkpoint to be written, if any."""
+        if self._pending is not None:
+            pending, self._pending = self._pending, None
+            pending.result()
+
+    def close(self) -> None:
+        try:
+            self.wait()
+        finally:
+            self._executor.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
@@ -0,0 +1,136 @@
+from itertools import product
+from time import perf_counter
+from datetime import timedelta
+from river.base import Estimator
+from river.datasets.base import Dataset
+import hashlib
+import json
+import math
+import random
+import re
+
+
+def sweep(space: dict[str, list]) -> list[dict]:
+    """Paramsets varying one hyperparameter at a time: each hyperparameter set to each of its
+    values, leaving all others as defined on the model."""
+    return [{hyperparam: val} for hyperparam, vals in space.items() for val in vals]
+
+
+def grid(space: dict[str, list]) -> list[dict]:
+    """Paramsets of all combinations of the values of the hyperparameters (cartesian product)."""
+    names = list(space)
+    return [dict(zip(names, values)) for values in product(*(space[name] for name in names))]
+
+
+def _value(spec, u: float):
+    """Value of the hyperparameter described by `spec` at quantile `u` of its range, see
+    `random_search`."""
+    if isinstance(spec, list):
+        return spec[min(int(u * len(spec)), len(spec) - 1)]
+
+    low, high, *scale = spec
+    if scale == ["log"]:
+        return math.exp(math.log(low) + u * (math.log(high) - math.log(low)))
+    if isinstance(low, int) and isinstance(high, int):
+        return min(low + int(u * (high - low + 1)), high)
+    return low + u * (high - low)
+
+
+def random_search(space: dict, n: int, seed: int = None) -> list[dict]:
+    """`n` paramsets drawn at random from the given ranges.
+
+    Parameters
+    ----------
+    space
+        Hyperparameter names mapped to either a list of values, drawn with equal probability, or
+        a `(low, high)` range, drawn uniformly (integers from both ends included if both are
+        integers), or a `(low, high, "log")` range, drawn uniformly on a log scale.
+    n
+        Number of paramsets.
+    seed
+        (optional) Seed of the random number generator.
+
+    """
+    rng = random.Random(seed)
+    return [{name: _value(spec, rng.random()) for name, spec in space.items()} for _ in range(n)]
+
+
+def latin_hypercube(space: dict, n: int, seed: int = None) -> list[dict]:
+    """`n` paramsets drawn from the given ranges (see `random_search`) by Latin hypercube sampling:
+    the range of each hyperparameter is split into `n` equally likely intervals, and each interval
+    is used by exactly one paramset, so that the paramsets cover every range evenly."""
+    rng = random.Random(seed)
+
+    quantiles = {}
+    for name in space:
+        strata = rng.sample(range(n), n)
+        quantiles[name] = [(stratum + rng.random()) / n for stratum in strata]
+
+    return [{name: _value(spec, quantiles[name][i]) for name, spec in space.items()} for i in range(n)]
+
+
+def _stable_repr(obj) -> str:
+    # Memory addresses differ between processes, e.g. in reprs of functions
+    return re.sub(r" at 0x[0-9a-fA-F]+", "", repr(obj))
+
+
+def run_key(model: Estimator, dataset: Dataset) -> str:
+    """Stable hash of the parameters of `model` and the configuration of `dataset`, identifying the
+    runs of a scan across processes and restarts."""
+    config = {
+        "model": model.__class__.__name__,
+        "hyperparameters": model._get_params(),
+        "dataset": dataset.__class__.__name__,
+        "dataset_config": dataset._repr_content,
+    }
+    data = json.dumps(config, sort_keys=True, default=_stable_repr)
+    return hashlib.blake2b(data.encode(), digest_size=8).hexdigest()
+
+
+class ScanProgress:
+    """Projects the remaining wall time of a scan from the durations of its finished runs, relative
+    to their costs, assuming the remaining runs keep all workers busy.
+
+    Parameters
+    ----------
+    costs
+        Relative costs of the runs still to be done, e.g. their expected number of operations.
+    n_workers
+        Number of runs done in parallel.
+
+    """
+
+    def __init__(self, costs: list[float], n_workers: int = 1) -> None:
+        self.n_runs = len(costs)
+        self.n_workers = n_workers
+        self.n_done = 0
+        self.remaining_cost = sum(costs)
+
+        self._measured_cost = 0.0
+        self._measured_time = 0.0
+        self._start = perf_counter()
+
+    def add_measurement(self, cost: float, duration: float) -> None:
+        """Account for a run of the given cost which took `duration` seconds, e.g. from a previous
+        attempt of the scan."""
+        self._measured_cost += cost
+        self._measured_time += duration
+
+    def done(self, cost: float, duration: float) -> None:
+        self.n_done += 1
+        self.remaining_cost -= cost
+        self.add_measurement(cost, duration)
+
+    @property
+    def projected(self) -> float | None:
+        """Projected wall time of the remaining runs, in seconds, unknown until a run is measured."""
+        if not self._measured_cost:
+            return None
+
+        workers = max(min(self.n_workers, self.n_runs - self.n_done), 1)
+        return self._measured_time / self._measured_cost * self.remaining_cost / workers
+
+    def report(self) -> str:
+        elapsed = timedelta(seconds=round(perf_counter() - self._start))
+        projected = "unknown" if self.projected is None else timedelta(seconds=round(self.projected))
+        return f"{self.n_done}/{self.n_runs} runs done in {elapsed}, projected remaining wall time: {projected}"
@@ -0,0 +1,396 @@
+from pathlib import Path
+import numpy as np
+import json
+import time
+import csv
+import os
+
+STEP_COLUMN_NAME = "step"
+META_FILENAME = "meta.json"
+
+PREDICTIONS_COLUMNS = ("y_true", "y_pred")
+
+# Formats of the metrics log, either text or fixed-width binary columns of the given float type
+METRICS_FORMATS = ("csv", "float32", "float64")
+
+
+class MetricsLogger:
+    """Decides when metric values are logged, buffers the logged rows in memory and flushes
+    them to `writer` in bulk.
+
+    Parameters
+    ----------
+    writer
+        Destination of the logged rows, any object with a `writerows` method (e.g. `csv.writer`).
+    names
+        Names of the logged metrics, computed once.
+    every
+        (default: 1) Log every `every`-th step.
+    interval
+        (optional) Also log whenever this many seconds have passed since the last logged step.
+    on_change
+        (optional) Also log whenever any metric changed by more than this (absolute) amount since
+        the last logged step, e.g. on sudden change-points of the metric curves.
+    buffer_size
+        (default: 1000) Number of rows buffered before they are flushed to `writer`.
+
+    """
+
+    def __init__(self, writer, names: list[str], every: int = 1, interval: float = None, on_change: float = None, buffer_size: int = 1000) -> None:
+        if not isinstance(every, int) or every <= 0:
+            raise ValueError(f"Invalid value {every = }, only positive integers are supported")
+
+        if interval is not None and interval <= 0:
+            raise ValueError(f"Invalid value {interval = }, only positive numbers are supported")
+
+        if on_change is not None and on_change < 0:
+            raise ValueError(f"Invalid value {on_change = }, it cannot be negative")
+
+        self.writer = writer
+        self.names = list(names)
+        self.every = every
+        self.interval = interval
+        self.on_change = on_change
+        self.buffer_size = buffer_size
+
+        self._buffer = []
+        self._last_step = None
+        self._last_values = None
+        self._last_time = time.monotonic()
+
+    @property
+    def is_decimated(self) -> bool:
+        """Whether some steps are not logged. The rows of decimated logs start with the step number."""
+        return self.every != 1 or self.interval is not None or self.on_change is not None
+
+    @property
+    def header(self) -> list[str]:
+        return [STEP_COLUMN_NAME, *self.names] if self.is_decimated else self.names
+
+    @property
+    def watches_values(self) -> bool:
+        """Whether logging may depend on metric values, rather than only on the step."""
+        return self.on_change is not None
+
+    @property
+    def last_step(self) -> int | None:
+        return self._last_step
+
+    @property
+    def last_values(self) -> dict:
+        """Last logged values, as a dict of metric names."""
+        return dict(zip(self.names, self._last_values or []))
+
+    def due(self, step: int) -> bool:
+        """Whether `step` has to be logged, regardless of metric values."""
+        if step % self.every == 0:
+            return True
+
+        return self.interval is not None and time.monotonic() - self._last_time >= self.interval
+
+    def changed(self, values: list[float]) -> bool:
+        """Whether any metric changed by more than `on_change` since the last logged step."""
+        if self.on_change is None or self._last_values is None:
+            return False
+
+        return any(abs(v - last) > self.on_change for v, last in zip(values, self._last_values))
+
+    def log(self, step: int, values: list[float]) -> None:
+        """Buffer the row of metric values for `step`."""
+        self._buffer.append([step, *values] if self.is_decimated else values)
+        self._last_step = step
+        self._last_values = values
+        self._last_time = time.monotonic()
+
+        if len(self._buffer) >= self.buffer_size:
+            self.flush()
+
+    def flush(self) -> None:
+        if self._buffer:
+            self.writer.writerows(self._buffer)
+            self._buffer.clear()
+
+    def state(self) -> dict:
+        """Last logged step and values, which `restore` returns to. Buffered rows are not included."""
+        return {"last_step": self._last_step, "last_values": self._last_values}
+
+    def restore(self, state: dict) -> None:
+        self._buffer.clear()
+        self._last_step = state["last_step"]
+        self._last_values = state["last_values"]
+        self._last_time = time.monotonic()
+
+
+class CSVMetricsWriter:
+    """Writes the metrics log as a `.csv` file, with a header row of column names.
+
+    If `resume_at` is given, the existing log is truncated to that `position` and appended to.
+    """
+
+    def __init__(self, path: str | Path, columns: list[str], resume_at: int = None) -> None:
+        if resume_at is None:
+            self._file = open(path, "x", newline="")
+            self._writer = csv.writer(self._file)
+            self._writer.writerow(columns)
+        else:
+            self._file = open(path, "r+", newline="")
+            self._file.truncate(resume_at)
+            self._file.seek(resume_at)
+            self._writer = csv.writer(self._file)
+
+    def writerows(self, rows) -> None:
+        self._writer.writerows(rows)
+
+    def position(self) -> int:
+        """Size of the log written so far, to resume from."""
+        self._file.flush()
+        return self._file.tell()
+
+    def close(self) -> None:
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+
+class BinaryMetricsWriter:
+    """Writes the metrics log as a directory with one append-only file of fixed-width values per
+    column, plus `meta.json` with the column names, types and the number of complete rows.
+
+    Every call to `writerows` appends a chunk to each column and then updates `meta.json`, so
+    the log can be read (e.g. by `load_metrics`) while the experiment is still running.
+
+    Parameters
+    ----------
+    path
+        The directory to be created for the log.
+    columns
+        Names of the columns. The `step` column is stored as int64, all others as `dtype`.
+    dtype
+        (default: "float64") Type of the metric values.
+    resume_at
+        (optional) Append to the existing log instead, truncated to this many rows (see `position`).
+
+    """
+
+    def __init__(self, path: str | Path, columns: list[str], dtype: str = "float64", resume_at: int = None) -> None:
+        self.path = Path(path)
+        if resume_at is None:
+            self.path.mkdir()
+
+        self.dtypes = [np.dtype(np.int64 if name == STEP_COLUMN_NAME else dtype) for name in columns]
+        self.columns = list(columns)
+        self.n_rows = resume_at or 0
+
+        self._files = [open(self.path / f"{i}.bin", "ab") for i in range(len(columns))]
+        for file, dtype in zip(self._files, self.dtypes):
+            file.truncate(self.n_rows * dtype.itemsize)
+        self._write_meta()
+
+    def _meta(self) -> dict:
+        return {
+            "columns": [{"name": name, "dtype": dtype.str} for name, dtype in zip(self.columns, self.dtypes)],
+            "n_rows": self.n_rows,
+        }
+
+    def _write_meta(self) -> None:
+        meta = self._meta()
+
+        # Replace atomically, so readers never see a partially written file
+        tmp_path = self.path / f"{META_FILENAME}.tmp"
+        with open(tmp_path, "w") as file_meta:
+            json.dump(meta, file_meta, indent=4)
+        os.replace(tmp_path, self.path / META_FILENAME)
+
+    def writerows(self, rows) -> None:
+        rows = np.asarray(rows, dtype=np.float64).reshape(-1, len(self.columns))
+        if not len(rows):
+            return
+
+        for file, dtype, values in zip(self._files, self.dtypes, rows.T):
+            file.write(values.astype(dtype).tobytes())
+            file.flush()
+
+        self.n_rows += len(rows)
+        self._write_meta()
+
+    def position(self) -> int:
+        """Number of rows written so far, to resume from."""
+        return self.n_rows
+
+    def close(self) -> None:
+        for file in self._files:
+            file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+
+class PredictionsWriter(BinaryMetricsWriter):
+    """Writes the evaluated `(y_true, y_pred)` pairs of a run, as a binary log (see
+    `BinaryMetricsWriter`) of int32 codes of the labels. Labels are coded in order of appearance,
+    and listed in `meta.json`, so they have to be JSON serializable.
+
+    Parameters
+    ----------
+    path
+        The directory to be created for the log.
+    buffer_size
+        (default: 1000) Number of pairs buffered before they are written.
+    resume_at
+        (optional) Append to the existing log instead, truncated to this many pairs, keeping the
+        codes of its labels.
+
+    """
+
+    def __init__(self, path: str | Path, buffer_size: int = 1000, resume_at: int = None) -> None:
+        self.buffer_size = buffer_size
+
+        self._codes = {}
+        self._buffer = []
+
+        if resume_at is not None:
+            with open(Path(path) / META_FILENAME) as file_meta:
+                self._codes = {label: code for code, label in enumerate(json.load(file_meta)["labels"])}
+
+        super().__init__(path, list(PREDICTIONS_COLUMNS), dtype="int32", resume_at=resume_at)
+
+    def _meta(self) -> dict:
+        labels = [label.item() if isinstance(label, np.generic) else label for label in self._codes]
+        return {**super()._meta(), "labels": labels}
+
+    def __code(self, label) -> int:
+        code = self._codes.get(label)
+        if code is None:
+            code = self._codes[label] = len(self._codes)
+        return code
+
+    def write(self, y_true, y_pred) -> None:
+        self._buffer.append((self.__code(y_true), self.__code(y_pred)))
+
+        if len(self._buffer) >= self.buffer_size:
+            self.flush()
+
+    def flush(self) -> None:
+        if self._buffer:
+            self.writerows(self._buffer)
+            self._buffer.clear()
+
+    def position(self) -> int:
+        self.flush()
+        return super().position()
+
+    def close(self) -> None:
+        self.flush()
+        super().close()
+
+
+def metrics_log_path(out_dir: str | Path, run_id: str, format: str = "csv") -> Path:
+    """Location of the metrics log of run `run_id`, a `.csv` file or a directory of binary columns."""
+    return Path(out_dir) / (f"{run_id}_METRICS" + (".csv" if format == "csv" else ""))
+
+
+def predictions_log_path(out_dir: str | Path, run_id: str) -> Path:
+    """Location of the predictions log of run `run_id`, a directory of binary columns."""
+    return Path(out_dir) / f"{run_id}_PREDICTIONS"
+
+
+def open_metrics_log(path: str | Path, columns: list[str], format: str = "csv", resume_at: int = None):
+    """Create a new metrics log in the given format, see `METRICS_FORMATS`, or append to an
+    existing one from the `position` of its writer given as `resume_at`."""
+    if format not in METRICS_FORMATS:
+        raise ValueError(f"Invalid metrics log format {format!r}, supported formats are {METRICS_FORMATS}")
+
+    if format == "csv":
+        return CSVMetricsWriter(path, columns, resume_at=resume_at)
+    return BinaryMetricsWriter(path, columns, dtype=format, resume_at=resume_at)
+
+
+def load_metrics(path: str | Path, names: list[str] = None) -> dict[str, np.ndarray]:
+    """Load the metrics log at `path` as a dict of column name to array.
+
+    Binary logs are memory-mapped, so only the columns (and rows) actually used are read from
+    disk. `.csv` logs are parsed in full.
+
+    Parameters
+    ----------
+    path
+        A binary metrics log directory or a `.csv` metrics log.
+    names
+        (optional) Names of the columns to load, by default all of them.
+
+    """
+    path = Path(path)
+
+    if path.is_dir():
+        with open(path / META_FILENAME) as file_meta:
+            meta = json.load(file_meta)
+
+        columns = {column["name"]: (i, np.dtype(column["dtype"])) for i, column in enumerate(meta["columns"])}
+        missing = set(names or ()) - columns.keys()
+        if missing:
+            raise KeyError(f"Metrics {sorted(missing)} not found in {path}")
+
+        metrics = {}
+        for name in names or columns:
+            i, dtype = columns[name]
+            column_path = path / f"{i}.bin"
+
+            # Rows written after the last update of meta.json are incomplete
+            n_rows = min(meta["n_rows"], column_path.stat().st_size // dtype.itemsize)
+            metrics[name] = np.memmap(column_path, dtype=dtype, mode="r", shape=(n_rows,)) if n_rows else np.empty(0, dtype)
+        return metrics
+
+    with open(path, newline="") as file_metrics:
+        reader = csv.reader(file_metrics)
+        header = next(reader)
+        values = np.array([[float(v) for v in row] for row in reader], dtype=np.float64).reshape(-1, len(header))
+
+    columns = dict(zip(header, values.T))
+    missing = set(names or ()) - columns.keys()
+    if missing:
+        raise KeyError(f"Metrics {sorted(missing)} not found in {path}")
+
+    return {name: columns[name] for name in names or header}
+
+
+def load_predictions(path: str | Path) -> tuple[np.ndarray, np.ndarray, list]:
+    """Load a predictions log written by `PredictionsWriter`, as memory-mapped arrays of the codes
+    of the true and predicted labels, and the list of labels by code."""
+    columns = load_metrics(path, list(PREDICTIONS_COLUMNS))
+
+    with open(Path(path) / META_FILENAME) as file_meta:
+        labels = json.load(file_meta)["labels"]
+
+    return columns["y_true"], columns["y_pred"], labels
+
+
+def load_runs(out_dir: str | Path, names: list[str] = None, pattern: str = "*") -> dict[str, dict[str, np.ndarray]]:
+    """Load the metrics logs of all runs in `out_dir` whose id matches `pattern`, for comparing runs.
+
+    Returns a dict of run id to the run's metrics, see `load_metrics`. Runs lacking any of the
+    requested `names` are skipped. If a run has both a binary and a `.csv` log, the binary one is used.
+    """
+    runs = {}
+    for path in sorted(Path(out_dir).glob(f"{pattern}_METRICS*")):
+        if path.is_dir():
+            run_id = path.name.removesuffix("_METRICS")
+        elif path.suffix == ".csv":
+            run_id = path.name.removesuffix("_METRICS.csv")
+            if run_id in runs:
+                continue
+        else:
+            continue
+
+        try:
+            runs[run_id] = load_metrics(path, names)
+        except KeyError:
+            continue
+
+    return runs
@@ -0,0 +1,362 @@
+from contextlib import nullcontext
+from copy import copy
+from itertools import islice
+from typing import Iterable
+import math
+import multiprocess as mp
+import numpy as np
+from framework.metrics_log import load_metrics
+from framework.runner import ExperimentRunner
+from framework.shared import SharedDataset
+from framework.util import extract_metric_name
+from synthstream import SyntheticStream
+
+STEP, FINISH, CLOSE = range(3)
+
+
+class _Slot:
+    """Feeds the samples of the shared scan to a single runner, in the blocks the runner would
+    read on its own, so that its results do not depend on how the scan is split into batches."""
+
+    def __init__(self, runner: ExperimentRunner) -> None:
+        self.runner = runner
+        self._pending = []
+
+    def feed(self, block: list[tuple]):
+        if self.runner.batch_size is None:
+            for x, y in block:
+                self.runner.step(x, y)
+            return
+
+        self._pending.extend(block)
+        while len(self._pending) >= self.runner.batch_size:
+            self.runner.step_many(self._pending[:self.runner.batch_size])
+            del self._pending[:self.runner.batch_size]
+
+    def flush(self):
+        """Feed the last, incomplete block, at the end of the dataset."""
+        if self._pending:
+            self.runner.step_many(self._pending)
+            self._pending = []
+
+
+def _serve_runners(connection, runners: list[ExperimentRunner]):
+    """Main loop of a worker owning some of the runners. Blocks are not acknowledged, an error
+    closes the runners of the worker and is sent back on `FINISH`."""
+    error = None
+    try:
+        for runner in runners:
+            runner.setup()
+        connection.send([runner._rows for runner in runners])
+    except Exception as e:
+        connection.send(e)
+        error = e
+
+    slots = [_Slot(runner) for runner in runners]
+
+    while True:
+        command, payload = connection.recv()
+
+        if command == STEP and error is None:
+            try:
+                for slot in slots:
+                    slot.feed(payload)
+            except Exception as e:
+                error = e
+                for runner in runners:
+                    runner.close()
+
+        elif command == FINISH:
+            if error is None:
+                try:
+                    for slot in slots:
+                        slot.flush()
+                        slot.runner.finish()
+                except Exception as e:
+                    error = e
+            connection.send(error)
+
+        elif command == CLOSE:
+            if error is None:
+                for runner in runners:
+                    runner.close()
+            connection.close()
+            return
+
+
+class MultiModelRunner:
+    """Runs several experiments over a single scan of their common dataset: every sample is read
+    once and fed to each of the runners, instead of each runner reading (or generating) the
+    dataset on its own. Every runner keeps its own model, metrics, adapter, logs and tracker run,
+    and produces the same results as if it was run on its own.
+
+    Parameters
+    ----------
+    runners
+        The experiments, all created with the same dataset object. They may differ in anything
+        else, including `batch_size`. When resuming, all of them must resume from the same number
+        of samples.
+    n_workers
+        (optional) If set, the runners are split between this many worker processes, and the
+        samples are broadcast to them in blocks. The runners given are then left untouched, their
+        results are only available in their logs. By default, all runners are run in this process.
+        Runners of models which draw from the global random number generators (e.g. `random`) only
+        reproduce their own results when each of them has a worker of its own.
+    batch_size
+        (default: 1000) Number of samples read from the dataset at a time, and fed to all runners
+        (or sent to all workers) together.
+
+    """
+
+    def __init__(self, runners: list[ExperimentRunner], n_workers: int = None, batch_size: int = 1000) -> None:
+        if not runners:
+            raise ValueError("At least one runner is required")
+
+        if any(runner.dataset is not runners[0].dataset for runner in runners):
+            raise ValueError("All runners must be created with the same dataset object")
+
+        if n_workers is not None and (not isinstance(n_workers, int) or n_workers <= 0):
+            raise ValueError(f"Invalid value {n_workers = }, only positive integers are supported")
+
+        if not isinstance(batch_size, int) or batch_size <= 0:
+            raise ValueError(f"Invalid value {batch_size = }, only positive integers are supported")
+
+        self.runners = runners
+        self.dataset = runners[0].dataset
+        self.n_workers = n_workers
+        self.batch_size = batch_size
+
+    def run(self):
+        if self.n_workers is None:
+            self.__run_in_process()
+        else:
+            self.__run_in_workers()
+
+    def _blocks(self, dataset: Iterable) -> Iterable[list[tuple]]:
+        dataset = iter(dataset)
+        while block := list(islice(dataset, self.batch_size)):
+            yield block
+
+    def _check_rows(self, rows: list[int]) -> int:
+        if len(set(rows)) > 1:
+            raise ValueError(f"All runners must resume from the same sample, got {rows = }")
+        return rows[0]
+
+    def __run_in_process(self):
+        datasets = []
+        try:
+            for runner in self.runners:
+                datasets.append(runner.setup())
+            self._check_rows([runner._rows for runner in self.runners])
+
+            slots = [_Slot(runner) for runner in self.runners]
+            for block in self._blocks(datasets[0]):
+                for slot in slots:
+                    slot.feed(block)
+
+            for slot in slots:
+                slot.flush()
+        except BaseException:
+            for runner in self.runners[:len(datasets)]:
+                runner.close()
+            raise
+
+        for runner in self.runners:
+            runner.finish()
+
+    def __run_in_workers(self):
+        n_workers = min(self.n_workers, len(self.runners))
+
+        # Spawn rather than fork, so that threads of the parent (e.g. the tracker's) are not copied
+        context = mp.get_context("spawn")
+        connections, processes = [], []
+
+        # The workers only need the configuration of the dataset, not its samples: the arrays of
+        # synthetic streams are not copied to them, other datasets are sent as they are (e.g.
+        # without building the cache of `CICIDS2017`, which the workers never read)
+        shared = SharedDataset(self.dataset) if isinstance(self.dataset, SyntheticStream) else nullcontext(self.dataset)
+        with shared as dataset:
+            try:
+                for i in range(n_workers):
+                    runners = [copy(runner) for runner in self.runners[i::n_workers]]
+                    for runner in runners:
+                        runner.dataset = dataset
+
+                    connection, worker_connection = context.Pipe()
+                    process = context.Process(target=_serve_runners, args=(worker_connection, runners), daemon=True)
+                    process.start()
+                    worker_connection.close()
+
+                    connections.append(connection)
+                    processes.append(process)
+
+                rows = []
+                for connection in connections:
+                    reply = connection.recv()
+                    if isinstance(reply, Exception):
+                        raise reply
+                    rows.extend(reply)
+                rows = self._check_rows(rows)
+
+                for block in self._blocks(self.runners[0]._dataset_from(rows)):
+                    for connection in connections:
+                        connection.send((STEP, block))
+
+                for connection in connections:
+                    connection.send((FINISH, None))
+                errors = [connection.recv() for connection in connections]
+                for error in errors:
+                    if error is not None:
+                        raise error
+            finally:
+                for connection in connections:
+                    try:
+                        connection.send((CLOSE, None))
+                    except (BrokenPipeError, OSError):
+                        pass
+                    connection.close()
+                for process in processes:
+                    process.join()
+
+
+SUMMARIES = ("mean", "min", "max", "last", "best")
+
+
+class SuccessiveHalvingRunner(MultiModelRunner):
+    """Runs several experiments over a single scan of their common dataset (see
+    `MultiModelRunner`), stopping the worst ones early by successive halving.
+
+    All runners learn the first `min_samples` samples, and are then ranked by the summary (their
+    `summary_metric`, as in the tracker) of the logged values of `metric`. Only the best `keep`
+    fraction of them goes on, with their models as they are, for the next `min_samples / keep`
+    samples in total, and so on until the end of the dataset or a single runner is left. The
+    stopped runs are finished as they are, marked as `stopped`, with the number of samples they
+    learned in `samples` of their META file.
+
+    The runners are run in this process. Runners with a `batch_size` are ranked on the blocks they
+    already evaluated, and stopped runners evaluate their last, incomplete block.
+
+    Parameters
+    ----------
+    runners
+        The experiments, all created with the same dataset object.
+    metric
+        Name of the metric the runners are ranked by, as in their metrics logs.
+    min_samples
+        Number of samples learned by all runners, before the first ranking.
+    keep
+        (default: 0.5) Fraction of the runners going on after every ranking, rounded up.
+    batch_size
+        (default: 1000) Number of samples read from the dataset at a time.
+    costs
+        (optional) Relative costs of the runners, e.g. their expected number of operations per
+        sample, used to report the compute saved. By default, all runners are assumed to cost the
+        same.
+
+    """
+
+    def __init__(self, runners: list[ExperimentRunner], metric: str, min_samples: int, keep: float = 0.5, batch_size: int = 1000, costs: list[float] = None) -> None:
+        super().__init__(runners, batch_size=batch_size)
+
+        for runner in runners:
+            if metric not in runner._metrics_names:
+                raise ValueError(f"Invalid metric {metric!r}, runner {runner._id} only logs {runner._metrics_names}")
+            if runner.sumary_metric not in SUMMARIES:
+                raise ValueError(f"Invalid summary metric {runner.sumary_metric!r} of runner {runner._id}, supported summaries are {SUMMARIES}")
+
+        if not isinstance(min_samples, int) or min_samples <= 0:
+            raise ValueError(f"Invalid value {min_samples = }, only positive integers are supported")
+
+        if not 0 < keep < 1:
+            raise ValueError(f"Invalid value {keep = }, only fractions between 0 and 1 are supported")
+
+        if costs is not None and len(costs) != len(runners):
+            raise ValueError(f"Invalid value {costs = }, expected one cost per runner")
+
+        self.metric = metric
+        self.min_samples = min_samples
+        self.keep = keep
+        self.costs = costs if costs is not None else [1] * len(runners)
+
+        # Number of samples learned by every runner, once run
+        self.samples: dict[str, int] = {}
+
+    def run(self):
+        datasets = []
+        try:
+            for runner in self.runners:
+                datasets.append(runner.setup())
+            rows = start = self._check_rows([runner._rows for runner in self.runners])
+
+            rung = self.min_samples
+            while rung <= rows:
+                rung = self.__next_rung(rung)
+
+            active = [_Slot(runner) for runner in self.runners]
+            dataset = iter(datasets[0])
+            while block := list(islice(dataset, min(self.batch_size, rung - rows))):
+                for slot in active:
+                    slot.feed(block)
+                rows += len(block)
+
+                if rows == rung:
+                    rung = self.__next_rung(rung)
+                    if len(active) > 1:
+                        active = self.__halve(active, rows)
+
+            for slot in active:
+                slot.flush()
+        except BaseException:
+            for runner in self.runners[:len(datasets)]:
+                if runner._id not in self.samples:
+                    runner.close()
+            raise
+
+        for slot in active:
+            self.samples[slot.runner._id] = rows
+            slot.runner.finish()
+
+        self.__report(start, rows)
+
+    def __next_rung(self, rung: int) -> int:
+        return max(math.ceil(rung / self.keep), rung + 1)
+
+    def __halve(self, active: list[_Slot], rows: int) -> list[_Slot]:
+        """Finish all runners but the best `keep` fraction of them, after `rows` samples."""
+        n_kept = math.ceil(len(active) * self.keep)
+        ranked = sorted(active, key=lambda slot: self.__rank(slot.runner))
+        for slot in ranked[n_kept:]:
+            slot.flush()
+            self.samples[slot.runner._id] = rows
+            slot.runner.finish(stopped=True)
+
+        print(f"[.]: {n_kept} of {len(active)} runs go on after {rows} samples")
+        return [slot for slot in active if slot in ranked[:n_kept]]
+
+    def __rank(self, runner: ExperimentRunner) -> tuple:
+        """Sort key of the runner, best first, runs with an undefined summary last."""
+        [metric] = [m for m in runner.metrics if extract_metric_name(m) == self.metric]
+
+        runner._logger.flush()
+        runner._logger.writer.position()
+        values = load_metrics(runner._metrics_path, [self.metric])[self.metric]
+
+        summary = runner.sumary_metric
+        if summary == "best":
+            summary = "max" if metric.bigger_is_better else "min"
+
+        if summary == "last" or len(values) == 0:
+            value = metric.get()
+        else:
+            value = float(getattr(np, summary)(values))
+
+        if math.isnan(value):
+            return (True, 0.0)
+        return (False, -value if metric.bigger_is_better else value)
+
+    def __report(self, start: int, rows: int):
+        """Print the compute saved compared to running every runner on all samples."""
+        learned = sum(cost * (self.samples[runner._id] - start) for runner, cost in zip(self.runners, self.costs))
+        exhaustive = sum(self.costs) * (rows - start)
+        saved = 1 - learned / exhaustive if exhaustive else 0.0
+        print(f"[.]: Successive halving learned {learned:g} of {exhaustive:g} cost-weighted samples, saving {saved:.1%} of an exhaustive scan")
@@ -0,0 +1,164 @@
+from time import perf_counter
+from typing import Iterable
+import random
+
+_END = object()
+
+PHASES = ("dataset", "predict", "learn", "metrics", "predictions_log", "adapter", "logger", "metrics_log", "adapter_state", "tracker", "checkpoint")
+
+
+class PhaseProfiler:
+    """Accumulates the wall time spent in each phase of a run, for a fraction of the samples.
+
+    Phases run for every sample (e.g. `predict`, `metrics`) are only timed for one sample in
+    `every` on average, and their totals are extrapolated to all samples, so that the timers
+    themselves add little to the run. The timed samples are drawn at random intervals, so that
+    work done periodically (e.g. attempting splits every `grace_period` samples) is not always, or
+    never, timed. Phases run only once in a while (e.g. writing the metrics log or logging to
+    the tracker) are timed every time. A throughput curve is recorded along the way.
+
+    Parameters
+    ----------
+    every
+        (default: 100) Time the per-sample phases of one sample in this many, on average.
+    curve_every
+        (default: 10000) Add a point to the throughput curve every this many samples.
+
+    """
+
+    def __init__(self, every: int = 100, curve_every: int = 10_000) -> None:
+        if not isinstance(every, int) or every <= 0:
+            raise ValueError(f"Invalid value {every = }, only positive integers are supported")
+        if not isinstance(curve_every, int) or curve_every <= 0:
+            raise ValueError(f"Invalid value {curve_every = }, only positive integers are supported")
+
+        self.every = every
+        self.curve_every = curve_every
+
+        self.samples = 0
+        self.timed_samples = 0
+        self.curve: list[tuple[int, float, float]] = []
+
+        # Phase -> [timed calls, time, whether timed for one sample in `every`]
+        self._phases: dict[str, list] = {}
+        # Own generator, so that the global ones used by the models are left untouched
+        self._rng = random.Random(0)
+        self._countdown = self.__interval()
+        self._untimed = 0.0
+        self._start = perf_counter()
+        self._last_point = (0, self._start)
+
+    def due(self) -> bool:
+        """Account for one more sample, and return whether its phases are to be timed."""
+        self.samples += 1
+        self._countdown -= 1
+        if self._countdown > 0:
+            return False
+
+        self._countdown = self.__interval()
+        self.timed_samples += 1
+
+        if self.samples - self._last_point[0] >= self.curve_every:
+            self.__add_point()
+        return True
+
+    def add(self, phase: str, seconds: float, sampled: bool = False) -> None:
+        """Add the time of a single call of `phase`. The time of `sampled` phases, timed for one
+        sample in `every` (see `due`), is extrapolated to all samples."""
+        entry = self._phases.get(phase)
+        if entry is None:
+            entry = self._phases[phase] = [0, 0.0, sampled]
+
+        entry[0] += 1
+        entry[1] += seconds
+
+    def untimed(self) -> float:
+        """Total time of the phases timed so far which were not sampled, to be excluded from the
+        time of a sampled phase they are part of."""
+        return self._untimed
+
+    def add_nested(self, phase: str, seconds: float) -> None:
+        """Add the time of a call of a phase which is not sampled, but may be part of a sampled one."""
+        self.add(phase, seconds)
+        self._untimed += seconds
+
+    def iterate(self, dataset: Iterable) -> Iterable:
+        """Iterate over `dataset` sample by sample, timing the `dataset` phase of the samples for
+        which `due` is about to return `True`."""
+        iterator = iter(dataset)
+        while True:
+            if self._countdown > 1:
+                item = next(iterator, _END)
+            else:
+                start = perf_counter()
+                item = next(iterator, _END)
+                if item is not _END:
+                    self.add("dataset", perf_counter() - start, sampled=True)
+
+            if item is _END:
+                return
+            yield item
+
+    def summary(self) -> dict:
+        """Estimated calls and total time of every phase, in seconds, with their share of the
+        wall time, the overall throughput and the throughput curve (points of samples, elapsed
+        seconds and samples per second since the previous point)."""
+        wall_time = perf_counter() - self._start
+        scale = self.samples / self.timed_samples if self.timed_samples else 0.0
+
+        phases = {}
+        for phase in sorted(self._phases, key=lambda p: PHASES.index(p) if p in PHASES else len(PHASES)):
+            calls, seconds, sampled = self._phases[phase]
+            if sampled:
+                calls, seconds = round(calls * scale), seconds * scale
+
+            phases[phase] = {"calls": calls, "time": seconds, "share": seconds / wall_time if wall_time else 0.0}
+
+        return {
+            "samples": self.samples,
+            "wall_time": wall_time,
+            "samples_per_sec": self.samples / wall_time if wall_time else 0.0,
+            "every": self.every,
+            "phases": phases,
+            "throughput": [*self.curve, self.__point()],
+        }
+
+    def report(self) -> str:
+        """The summary, as a table."""
+        summary = self.summary()
+        lines = [f"{'phase':<16}{'calls':>12}{'time [s]':>12}{'share':>8}"]
+        for phase, entry in summary["phases"].items():
+            lines.append(f"{phase:<16}{entry['calls']:>12}{entry['time']:>12.3f}{entry['share']:>8.1%}")
+        lines.append(f"{summary['samples']} samples in {summary['wall_time']:.3f} s, {summary['samples_per_sec']:.1f} samples/s")
+        return "\n".join(lines)
+
+    def __interval(self) -> int:
+        return self._rng.randint(1, 2 * self.every - 1)
+
+    def __point(self) -> tuple[int, float, float]:
+        now = perf_counter()
+        samples, last = self._last_point
+        rate = (self.samples - samples) / (now - last) if now > last else 0.0
+        return (self.samples, now - self._start, rate)
+
+    def __add_point(self):
+        point = self.__point()
+        self.curve.append(point)
+        self._last_point = (self.samples, perf_counter())
+
+
+class TimedWriter:
+    """Metrics log writer (see `framework.metrics_log`) whose writes are timed as the
+    `metrics_log` phase of `profiler`, everything else being forwarded to `writer`."""
+
+    def __init__(self, writer, profiler: PhaseProfiler) -> None:
+        self.writer = writer
+        self.profiler = profiler
+
+    def writerows(self, rows) -> None:
+        start = perf_counter()
+        self.writer.writerows(rows)
+        self.profiler.add_nested("metrics_log", perf_counter() - start)
+
+    def __getattr__(self, name):
+        return getattr(self.writer, name)
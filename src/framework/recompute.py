@@ -0,0 +1,47 @@
+from pathlib import Path
+from river.metrics.base import Metrics
+from metrics.batch import evaluate_many
+import numpy as np
+from framework.metrics_log import STEP_COLUMN_NAME, load_predictions, open_metrics_log
+from framework.util import extract_metric_name
+
+
+def recompute_metrics(path: str | Path, metrics: Metrics, every: int = 1, out_path: str | Path = None, format: str = "csv") -> dict[str, np.ndarray]:
+    """Compute a group of metrics from the predictions log of a finished run, as if they had been
+    collected during the run, e.g. with other window sizes or additional metrics.
+
+    Returns a dict of metric name to its values, along with the `step` of each value. See
+    `metrics.batch.evaluate_many` for which metrics are supported.
+
+    Parameters
+    ----------
+    path
+        The predictions log of the run, saved with `ExperimentRunner(save_predictions=True)`.
+    metrics
+        The metrics to compute, which should not have been updated yet.
+    every
+        (default: 1) Compute the metrics every `every` evaluated samples. The last sample is
+        always included.
+    out_path
+        (optional) Also write the values as a new metrics log at this location, with a `step`
+        column, in the given `format` (see `framework.metrics_log.METRICS_FORMATS`).
+
+    """
+    if not isinstance(every, int) or every <= 0:
+        raise ValueError(f"Invalid value {every = }, only positive integers are supported")
+
+    y_true, y_pred, labels = load_predictions(path)
+
+    steps = np.arange(0, len(y_true), every)
+    if len(y_true) and steps[-1] != len(y_true) - 1:
+        steps = np.append(steps, len(y_true) - 1)
+
+    names = [extract_metric_name(metric) for metric in metrics]
+    values = dict(zip(names, evaluate_many(metrics, y_true, y_pred, labels, steps)))
+
+    if out_path is not None:
+        with open_metrics_log(out_path, [STEP_COLUMN_NAME, *names], format) as writer:
+            rows = np.column_stack(list(values.values())).tolist()
+            writer.writerows([[step, *row] for step, row in zip(steps.tolist(), rows)])
+
+    return {STEP_COLUMN_NAME: steps, **values}
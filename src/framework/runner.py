@@ -1,17 +1,28 @@
-import base64
-from copy import deepcopy
+from contextlib import ExitStack
+from copy import copy, deepcopy
+from itertools import islice
 from pathos.multiprocessing import Pool
+import glob
 import os
 from datetime import datetime
-import csv
 import json
-from typing import Iterable
-from river.base import Classifier
+import random
+from time import perf_counter
+from typing import Callable, Iterable
+import numpy as np
+import pandas as pd
+from river.base import Classifier, MiniBatchClassifier
 from river.datasets.base import Dataset, MULTI_CLF
 from river.metrics.base import Metrics, BinaryMetric
-from metrics import MetricWrapper
+from metrics import MetricWrapper, SharedMetrics
+from synthstream import SyntheticStream
 import wandb
 from framework.adapters.base import ModelAdapterBase
+from framework.checkpoint import CheckpointWriter, checkpoint_path, load_checkpoint, write_atomic
+from framework.grid import ScanProgress, run_key, sweep
+from framework.shared import SharedDataset
+from framework.profiler import PhaseProfiler, TimedWriter
+from framework.metrics_log import MetricsLogger, METRICS_FORMATS, PredictionsWriter, metrics_log_path, open_metrics_log, predictions_log_path
 from framework.util import *
 
 class BaseRunner:
@@ -72,6 +83,8 @@ class ExperimentRunner(BaseRunner):
         The river-compatible dataset class for this experiment.
     metrics
         A `river.metrics.base.Metrics` object containing a group of metrics to be collected.
+        It is turned into a `metrics.SharedMetrics` group, so that the metrics with the same
+        window and labels share a single confusion matrix.
     out_dir
         The directory to which `.csv` logs will be saved.
     name
@@ -89,6 +102,55 @@ class ExperimentRunner(BaseRunner):
         (wandb only, optional) Freeform notes about this experiment.
     tags
         (wandb only, optional) Tags which will be shown on this experiment.
+    batch_size
+        (optional) If set, evaluate in blocks of this many samples. Models which implement
+        `predict_many`/`learn_many` predict the whole block, then learn from it, using `pandas`
+        frames. Other models fall back to per-sample `predict_one`/`learn_one`, which produces the
+        same metrics log as without batching. Either way, the tracker is only updated once per block.
+    log_every
+        (default: 1) Log the metrics every `log_every` evaluated samples.
+    log_interval
+        (optional) Also log the metrics whenever this many seconds have passed since the last log.
+    log_on_change
+        (optional) Also log the metrics whenever any of them changed by more than this amount
+        since the last log. Requires computing the metrics after every sample.
+    log_buffer_size
+        (default: 1000) Number of logged rows kept in memory before they are written to disk.
+    metrics_format
+        (default: "csv") Format of the metrics log. "float32" and "float64" write a directory of
+        fixed-width binary columns instead of a `.csv` file, which is smaller and can be
+        memory-mapped with `framework.load_metrics`.
+    save_predictions
+        (default: `False`) Also save the true and predicted label of every evaluated sample, as
+        integer codes, to `<out_dir>/<run id>_PREDICTIONS/`. Other metrics can then be computed
+        after the run with `framework.recompute_metrics`.
+    checkpoint_every
+        (optional) Save a checkpoint of the run every `checkpoint_every` samples of the dataset,
+        to `<out_dir>/<run id>_CHECKPOINT.pkl`: the model, the metrics, the adapter, the position
+        in the dataset, the state of the global random number generators and of the logs. The
+        state is pickled in the training loop, but written to disk in a background thread. The
+        checkpoint is removed once the run is finished.
+    resume
+        (optional) Id of an unfinished run in `out_dir` to resume from its latest checkpoint,
+        instead of starting a new one. The model, metrics and adapter are then the ones of the
+        checkpoint, the logs of the run are truncated to the checkpoint and appended to. The
+        dataset must be given from its start: a `SyntheticStream` seeks past the samples learned
+        before the checkpoint, other datasets are iterated over, skipping them.
+    profile_every
+        (optional) Profile the run: time its phases (reading the dataset, `predict`, `learn`,
+        updating the metrics, the adapter, writing the logs, the tracker and the checkpoints) for
+        one sample in `profile_every`, see `framework.profiler.PhaseProfiler`. The estimated time
+        of each phase, the throughput and a throughput curve are added to the META file as
+        `profile` once the run is finished, and printed as a table. Resumed runs only profile the
+        samples after the checkpoint.
+    profile_tracker
+        (default: `False`) Also log the profile to the tracker, as a summary and a table.
+
+    If any of the logging options decimates the log, the rows of the metrics log start with the
+    index of the evaluated sample, in a `step` column. The last evaluated sample is always logged.
+    Once the run is finished, `finished`, whether it was `stopped` before the end of the dataset,
+    the number of `samples` learned and the `duration` of the run in seconds are added to its META
+    file.
     
     """
 
@@ -105,7 +167,18 @@ class ExperimentRunner(BaseRunner):
             project: str = None,
             entity: str = None,
             notes: str = None,
-            tags: list[str] = None
+            tags: list[str] = None,
+            batch_size: int = None,
+            log_every: int = 1,
+            log_interval: float = None,
+            log_on_change: float = None,
+            log_buffer_size: int = 1000,
+            metrics_format: str = "csv",
+            save_predictions: bool = False,
+            checkpoint_every: int = None,
+            resume: str = None,
+            profile_every: int = None,
+            profile_tracker: bool = False,
         ) -> None:
         super().__init__(
             model=model,
@@ -121,12 +194,54 @@ class ExperimentRunner(BaseRunner):
             tags=tags
         )
 
+        if not isinstance(self.metrics, SharedMetrics):
+            self.metrics = SharedMetrics(list(self.metrics), self.metrics.str_sep)
+
         if model_adapter:
             self.model_adapter.model = model
 
+        if batch_size is not None and (not isinstance(batch_size, int) or batch_size <= 0):
+            raise ValueError(f"Invalid value {batch_size = }, only positive integers are supported")
+
+        self.batch_size = batch_size
+        self.log_every = log_every
+        self.log_interval = log_interval
+        self.log_on_change = log_on_change
+        self.log_buffer_size = log_buffer_size
+
+        if metrics_format not in METRICS_FORMATS:
+            raise ValueError(f"Invalid metrics log format {metrics_format!r}, supported formats are {METRICS_FORMATS}")
+
+        self.metrics_format = metrics_format
+        self.save_predictions = save_predictions
+        self._predictions: PredictionsWriter | None = None
+        self._logs = ExitStack()
+
+        if checkpoint_every is not None and (not isinstance(checkpoint_every, int) or checkpoint_every <= 0):
+            raise ValueError(f"Invalid value {checkpoint_every = }, only positive integers are supported")
+
+        self.checkpoint_every = checkpoint_every
+        self.resume = resume
+        self._checkpoints: CheckpointWriter | None = None
+
+        if profile_every is not None and (not isinstance(profile_every, int) or profile_every <= 0):
+            raise ValueError(f"Invalid value {profile_every = }, only positive integers are supported")
+
+        self.profile_every = profile_every
+        self.profile_tracker = profile_tracker
+        self._profiler: PhaseProfiler | None = None
+
+        # Validate the logging options early, rather than after the experiment has started
+        self._make_logger(None)
+
         time = datetime.now().strftime("%y-%m-%d_%H%M%S")
         dataset_name = dataset.__class__.__name__
         self._id = f"{time}_{str(model)}_{dataset_name}" + (f"_{name}" if name else "")
+
+        if resume is not None:
+            self._id = resume
+            if not os.path.isfile(self._checkpoint_path):
+                raise ValueError(f"Invalid value {resume = }, no checkpoint of this run in {out_dir}")
     
     @property
     def _parameters(self):
@@ -139,61 +254,400 @@ class ExperimentRunner(BaseRunner):
             "metrics": self._metrics_names,
             "adapter": self.model_adapter.get_parameters() if self.model_adapter else None,
             "summary_metrics": self.sumary_metric,
+            "batch_size": self.batch_size,
+            "log_every": self.log_every,
+            "log_interval": self.log_interval,
+            "log_on_change": self.log_on_change,
+            "metrics_format": self.metrics_format,
+            "save_predictions": self.save_predictions,
+            "checkpoint_every": self.checkpoint_every,
+            "profile_every": self.profile_every,
         }
     
     def run(self):
-        wandb.init(
+        dataset = self.setup()
+
+        try:
+            if self.batch_size is None:
+                if self._profiler is not None:
+                    dataset = self._profiler.iterate(dataset)
+
+                for x, y in dataset:
+                    self.step(x, y)
+            else:
+                dataset = iter(dataset)
+                while block := self.__read_block(dataset):
+                    self.step_many(block)
+        except BaseException:
+            self.close()
+            raise
+
+        self.finish()
+
+    def __read_block(self, dataset: Iterable) -> list[tuple]:
+        if self._profiler is None:
+            return list(islice(dataset, self.batch_size))
+
+        start = perf_counter()
+        block = list(islice(dataset, self.batch_size))
+        if block:
+            self._profiler.add("dataset", perf_counter() - start)
+        return block
+
+    def setup(self) -> Iterable:
+        """Start the run, or resume it from its checkpoint: start the tracker and open the logs.
+
+        Returns the dataset to be fed to `step` (or `step_many`) sample by sample, starting after
+        the checkpoint when resuming. `run` does so, other runners (e.g. `MultiModelRunner`) may
+        feed the samples themselves, then call `finish`.
+        """
+        state = load_checkpoint(self._checkpoint_path) if self.resume is not None else None
+
+        # Time spent on the run, including before the checkpoint it was resumed from
+        self._start = perf_counter() - (state["elapsed"] if state else 0)
+
+        # A run of its own, as several experiments may run in a single process (`MultiModelRunner`),
+        # which needs `reinit="create_new"`, available since wandb 0.19.10
+        self._tracker = wandb.init(
             entity=self.entity,
             project=self.project,
             config=self._parameters,
             mode=["disabled", "online"][self._enable_tracker],
             notes=self.notes,
-            tags=[*self._autotags, *self.tags]
+            tags=[*self._autotags, *self.tags],
+            reinit="create_new",
         )
 
-        print("Starting experiment:", self._id)
+        if state is None:
+            print("Starting experiment:", self._id)
 
-        with open(self._meta_path, "x") as file_meta:
-            json.dump(self._parameters, file_meta, default=lambda o: repr(o), indent=4)
+            with open(self._meta_path, "x") as file_meta:
+                json.dump(self._parameters, file_meta, default=lambda o: repr(o), indent=4)
+        else:
+            print(f"Resuming experiment: {self._id}, after {state['rows']} samples")
+            self.__restore(state)
 
         print("Metadata available at:", os.path.abspath(self._meta_path))
         print("Metrics log available at:", os.path.abspath(self._metrics_path))
+        if self.save_predictions:
+            print("Predictions log available at:", os.path.abspath(self._predictions_path))
 
         for metric in self.metrics:
-            wandb.define_metric(extract_metric_name(metric), summary=self.sumary_metric)
+            self._tracker.define_metric(extract_metric_name(metric), summary=self.sumary_metric)
+
+        self._logger = self._make_logger(None)
+        metrics_at = state["metrics_log"] if state else None
+        predictions_at = state["predictions_log"] if state else None
+
+        self._logs = ExitStack()
+        self._logger.writer = self._logs.enter_context(open_metrics_log(self._metrics_path, self._logger.header, self.metrics_format, resume_at=metrics_at))
+        if self.save_predictions:
+            self._predictions = self._logs.enter_context(PredictionsWriter(self._predictions_path, self.log_buffer_size, resume_at=predictions_at))
+        if self.checkpoint_every:
+            self._checkpoints = self._logs.enter_context(CheckpointWriter(self._checkpoint_path))
+
+        self._rows, self._step = 0, 0
+        if state is not None:
+            self._logger.restore(state["logger"])
+            self._rows, self._step = state["rows"], state["step"]
+
+        self._profiler = None
+        if self.profile_every:
+            self._profiler = PhaseProfiler(self.profile_every)
+            self._logger.writer = TimedWriter(self._logger.writer, self._profiler)
+
+        return self._dataset_from(self._rows)
+
+    def step(self, x: dict, y):
+        """Predict, learn and evaluate a single sample of the dataset."""
+        if self._profiler is not None and self._profiler.due():
+            return self.__profiled_step(x, y)
+
+        y_pred = self.model.predict_one(x)
+        self.model.learn_one(x, y)
+
+        # Evaluation
+        if y_pred is not None:
+            if self._evaluate(self._logger, self._step, y, y_pred):
+                self._log_tracker(self._logger, self._step)
+            self._step += 1
+
+        self._rows += 1
+        if self._checkpoints is not None and self._rows % self.checkpoint_every == 0:
+            self.__checkpoint()
+
+    def step_many(self, block: list[tuple]):
+        """Predict, learn and evaluate a block of `(x, y)` samples of the dataset. Models which
+        implement `predict_many`/`learn_many` predict the whole block, then learn from it, others
+        fall back to `predict_one`/`learn_one`. The tracker is only updated once per block."""
+        xs, ys = zip(*block)
+        profiler = self._profiler
+        timed = [profiler.due() for _ in block] if profiler is not None else [False] * len(block)
+
+        # Training loop
+        if isinstance(self.model, MiniBatchClassifier):
+            start = perf_counter()
+            X = pd.DataFrame(xs)
+            y_preds = self.model.predict_many(X).tolist()
+            learn_start = perf_counter()
+            self.model.learn_many(X, pd.Series(ys))
+
+            # Blocks are always timed, as a single call
+            if profiler is not None:
+                profiler.add("predict", learn_start - start)
+                profiler.add("learn", perf_counter() - learn_start)
+        else:
+            y_preds = []
+            for (x, y), is_timed in zip(block, timed):
+                if is_timed:
+                    y_preds.append(self.__profiled_learn(x, y))
+                    continue
+                y_preds.append(self.model.predict_one(x))
+                self.model.learn_one(x, y)
 
-        with open(self._metrics_path, "x", newline="") as file_metrics:
-            writer_metrics = csv.writer(file_metrics)
+        # Evaluation
+        logged = False
+        for y, y_pred, is_timed in zip(ys, y_preds, timed):
+            if y_pred is None:
+                continue
+
+            if is_timed:
+                logged |= self.__profiled_evaluate(self._logger, self._step, y, y_pred)
+            else:
+                logged |= self._evaluate(self._logger, self._step, y, y_pred)
+            self._step += 1
+
+        if logged:
+            self._log_tracker(self._logger, self._logger.last_step)
+
+        # Checkpoints are only saved between blocks
+        self._rows += len(block)
+        if self._checkpoints is not None and self._rows // self.checkpoint_every > (self._rows - len(block)) // self.checkpoint_every:
+            self.__checkpoint()
+
+    def __profiled_step(self, x: dict, y):
+        """`step`, timing each of its phases."""
+        y_pred = self.__profiled_learn(x, y)
+
+        # Evaluation
+        if y_pred is not None:
+            if self.__profiled_evaluate(self._logger, self._step, y, y_pred):
+                self._log_tracker(self._logger, self._step)
+            self._step += 1
+
+        self._rows += 1
+        if self._checkpoints is not None and self._rows % self.checkpoint_every == 0:
+            self.__checkpoint()
+
+    def __profiled_learn(self, x: dict, y):
+        """Predict and learn a single sample, timing both. Returns the prediction."""
+        start = perf_counter()
+        y_pred = self.model.predict_one(x)
+        learn_start = perf_counter()
+        self.model.learn_one(x, y)
+        end = perf_counter()
+
+        self._profiler.add("predict", learn_start - start, sampled=True)
+        self._profiler.add("learn", end - learn_start, sampled=True)
+        return y_pred
+
+    def __profiled_evaluate(self, logger: MetricsLogger, step: int, y, y_pred) -> bool:
+        """`_evaluate`, timing each of its phases. Writing the metrics log is timed separately,
+        every time, by the `TimedWriter` of the logger."""
+        profiler = self._profiler
+
+        start = perf_counter()
+        self.metrics.update(y, y_pred)
+        profiler.add("metrics", perf_counter() - start, sampled=True)
+
+        if self._predictions is not None:
+            start = perf_counter()
+            self._predictions.write(y, y_pred)
+            profiler.add("predictions_log", perf_counter() - start, sampled=True)
+
+        if self.model_adapter:
+            start = perf_counter()
+            self.model_adapter.update(y, y_pred)
+            profiler.add("adapter", perf_counter() - start, sampled=True)
+
+        start, untimed = perf_counter(), profiler.untimed()
+        logged = False
+        if logger.due(step):
+            logger.log(step, self.metrics.get())
+            logged = True
+        elif logger.watches_values:
+            values = self.metrics.get()
+            if logger.changed(values):
+                logger.log(step, values)
+                logged = True
+        profiler.add("logger", perf_counter() - start - (profiler.untimed() - untimed), sampled=True)
+
+        return logged
+
+    def finish(self, stopped: bool = False):
+        """Log the final values of the metrics, close the logs and mark the run as finished, or as
+        `stopped` before the end of the dataset (e.g. by successive halving)."""
+        self.__log_last(self._logger, self._step - 1)
+        self._logger.flush()
+        self.close()
+
+        profile = self._profiler.summary() if self._profiler is not None else None
+
+        # Finished runs have nothing to resume
+        if os.path.isfile(self._checkpoint_path):
+            os.remove(self._checkpoint_path)
+
+        with open(self._meta_path) as file_meta:
+            meta = json.load(file_meta)
+        meta.update(finished=True, stopped=stopped, samples=self._rows, duration=perf_counter() - self._start)
+        if profile is not None:
+            meta.update(profile=profile)
+        write_atomic(self._meta_path, json.dumps(meta, indent=4).encode())
+
+        if profile is not None:
+            print(self._profiler.report())
+            if self.profile_tracker:
+                self.__log_profile(profile)
 
-            writer_metrics.writerow(self._metrics_names)
+        print("Experiment DONE")
+        self._tracker.finish()
+
+    def close(self):
+        """Close the logs, without marking the run as finished, e.g. after an error. Buffered rows
+        which were not written yet are discarded, as they were not saved by any checkpoint."""
+        self._logs.close()
+        self._predictions = None
+        self._checkpoints = None
+
+    def _make_logger(self, writer) -> MetricsLogger:
+        return MetricsLogger(
+            writer,
+            self._metrics_names,
+            every=self.log_every,
+            interval=self.log_interval,
+            on_change=self.log_on_change,
+            buffer_size=self.log_buffer_size,
+        )
 
-            # Training loop
-            for x, y in self.dataset:
-                y_pred = self.model.predict_one(x)
-                self.model.learn_one(x, y)
+    def _evaluate(self, logger: MetricsLogger, step: int, y, y_pred) -> bool:
+        """Update the metrics and the adapter with a single prediction, and buffer the metrics
+        if they are due to be logged. Returns whether they were."""
+        self.metrics.update(y, y_pred)
 
-                # Evaluation
-                if y_pred is not None:
-                    self.metrics.update(y, y_pred)
-                    writer_metrics.writerow(self.metrics.get())
+        if self._predictions is not None:
+            self._predictions.write(y, y_pred)
 
-                    if self.model_adapter:
-                        self.model_adapter.update(y, y_pred)
-                        wandb.log({f"Model.{self.model.__class__.__name__}": self.model_adapter.get_loggable_state()}, commit=False)
-                    
-                    wandb.log(self._metrics_dict)
+        if self.model_adapter:
+            self.model_adapter.update(y, y_pred)
+
+        if logger.due(step):
+            logger.log(step, self.metrics.get())
+            return True
+
+        if logger.watches_values:
+            values = self.metrics.get()
+            if logger.changed(values):
+                logger.log(step, values)
+                return True
+
+        return False
+
+    def _log_tracker(self, logger: MetricsLogger, step: int):
+        if self._profiler is not None:
+            return self.__profiled_log_tracker(logger, step)
+
+        if self.model_adapter:
+            self._tracker.log({f"Model.{self.model.__class__.__name__}": self.model_adapter.get_loggable_state()}, step=step, commit=False)
+
+        self._tracker.log(logger.last_values, step=step)
+
+    def __profiled_log_tracker(self, logger: MetricsLogger, step: int):
+        """`_log_tracker`, timing each of its phases every time."""
+        if self.model_adapter:
+            start = perf_counter()
+            state = self.model_adapter.get_loggable_state()
+            self._profiler.add("adapter_state", perf_counter() - start)
+            self._tracker.log({f"Model.{self.model.__class__.__name__}": state}, step=step, commit=False)
+
+        start = perf_counter()
+        self._tracker.log(logger.last_values, step=step)
+        self._profiler.add("tracker", perf_counter() - start)
+
+    def __log_profile(self, profile: dict):
+        """Log the summary of the profile to the tracker, along with the throughput curve."""
+        self._tracker.summary.update({
+            "profile": {phase: entry["time"] for phase, entry in profile["phases"].items()},
+            "samples_per_sec": profile["samples_per_sec"],
+        })
+        throughput = wandb.Table(columns=["samples", "seconds", "samples_per_sec"], data=[list(point) for point in profile["throughput"]])
+        self._tracker.log({"Profile.throughput": throughput})
+
+    def __checkpoint(self):
+        """Save the state of the run, after the samples of the dataset fed to it so far."""
+        start = perf_counter()
+
+        # Everything logged so far is kept when resuming, everything after it is discarded
+        self._logger.flush()
+
+        self._checkpoints.write({
+            "rows": self._rows,
+            "step": self._step,
+            "model": self.model,
+            "metrics": self.metrics,
+            "adapter": self.model_adapter,
+            "logger": self._logger.state(),
+            "metrics_log": self._logger.writer.position(),
+            "predictions_log": self._predictions.position() if self._predictions is not None else None,
+            "random": random.getstate(),
+            "numpy_random": np.random.get_state(),
+            "elapsed": perf_counter() - self._start,
+        })
+
+        if self._profiler is not None:
+            self._profiler.add("checkpoint", perf_counter() - start)
+
+    def __restore(self, state: dict):
+        self.model = state["model"]
+        self.metrics = state["metrics"]
+        self.model_adapter = state["adapter"]
+
+        random.setstate(state["random"])
+        np.random.set_state(state["numpy_random"])
+
+    def _dataset_from(self, rows: int) -> Iterable:
+        """The dataset, without its first `rows` samples."""
+        if rows == 0:
+            return self.dataset
+
+        # Synthetic streams skip the samples without reading them
+        if isinstance(self.dataset, SyntheticStream):
+            self.dataset.seek(rows)
+            return self.dataset
+
+        return islice(self.dataset, rows, None)
+
+    def __log_last(self, logger: MetricsLogger, step: int):
+        """Make sure the final values of the metrics end up in the log."""
+        if step >= 0 and logger.last_step != step:
+            logger.log(step, self.metrics.get())
+            self._log_tracker(logger, step)
 
-        print("Experiment DONE")
-        wandb.finish()
-    
     @property
     def _metrics_names(self):
         return [extract_metric_name(metric) for metric in self.metrics]
     
     @property
     def _metrics_path(self):
-        return os.path.join(self.out_dir, self._id + "_METRICS.csv")
+        return str(metrics_log_path(self.out_dir, self._id, self.metrics_format))
     
+    @property
+    def _predictions_path(self):
+        return str(predictions_log_path(self.out_dir, self._id))
+
+    @property
+    def _checkpoint_path(self):
+        return str(checkpoint_path(self.out_dir, self._id))
+
     @property
     def _meta_path(self):
         return os.path.join(self.out_dir, self._id + "_META.json")
@@ -248,60 +702,248 @@ class HyperparameterScanRunner(BaseRunner):
     
     @property
     def __dataset(self):
+        # Synthetic streams are forked, sharing their samples between the runs
+        if isinstance(self.dataset, SyntheticStream):
+            return self.dataset.fork()
         return deepcopy(self.dataset)
-    
-    def __flatten_paramsets(paramsets: dict):
-        #TODO: different flattening strategies, e.g. cartesian product?
-
-        return [{hyperparam: val} for hyperparam, vals in paramsets.items() for val in vals]
 
-    def _run_instance(self, paramset: dict):
+    def _run_key(self, paramset: dict) -> str:
+        return run_key(self.model.clone(new_params=paramset), self.dataset)
+
+    def _find_run(self, key: str) -> tuple[str, dict] | None:
+        """Id and META of the run of the scan with the given key in `out_dir`, if any. Runs finished
+        at the end of the dataset come first, then the ones which can be resumed, then the ones
+        stopped early, then the latest one."""
+        runs = []
+        for path in glob.glob(os.path.join(glob.escape(self.out_dir), f"*_hp-{key}_META.json")):
+            run_id = os.path.basename(path).removesuffix("_META.json")
+            with open(path) as file_meta:
+                meta = json.load(file_meta)
+            resumable = os.path.isfile(checkpoint_path(self.out_dir, run_id))
+            finished = meta.get("finished", False)
+            complete = finished and not meta.get("stopped", False)
+            runs.append(((complete, resumable, finished, run_id), run_id, meta))
+
+        if not runs:
+            return None
+        _, run_id, meta = max(runs, key=lambda run: run[0])
+        return run_id, meta
+
+    def _make_runner(self, paramset: dict, key: str, dataset: Dataset) -> ExperimentRunner:
+        """Runner of the model with the given paramset, resuming the previous attempt of the run
+        with the same key from its checkpoint if there is one."""
         model = self.model.clone(new_params=paramset)
 
         param_tags = [f"param:{p}" for p in paramset.keys()]
 
         user_notes = f"\n{self.notes}" if self.notes is not None else ""
 
-        name = base64.urlsafe_b64encode(str(paramset).encode())
+        previous = self._find_run(key)
+        resume = previous[0] if previous and os.path.isfile(checkpoint_path(self.out_dir, previous[0])) else None
 
-        runner = ExperimentRunner(
+        return ExperimentRunner(
             model=model,
-            dataset=self.__dataset,
+            dataset=dataset,
             metrics=self.metrics.clone(),
             out_dir=self.out_dir,
-            name=name,
-            model_adapter=self.model_adapter,
+            name=f"hp-{key}",
+            model_adapter=deepcopy(self.model_adapter),
             enable_tracker=self._enable_tracker,
             project=self.project,
             notes=f"Generated via HyperparameterScanRunner with {paramset}.{user_notes}",
-            tags=["hparam-scan", *param_tags, *self.tags]
+            tags=["hparam-scan", *param_tags, *self.tags],
+            checkpoint_every=self._checkpoint_every,
+            resume=resume,
         )
-        runner.run()
 
-    def run(self, hyperparameters: dict[str, list] | Iterable[dict[str, list]], parallel_workers: int = 1) -> None:
+    def _run_instance(self, task: tuple[dict, str]) -> tuple[str, float]:
+        """Run the model with the given paramset. Returns the key and the duration of the run."""
+        paramset, key = task
+
+        start = perf_counter()
+        self._make_runner(paramset, key, self.__dataset).run()
+
+        return key, perf_counter() - start
+
+    def __plan(self, hyperparameters: dict[str, list] | Iterable[dict], cost: Callable[[dict], float] | None, skip_finished: bool, parallel_workers: int = 1, skip_stopped: bool = False) -> tuple[list[tuple[dict, str]], dict[str, float], ScanProgress]:
+        """Paramsets to be run, with their keys, from the most to the least costly, the costs of
+        the runs by key and the progress of the scan. Runs stopped early only count as finished
+        if `skip_stopped`."""
+        if isinstance(hyperparameters, dict):
+            hyperparameters = sweep(hyperparameters)
+        hyperparameters = list(hyperparameters)
+
+        keys = [self._run_key(paramset) for paramset in hyperparameters]
+        costs = {key: cost(paramset) if cost else 1 for key, paramset in zip(keys, hyperparameters)}
+
+        tasks = []
+        finished = []
+        seen = set()
+        for paramset, key in zip(hyperparameters, keys):
+            # Paramsets which only differ by values the model already has are run once
+            if key in seen:
+                continue
+            seen.add(key)
+
+            previous = self._find_run(key)
+            if skip_finished and previous and previous[1].get("finished") and (skip_stopped or not previous[1].get("stopped")):
+                finished.append((key, previous[1].get("duration")))
+            else:
+                tasks.append((paramset, key))
+
+        # Largest first, so that the most costly runs do not end up alone at the end of the scan
+        tasks.sort(key=lambda task: costs[task[1]], reverse=True)
+
+        progress = ScanProgress([costs[key] for _, key in tasks], max(parallel_workers, 1))
+        for key, duration in finished:
+            if duration is not None:
+                progress.add_measurement(costs[key], duration)
+
+        print(f"[.]: Scanning {len(tasks)} paramsets, skipping {len(finished)} already finished")
+        if progress.projected is not None:
+            print(f"[.]: {progress.report()}")
+
+        return tasks, costs, progress
+
+    def run(
+            self,
+            hyperparameters: dict[str, list] | Iterable[dict],
+            parallel_workers: int = 1,
+            cost: Callable[[dict], float] = None,
+            skip_finished: bool = True,
+            checkpoint_every: int = None,
+            single_pass: bool = False,
+        ) -> None:
         """Start the hyperparameter scan.
+
+        Each paramset is identified by a stable hash of the model's parameters and the dataset's
+        configuration (see `framework.grid.run_key`), which is part of the names of its runs.
+        Paramsets already run to completion in `out_dir` are skipped (but not the ones stopped early
+        by `run_successive_halving`), and unfinished runs with a checkpoint are resumed, so that an interrupted scan can simply be started again. The
+        remaining runs are started from the most to the least costly, and the projected wall time
+        of the scan is reported after every run.
         
         Parameters
         ----------
         hyperparameters
             If dict mapping hyperparameter names to lists of values: will generate separate series
             of test runs for each hyperparameter, with each instance having that parameter set
-            to one of the listed values, leaving all others as defined on the provided `model`.
+            to one of the listed values, leaving all others as defined on the provided `model`
+            (see `framework.grid.sweep`).
             If list of dicts, will generate a test run for each dict, overriding
-            the provided `model`'s parameters with those specified by each of the dicts.
+            the provided `model`'s parameters with those specified by each of the dicts, e.g. as
+            generated by `framework.grid.grid`, `random_search` or `latin_hypercube`.
         parallel_workers
             (default: 1) If equal to 2 or greater, experiment instances will be run using
-            a `multiprocessing` `Pool` of this many processes.
+            a `multiprocessing` `Pool` of this many processes. The dataset is then prepared once
+            with `framework.shared.SharedDataset`, so that the workers share its data.
+        cost
+            (optional) Relative cost of the run of a paramset, e.g. `lambda p: p["n_models"]`, used
+            to start the most costly runs first and to project the wall time. By default, all
+            runs are assumed to cost the same.
+        skip_finished
+            (default: `True`) Skip the paramsets whose run is already finished in `out_dir`.
+        checkpoint_every
+            (optional) Save checkpoints of the runs every this many samples, see `ExperimentRunner`.
+        single_pass
+            (default: `False`) Run all paramsets together, over a single scan of the dataset, with
+            `framework.multi.MultiModelRunner` (split between `parallel_workers` processes if 2 or
+            more). The dataset is then read (or generated) once instead of once per paramset, but
+            progress is only reported at the end. Unfinished runs must all resume from the same
+            checkpoint, e.g. after an interrupted single pass scan.
 
         """
 
-        if isinstance(hyperparameters, dict):
-            hyperparameters = HyperparameterScanRunner.__flatten_paramsets(hyperparameters)
+        self._checkpoint_every = checkpoint_every
+        tasks, costs, progress = self.__plan(hyperparameters, cost, skip_finished, parallel_workers)
+
+        def report(results):
+            for key, duration in results:
+                progress.done(costs[key], duration)
+                print(f"[.]: {progress.report()}")
         
-        if parallel_workers >= 2:
-            with Pool(parallel_workers) as p:
-                p.map(self._run_instance, hyperparameters)
+        if single_pass:
+            # Imported here, as the multi-model runner is built on top of this module
+            from framework.multi import MultiModelRunner
+
+            start = perf_counter()
+            dataset = self.__dataset
+            runners = [self._make_runner(paramset, key, dataset) for paramset, key in tasks]
+            if runners:
+                MultiModelRunner(runners, n_workers=parallel_workers if parallel_workers >= 2 else None).run()
+
+            # Runs sharing the scan take the same time, apportioned to their costs for projections
+            duration = perf_counter() - start
+            total = sum(costs[key] for _, key in tasks)
+            report((key, duration * costs[key] / total) for _, key in tasks)
+
+        elif parallel_workers >= 2:
+            with SharedDataset(self.dataset) as dataset, Pool(parallel_workers) as p:
+                # Tasks are sent along with the runner, which only refers to the shared data
+                runner = copy(self)
+                runner.dataset = dataset
+                report(p.imap_unordered(runner._run_instance, tasks))
+
+                # The workers have to be gone before the shared files are removed
+                p.close()
+                p.join()
 
         else:
-            for paramset in hyperparameters:
-                self._run_instance(paramset)
+            report(map(self._run_instance, tasks))
+
+    def run_successive_halving(
+            self,
+            hyperparameters: dict[str, list] | Iterable[dict],
+            metric: str,
+            min_samples: int,
+            keep: float = 0.5,
+            cost: Callable[[dict], float] = None,
+            skip_finished: bool = True,
+            checkpoint_every: int = None,
+        ) -> None:
+        """Start the hyperparameter scan, stopping the worst paramsets early.
+
+        All paramsets are run together over a single scan of the dataset, and ranked after
+        `min_samples` samples by the `summary_metric` of the scan on `metric`. Only the best `keep`
+        fraction of them goes on, with the state of their models, for the next `min_samples / keep`
+        samples in total, and so on until the end of the dataset (see
+        `framework.multi.SuccessiveHalvingRunner`). The compute saved compared to an exhaustive scan
+        is reported at the end. Runs are named, skipped and resumed as with `run`. Stopped runs are
+        finished, marked as `stopped` in their META file: they are skipped by later successive
+        halving scans, but run again by `run`.
+
+        Parameters
+        ----------
+        hyperparameters
+            Paramsets to be compared, as in `run`.
+        metric
+            Name of the metric the paramsets are ranked by, as in the metrics logs.
+        min_samples
+            Number of samples learned by all paramsets, before the first ranking.
+        keep
+            (default: 0.5) Fraction of the paramsets going on after every ranking, rounded up.
+        cost
+            (optional) Relative cost of the run of a paramset, used to report the compute saved.
+        skip_finished
+            (default: `True`) Skip the paramsets whose run is already finished in `out_dir`.
+        checkpoint_every
+            (optional) Save checkpoints of the runs every this many samples, see `ExperimentRunner`.
+
+        """
+        # Imported here, as the multi-model runners are built on top of this module
+        from framework.multi import SuccessiveHalvingRunner
+
+        self._checkpoint_every = checkpoint_every
+        tasks, costs, _ = self.__plan(hyperparameters, cost, skip_finished, skip_stopped=True)
+        if not tasks:
+            return
+
+        dataset = self.__dataset
+        runners = [self._make_runner(paramset, key, dataset) for paramset, key in tasks]
+        SuccessiveHalvingRunner(
+            runners,
+            metric,
+            min_samples,
+            keep=keep,
+            costs=[costs[key] for _, key in tasks],
+        ).run()
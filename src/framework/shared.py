@@ -0,0 +1,96 @@
+from pathlib import Path
+import numpy as np
+import os
+import shutil
+import tempfile
+from river.datasets.base import Dataset
+from cicids import CICIDS2017
+from synthstream import SyntheticStream
+
+
+class MappedArray(np.ndarray):
+    """Read-only array memory-mapped from a `.npy` file, which is pickled as the path of the file
+    instead of its contents. Unpickling it in another process maps the same file, so that all
+    processes share the pages of the file instead of holding a copy each. Arrays derived from it
+    (e.g. slices) are plain copies when pickled."""
+
+    def __array_finalize__(self, obj):
+        self.path = None
+
+    def __reduce__(self):
+        if getattr(self, "path", None) is None:
+            return super().__reduce__()
+        return (open_mapped_array, (self.path,))
+
+
+def open_mapped_array(path: str) -> MappedArray:
+    array = np.load(path, mmap_mode="r").view(MappedArray)
+    array.path = path
+    return array
+
+
+class SharedDataset:
+    """Context manager preparing a dataset once, in the main process, to be sent to worker
+    processes without each of them loading or holding its own copy of the data.
+
+    - `CICIDS2017`: the columnar cache of the file is built, if needed, so that the workers
+    memory-map it instead of each parsing the csv.
+    - `SyntheticStream`: a fork of the stream is returned, in which the samples of the samplers
+    holding arrays are written once to memory-mapped files (see `MappedArray`). Samplers holding
+    lists of dicts are still pickled along with the stream.
+
+    Other datasets are returned as they are. On exit, the samplers of the fork are given back the
+    arrays of the original stream, so that the files are no longer mapped by this process, and the
+    files are removed. Worker processes have to be done with the stream by then, as files still
+    mapped cannot be removed on Windows; whatever cannot be removed is left behind.
+
+    Parameters
+    ----------
+    dataset
+        The river-compatible dataset to share.
+    directory
+        (optional) Directory in which to create the temporary directory of the memory-mapped
+        files, by default the system's temporary directory.
+
+    """
+
+    def __init__(self, dataset: Dataset, directory: str = None) -> None:
+        self.dataset = dataset
+        self.directory = directory
+        self._created = None
+        self._mapped = []
+
+    def __enter__(self) -> Dataset:
+        if isinstance(self.dataset, CICIDS2017):
+            if self.dataset.use_cache:
+                self.dataset.build_cache()
+            return self.dataset
+
+        if isinstance(self.dataset, SyntheticStream):
+            stream = self.dataset.fork()
+            for i, csampler in enumerate(stream._samplers):
+                if isinstance(csampler.sample_list, np.ndarray):
+                    path = str(Path(self.__directory()) / f"sampler_{i}.npy")
+                    np.save(path, csampler.sample_list)
+                    self._mapped.append((csampler, csampler.sample_list))
+                    csampler.sample_list = open_mapped_array(path)
+            return stream
+
+        return self.dataset
+
+    def __exit__(self, *exc_info) -> None:
+        # Unmap the files, which cannot be removed while mapped on Windows
+        for csampler, samples in self._mapped:
+            csampler.sample_list = samples
+        self._mapped.clear()
+
+        if self._created is not None:
+            shutil.rmtree(self._created, ignore_errors=True)
+            self._created = None
+
+    def __directory(self) -> str:
+        if self._created is None:
+            if self.directory is not None:
+                os.makedirs(self.directory, exist_ok=True)
+            self._created = tempfile.mkdtemp(prefix="shared_dataset_", dir=self.directory)
+        return self._created
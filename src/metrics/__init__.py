@@ -1,10 +1,13 @@
 from .wrapper import MetricWrapper
+from .engine import SharedMetrics, SharedConfusionMatrix
 from .fpr import FalsePositiveRate
 from .fdr import FalseDiscoveryRate
 from .adr import AttackDetectionRate
 
 __all__ = [
     "MetricWrapper",
+    "SharedMetrics",
+    "SharedConfusionMatrix",
     "FalsePositiveRate",
     "FalseDiscoveryRate",
     "AttackDetectionRate"
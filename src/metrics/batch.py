@@ -0,0 +1,240 @@
+from copy import deepcopy
+from river import metrics as river_metrics
+from river.metrics.base import Metrics
+import numpy as np
+from .adr import AttackDetectionRate
+from .engine import SharedMetrics, _ConfusionGroup, confusion_group_key
+from .fdr import FalseDiscoveryRate
+from .fpr import FalsePositiveRate
+
+
+def _ratio(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """`a / b`, or 0 where `b` is 0, as river's metrics do on `ZeroDivisionError`."""
+    out = np.zeros(len(b), dtype=np.float64)
+    np.divide(a, b, out=out, where=b != 0)
+    return out
+
+
+def _fbeta(p: np.ndarray, r: np.ndarray, beta: float) -> np.ndarray:
+    b2 = beta ** 2
+    return _ratio((1 + b2) * p * r, b2 * p + r)
+
+
+class _BatchCounts:
+    """Counts of a confusion matrix after each of the evaluated steps, computed from cumulative
+    sums over the whole stream of integer-coded labels.
+
+    Parameters
+    ----------
+    y_true
+        True labels, as codes of `labels`.
+    y_pred
+        Predicted labels, as codes of `labels`.
+    labels
+        Labels of the confusion matrix.
+    steps
+        Indices of the samples after which the counts are computed, in increasing order.
+    window_size
+        (optional) Only count the `window_size` most recent samples.
+
+    """
+
+    def __init__(self, y_true: np.ndarray, y_pred: np.ndarray, labels: list, steps: np.ndarray, window_size: int = None) -> None:
+        self.y_true = y_true
+        self.y_pred = y_pred
+        self.labels = labels
+        self.steps = steps
+        self.window_size = window_size
+
+        self._codes = {label: code for code, label in enumerate(labels)}
+        self._cache = {}
+
+        self.total = steps + 1 if window_size is None else np.minimum(steps + 1, window_size)
+        self.trace = self.__count(y_true == y_pred)
+
+    def __count(self, indicator: np.ndarray) -> np.ndarray:
+        """Number of samples for which `indicator` holds, at each step (within the window)"""
+        cumulative = np.cumsum(indicator, dtype=np.int64)
+        counts = cumulative[self.steps]
+
+        if self.window_size is not None:
+            before = self.steps - self.window_size
+            counts = counts - np.where(before >= 0, cumulative[np.maximum(before, 0)], 0)
+        return counts
+
+    def __cached(self, kind: str, code: int) -> np.ndarray:
+        key = (kind, code)
+        if key not in self._cache:
+            if kind == "row":
+                indicator = self.y_true == code
+            elif kind == "col":
+                indicator = self.y_pred == code
+            else:
+                indicator = (self.y_true == code) & (self.y_pred == code)
+            self._cache[key] = self.__count(indicator)
+        return self._cache[key]
+
+    def __by_label(self, kind: str, label) -> np.ndarray:
+        code = self._codes.get(label)
+        if code is None:
+            return np.zeros(len(self.steps), dtype=np.int64)
+        return self.__cached(kind, code)
+
+    def tp(self, label) -> np.ndarray:
+        return self.__by_label("tp", label)
+
+    def row(self, label) -> np.ndarray:
+        return self.__by_label("row", label)
+
+    def col(self, label) -> np.ndarray:
+        return self.__by_label("col", label)
+
+    def present(self, label) -> np.ndarray:
+        """Whether `label` is one of the `classes` of the confusion matrix, at each step"""
+        return (self.row(label) != 0) | (self.col(label) != 0)
+
+    @property
+    def n_classes(self) -> np.ndarray:
+        return sum((self.present(label) for label in self.labels), np.zeros(len(self.steps), dtype=np.int64))
+
+
+def _macro(counts: _BatchCounts, per_class) -> np.ndarray:
+    total = np.zeros(len(counts.steps), dtype=np.float64)
+    for label in counts.labels:
+        total += np.where(counts.present(label), per_class(label), 0.0)
+    return _ratio(total, counts.n_classes)
+
+
+def _weighted(counts: _BatchCounts, per_class) -> np.ndarray:
+    total = np.zeros(len(counts.steps), dtype=np.float64)
+    for label in counts.labels:
+        total += np.where(counts.present(label), per_class(label), 0.0)
+    return _ratio(total, counts.total)
+
+
+def _precision(counts: _BatchCounts, metric) -> np.ndarray:
+    return _ratio(counts.tp(metric.pos_val), counts.col(metric.pos_val))
+
+
+def _recall(counts: _BatchCounts, metric) -> np.ndarray:
+    return _ratio(counts.tp(metric.pos_val), counts.row(metric.pos_val))
+
+
+def _macro_fbeta(counts: _BatchCounts, metric) -> np.ndarray:
+    def per_class(c):
+        tp = counts.tp(c)
+        return _fbeta(_ratio(tp, counts.col(c)), _ratio(tp, counts.row(c)), metric.beta)
+    return _macro(counts, per_class)
+
+
+def _weighted_fbeta(counts: _BatchCounts, metric) -> np.ndarray:
+    def per_class(c):
+        weighted_tp = counts.row(c) * counts.tp(c)
+        return _fbeta(_ratio(weighted_tp, counts.col(c)), _ratio(weighted_tp, counts.row(c)), metric.beta)
+    return _weighted(counts, per_class)
+
+
+def _micro_fbeta(counts: _BatchCounts, metric) -> np.ndarray:
+    micro = _ratio(counts.trace, counts.total)
+    return _fbeta(micro, micro, metric.beta)
+
+
+# Vectorised counterparts of the `get` methods of the metrics, for exact types only. Subclasses
+# may compute something else, and fall back to updating the metric sample by sample
+_FORMULAS = {
+    river_metrics.Accuracy: lambda counts, metric: _ratio(counts.trace, counts.total),
+    river_metrics.Precision: _precision,
+    river_metrics.Recall: _recall,
+    river_metrics.FBeta: lambda counts, metric: _fbeta(_precision(counts, metric), _recall(counts, metric), metric.beta),
+    river_metrics.MacroPrecision: lambda counts, metric: _macro(counts, lambda c: _ratio(counts.tp(c), counts.col(c))),
+    river_metrics.MacroRecall: lambda counts, metric: _macro(counts, lambda c: _ratio(counts.tp(c), counts.row(c))),
+    river_metrics.MacroFBeta: _macro_fbeta,
+    river_metrics.MicroPrecision: lambda counts, metric: _ratio(counts.trace, counts.total),
+    river_metrics.MicroRecall: lambda counts, metric: _ratio(counts.trace, counts.total),
+    river_metrics.MicroFBeta: _micro_fbeta,
+    river_metrics.WeightedPrecision: lambda counts, metric: _weighted(counts, lambda c: _ratio(counts.row(c) * counts.tp(c), counts.col(c))),
+    river_metrics.WeightedRecall: lambda counts, metric: _weighted(counts, lambda c: counts.tp(c).astype(np.float64)),
+    river_metrics.WeightedFBeta: _weighted_fbeta,
+    FalsePositiveRate: lambda counts, metric: _ratio(
+        counts.col(metric.pos_val) - counts.tp(metric.pos_val),
+        counts.col(metric.pos_val) - counts.tp(metric.pos_val) + counts.trace - counts.tp(metric.pos_val),
+    ),
+    FalseDiscoveryRate: lambda counts, metric: _ratio(counts.col(metric.pos_val) - counts.tp(metric.pos_val), counts.col(metric.pos_val)),
+    AttackDetectionRate: _recall,
+}
+for _subclass, _base in [(river_metrics.F1, river_metrics.FBeta), (river_metrics.MacroF1, river_metrics.MacroFBeta), (river_metrics.MicroF1, river_metrics.MicroFBeta), (river_metrics.WeightedF1, river_metrics.WeightedFBeta)]:
+    _FORMULAS[_subclass] = _FORMULAS[_base]
+
+
+def evaluate_many(metrics: Metrics, y_true: np.ndarray, y_pred: np.ndarray, labels: list, steps: np.ndarray = None) -> list[np.ndarray]:
+    """Values the metrics of a group would have after each of the given steps, if updated with
+    the whole stream of labels in turn, without updating them.
+
+    Confusion-matrix based metrics (including `MetricWrapper`s with a window or a collapse) of
+    common types are computed from cumulative sums over the stream, once per distinct matrix, see
+    `SharedMetrics`. Other metrics are updated sample by sample, on copies of them, so they should
+    not have been updated yet. Metrics which require probabilities cannot be computed from labels
+    only.
+
+    Parameters
+    ----------
+    metrics
+        The metrics to compute, e.g. a `river.metrics.base.Metrics` group.
+    y_true
+        True labels, as integer codes indexing `labels`.
+    y_pred
+        Predicted labels, as integer codes indexing `labels`.
+    labels
+        The labels, by code.
+    steps
+        (optional) Indices of the samples after which the values are computed, in increasing
+        order. By default, after every sample.
+
+    """
+    y_true = np.asarray(y_true, dtype=np.intp)
+    y_pred = np.asarray(y_pred, dtype=np.intp)
+    if len(y_true) != len(y_pred):
+        raise ValueError(f"Lengths of y_true ({len(y_true)}) and y_pred ({len(y_pred)}) do not match")
+
+    steps = np.arange(len(y_true)) if steps is None else np.asarray(steps, dtype=np.intp)
+
+    values: list[np.ndarray | None] = [None] * len(metrics)
+    counts: dict[tuple, _BatchCounts] = {}
+    replayed = []
+
+    for i, metric in enumerate(metrics):
+        if not metric.requires_labels:
+            raise ValueError(f"Metric {metric} requires probabilities, which cannot be recomputed from labels")
+
+        shared = confusion_group_key(metric)
+        if shared is None or type(shared[0]) not in _FORMULAS:
+            replayed.append(i)
+            continue
+
+        inner, key = shared
+        if key not in counts:
+            # Map the labels as the shared confusion matrix would, e.g. collapse them
+            group = _ConfusionGroup(*key)
+            lookup = np.array([group.code(label) for label in labels], dtype=np.intp)
+            counts[key] = _BatchCounts(lookup[y_true], lookup[y_pred], group.cm._labels, steps, key[0])
+
+        values[i] = _FORMULAS[type(inner)](counts[key], inner)
+
+    if replayed:
+        group = SharedMetrics([deepcopy(metrics[i]) for i in replayed])
+        replayed_values = np.empty((len(steps), len(replayed)), dtype=np.float64)
+
+        step = 0
+        for k, (yt, yp) in enumerate(zip(y_true.tolist(), y_pred.tolist())):
+            if step == len(steps):
+                break
+
+            group.update(labels[yt], labels[yp])
+            if k == steps[step]:
+                replayed_values[step] = group.get()
+                step += 1
+
+        for i, column in zip(replayed, replayed_values.T):
+            values[i] = column
+
+    return values
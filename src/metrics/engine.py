@@ -0,0 +1,452 @@
+from collections.abc import Mapping
+from river.metrics import ConfusionMatrix
+from river.metrics.base import BinaryMetric, ClassificationMetric, Metrics, MultiClassMetric
+import numpy as np
+from .wrapper import MetricWrapper
+
+# Metrics whose update only feeds their confusion matrix, and which can thus read a shared one
+_CM_UPDATES = {ClassificationMetric.update, BinaryMetric.update, MultiClassMetric.update}
+_CM_REVERTS = {ClassificationMetric.revert, BinaryMetric.revert, MultiClassMetric.revert}
+
+
+class _Counts(Mapping):
+    """Read-only view of a vector of counts indexed by label, defaulting to 0 like river's."""
+
+    def __init__(self, counts: np.ndarray | None, codes: dict) -> None:
+        self._counts = counts
+        self._codes = codes
+
+    def __getitem__(self, label) -> int:
+        code = self._codes.get(label)
+        if code is None or self._counts is None:
+            return 0
+        return int(self._counts[code])
+
+    def __iter__(self):
+        return iter(self._codes)
+
+    def __len__(self) -> int:
+        return len(self._codes)
+
+
+class _Rows(Mapping):
+    """Read-only view of the rows of a `SharedConfusionMatrix`, i.e. `cm.data`."""
+
+    def __init__(self, cm: "SharedConfusionMatrix") -> None:
+        self._cm = cm
+
+    def __getitem__(self, label) -> _Counts:
+        code = self._cm._codes.get(label)
+        return _Counts(None if code is None else self._cm._counts[code], self._cm._codes)
+
+    def __iter__(self):
+        return iter(self._cm._codes)
+
+    def __len__(self) -> int:
+        return len(self._cm._codes)
+
+
+class SharedConfusionMatrix(ConfusionMatrix):
+    """Confusion matrix of integer counts stored in a NumPy array, with the interface of
+    `river.metrics.ConfusionMatrix`, so that it can be read by any river classification metric.
+
+    Labels are given consecutive integer codes in order of appearance, which index the rows and
+    columns of the array. Counts, and hence sample weights, have to be integers.
+
+    Parameters
+    ----------
+    classes
+        (optional) The initial set of classes, only used for displaying purposes.
+
+    """
+
+    def __init__(self, classes=None):
+        self._init_classes = set(classes) if classes is not None else set()
+
+        self._codes: dict = {}
+        self._labels: list = []
+        self._counts = np.zeros((0, 0), dtype=np.int64)
+        self._sum_row = np.zeros(0, dtype=np.int64)
+        self._sum_col = np.zeros(0, dtype=np.int64)
+
+        self.n_samples = 0
+        self.total_weight = 0
+
+    def code(self, label) -> int:
+        """Integer code of `label`, assigned on its first occurrence."""
+        code = self._codes.get(label)
+        if code is None:
+            code = self._codes[label] = len(self._labels)
+            self._labels.append(label)
+
+            if code == len(self._sum_row):
+                self.__grow(2 * code or 4)
+        return code
+
+    def __grow(self, size: int):
+        counts = np.zeros((size, size), dtype=np.int64)
+        counts[:len(self._sum_row), :len(self._sum_row)] = self._counts
+        self._counts = counts
+        self._sum_row = np.concatenate([self._sum_row, np.zeros(size - len(self._sum_row), dtype=np.int64)])
+        self._sum_col = np.concatenate([self._sum_col, np.zeros(size - len(self._sum_col), dtype=np.int64)])
+
+    @staticmethod
+    def __integer(sample_weight) -> int:
+        if sample_weight != int(sample_weight):
+            raise ValueError(f"Invalid value {sample_weight = }, only integer weights are supported")
+        return int(sample_weight)
+
+    def add(self, i: int, j: int, weight: int = 1) -> None:
+        """Count a sample of true code `i` and predicted code `j`."""
+        self._counts[i, j] += weight
+        self._sum_row[i] += weight
+        self._sum_col[j] += weight
+        self.total_weight += weight
+        self.n_samples += 1
+
+    def remove(self, i: int, j: int, weight: int = 1) -> None:
+        """Revert a sample counted with `add`."""
+        self._counts[i, j] -= weight
+        self._sum_row[i] -= weight
+        self._sum_col[j] -= weight
+        self.total_weight -= weight
+        self.n_samples -= 1
+
+    def add_many(self, i: np.ndarray, j: np.ndarray, weights: np.ndarray = None) -> None:
+        """Count samples of true codes `i` and predicted codes `j`, given as arrays of the same
+        length, with the given `weights` (by default 1)."""
+        self.__add_many(i, j, 1 if weights is None else weights, 1)
+
+    def remove_many(self, i: np.ndarray, j: np.ndarray, weights: np.ndarray = None) -> None:
+        """Revert samples counted with `add_many`."""
+        self.__add_many(i, j, 1 if weights is None else weights, -1)
+
+    def __add_many(self, i: np.ndarray, j: np.ndarray, weights, sign: int):
+        weights = sign * np.broadcast_to(np.asarray(weights, dtype=np.int64), len(i))
+
+        np.add.at(self._counts, (i, j), weights)
+        np.add.at(self._sum_row, i, weights)
+        np.add.at(self._sum_col, j, weights)
+        self.total_weight += int(weights.sum())
+        self.n_samples += sign * len(i)
+
+    def update(self, y_true, y_pred, sample_weight=1):
+        self.add(self.code(y_true), self.code(y_pred), self.__integer(sample_weight))
+        return self
+
+    def revert(self, y_true, y_pred, sample_weight=1):
+        self.remove(self.code(y_true), self.code(y_pred), self.__integer(sample_weight))
+        return self
+
+    @property
+    def data(self) -> _Rows:
+        return _Rows(self)
+
+    @property
+    def sum_row(self) -> _Counts:
+        return _Counts(self._sum_row, self._codes)
+
+    @property
+    def sum_col(self) -> _Counts:
+        return _Counts(self._sum_col, self._codes)
+
+    @property
+    def classes(self) -> list:
+        size = len(self._labels)
+        present = np.flatnonzero(self._sum_row[:size] | self._sum_col[:size])
+        return [self._labels[code] for code in present]
+
+    def __cell(self, i, j) -> int:
+        i, j = self._codes.get(i), self._codes.get(j)
+        if i is None or j is None:
+            return 0
+        return int(self._counts[i, j])
+
+    def support(self, label):
+        return self.sum_row[label]
+
+    def true_positives(self, label):
+        return self.__cell(label, label)
+
+    def true_negatives(self, label):
+        return self.total_true_positives - self.__cell(label, label)
+
+    def false_positives(self, label):
+        return self.sum_col[label] - self.__cell(label, label)
+
+    def false_negatives(self, label):
+        return self.sum_row[label] - self.__cell(label, label)
+
+    @property
+    def total_true_positives(self):
+        return int(np.trace(self._counts))
+
+
+def confusion_group_key(metric) -> tuple[ClassificationMetric, tuple] | None:
+    """The metric reading the confusion matrix of `metric` (itself, or the one it wraps) and the
+    key of the matrix, i.e. its window size and mapping of the labels. `None` if `metric` does not
+    only depend on a confusion matrix of labels."""
+    window_size, collapse, inner = None, None, metric
+
+    if isinstance(metric, MetricWrapper):
+        inner = metric.inner_metric
+        window_size = metric.window_size
+        if metric.is_collapsed:
+            collapse = (metric.collapse_label, frozenset(metric.collapse_classes))
+
+    if not (
+        isinstance(inner, ClassificationMetric)
+        and isinstance(getattr(inner, "cm", None), ConfusionMatrix)
+        and inner.requires_labels
+        and type(inner).update in _CM_UPDATES
+        and type(inner).revert in _CM_REVERTS
+    ):
+        return None
+
+    binary = isinstance(inner, BinaryMetric)
+    return inner, (window_size, collapse, binary, inner.pos_val if binary else None)
+
+
+class _ConfusionGroup:
+    """Confusion matrix shared by the metrics with the same window and label mapping.
+
+    Samples are given as codes of the labels of the `SharedMetrics` group, which are mapped to
+    codes of the matrix, once `map_label` has been called for each of them.
+    """
+
+    def __init__(self, window_size: int | None, collapse: tuple | None, binary: bool, pos_val) -> None:
+        self.window_size = window_size
+        self.cm = SharedConfusionMatrix()
+
+        # Mapping of the labels to the codes of the matrix, with the collapse and the positive
+        # value of binary metrics applied
+        self._collapsed: dict = {label: collapse[0] for label in collapse[1]} if collapse else None
+        self._not_collapsed = not collapse[0] if collapse else None
+        self._binary = binary
+        self._pos_val = pos_val
+
+        self._codes: list[int] = []
+        self._codes_array = np.zeros(0, dtype=np.intp)
+
+    def code(self, label) -> int:
+        """Code of `label` in the matrix."""
+        if self._collapsed is not None:
+            label = self._collapsed.get(label, self._not_collapsed)
+        if self._binary:
+            label = label == self._pos_val
+        return self.cm.code(label)
+
+    def map_label(self, label) -> None:
+        """Map the next code of the group's labels to `label`."""
+        self._codes.append(self.code(label))
+        self._codes_array = np.array(self._codes, dtype=np.intp)
+
+    def add(self, i: int, j: int, weight: int = 1) -> None:
+        self.cm.add(self._codes[i], self._codes[j], weight)
+
+    def remove(self, i: int, j: int, weight: int = 1) -> None:
+        self.cm.remove(self._codes[i], self._codes[j], weight)
+
+    def add_many(self, i: np.ndarray, j: np.ndarray) -> None:
+        self.cm.add_many(self._codes_array[i], self._codes_array[j])
+
+    def remove_many(self, i: np.ndarray, j: np.ndarray, weights: np.ndarray) -> None:
+        self.cm.remove_many(self._codes_array[i], self._codes_array[j], weights)
+
+
+class _History:
+    """The most recent samples of a stream, as label codes and weights in circular arrays, shared
+    by all windows of up to `capacity` samples.
+
+    Samples are indexed by their position in the stream. The sample leaving a window of size
+    `w` as sample `n` arrives is sample `n - w`, which is still stored until sample `n` is.
+    """
+
+    def __init__(self, capacity: int) -> None:
+        self.capacity = capacity
+        self.n_samples = 0
+
+        self._true = np.zeros(capacity, dtype=np.int32)
+        self._pred = np.zeros(capacity, dtype=np.int32)
+        self._weights = np.zeros(capacity, dtype=np.int32)
+
+    def __getitem__(self, index: int) -> tuple[int, int, int]:
+        slot = index % self.capacity
+        return int(self._true[slot]), int(self._pred[slot]), int(self._weights[slot])
+
+    def slice(self, start: int, end: int) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        slots = np.arange(start, end) % self.capacity
+        return self._true[slots], self._pred[slots], self._weights[slots]
+
+    def append(self, i: int, j: int, weight: int = 1) -> None:
+        slot = self.n_samples % self.capacity
+        self._true[slot], self._pred[slot], self._weights[slot] = i, j, weight
+        self.n_samples += 1
+
+    def extend(self, i: np.ndarray, j: np.ndarray) -> None:
+        """Append samples of weight 1, of which only the last `capacity` ones are kept."""
+        kept = min(len(i), self.capacity)
+        slots = np.arange(self.n_samples + len(i) - kept, self.n_samples + len(i)) % self.capacity
+        self._true[slots], self._pred[slots], self._weights[slots] = i[len(i) - kept:], j[len(j) - kept:], 1
+        self.n_samples += len(i)
+
+
+class SharedMetrics(Metrics):
+    """A `river.metrics.base.Metrics` group in which the confusion-matrix based metrics share
+    their state.
+
+    Metrics with the same window size and the same mapping of the labels (the multiclass collapse
+    of a `MetricWrapper`, and the positive value of binary metrics) read a single integer
+    confusion matrix, which is updated once per sample for all of them. Other metrics are updated
+    as in a plain `Metrics` group.
+
+    Labels are given integer codes, and the codes of the most recent samples are kept in
+    circular arrays, as long as the largest window. All windowed matrices remove the samples
+    leaving their window from this single history, so memory does not grow with the number of
+    rolling metrics, nor with the number of different window sizes.
+
+    The metrics have to be updated through the group, and start from an empty state. Metrics
+    added to the group after its creation are not shared.
+
+    Parameters
+    ----------
+    metrics
+        The metrics of the group, e.g. `MetricWrapper`s.
+    str_sep
+        (default: ", ") Separator of the metrics in the representation of the group.
+
+    """
+
+    def __init__(self, metrics, str_sep=", "):
+        super().__init__(metrics, str_sep)
+
+        self._groups: dict[tuple, _ConfusionGroup] = {}
+        self._unshared = []
+
+        for metric in self:
+            self.__attach(metric)
+
+        self._codes: dict = {}
+        self._windowed = [group for group in self._groups.values() if group.window_size is not None]
+        self._history = _History(max((group.window_size for group in self._windowed), default=0))
+
+    def __attach(self, metric):
+        shared = confusion_group_key(metric)
+        if shared is None:
+            self._unshared.append(metric)
+            return
+
+        inner, key = shared
+        if key not in self._groups:
+            self._groups[key] = _ConfusionGroup(*key)
+        self.__rebind(inner, inner.cm, self._groups[key].cm)
+
+    @classmethod
+    def __rebind(cls, metric, old: ConfusionMatrix, new: ConfusionMatrix):
+        """Replace the confusion matrix of `metric`, and of the metrics it is made of which share
+        it (e.g. the precision and recall of `river.metrics.FBeta`)."""
+        metric.cm = new
+        for attr in vars(metric).values():
+            if isinstance(attr, ClassificationMetric) and getattr(attr, "cm", None) is old:
+                cls.__rebind(attr, old, new)
+
+    @property
+    def n_confusion_matrices(self) -> int:
+        """Number of confusion matrices shared by the metrics of the group."""
+        return len(self._groups)
+
+    @staticmethod
+    def __integer(sample_weight) -> int:
+        if sample_weight != int(sample_weight):
+            raise ValueError(f"Invalid value {sample_weight = }, only integer weights are supported")
+        return int(sample_weight)
+
+    def __code(self, label) -> int:
+        code = self._codes.get(label)
+        if code is None:
+            code = self._codes[label] = len(self._codes)
+            for group in self._groups.values():
+                group.map_label(label)
+        return code
+
+    def update(self, y_true, y_pred, sample_weight=1):
+        y_label = y_pred
+        if isinstance(y_pred, dict):
+            y_label = max(y_pred, key=y_pred.get)
+
+        if self._groups:
+            i, j = self.__code(y_true), self.__code(y_label)
+            weight = self.__integer(sample_weight)
+
+            for group in self._groups.values():
+                group.add(i, j, weight)
+
+            if self._windowed:
+                n = self._history.n_samples
+                for group in self._windowed:
+                    if n >= group.window_size:
+                        group.remove(*self._history[n - group.window_size])
+                self._history.append(i, j, weight)
+
+        for m in self._unshared:
+            m.update(y_true, y_label if m.requires_labels else y_pred)
+        return self
+
+    def revert(self, y_true, y_pred, sample_weight=1):
+        y_label = y_pred
+        if isinstance(y_pred, dict):
+            y_label = max(y_pred, key=y_pred.get)
+
+        if self._windowed:
+            raise ValueError("Rolling metrics cannot be reverted, only groups without a window support `revert`")
+
+        if self._groups:
+            i, j = self.__code(y_true), self.__code(y_label)
+            weight = self.__integer(sample_weight)
+            for group in self._groups.values():
+                group.remove(i, j, weight)
+
+        for m in self._unshared:
+            m.revert(y_true, y_label if m.requires_labels else y_pred, sample_weight)
+        return self
+
+    def update_many(self, y_true, y_pred):
+        """Update the metrics with sequences of true and predicted labels, e.g. NumPy arrays.
+
+        The final state is the same as after updating with every pair in turn, but the shared
+        confusion matrices are updated all at once.
+        """
+        if len(y_true) != len(y_pred):
+            raise ValueError(f"Lengths of y_true ({len(y_true)}) and y_pred ({len(y_pred)}) do not match")
+
+        if isinstance(y_true, np.ndarray):
+            y_true = y_true.tolist()
+        if isinstance(y_pred, np.ndarray):
+            y_pred = y_pred.tolist()
+
+        if self._groups:
+            i = np.fromiter(map(self.__code, y_true), dtype=np.intp, count=len(y_true))
+            j = np.fromiter(map(self.__code, y_pred), dtype=np.intp, count=len(y_pred))
+
+            # Only the samples still in a window by the end of the batch are added to it, and the
+            # ones it already had are removed once they leave it
+            start, end = self._history.n_samples, self._history.n_samples + len(i)
+            for group in self._groups.values():
+                if group.window_size is None:
+                    group.add_many(i, j)
+                    continue
+
+                first_kept = max(end - group.window_size, start)
+                group.add_many(i[first_kept - start:], j[first_kept - start:])
+
+                first_evicted, last_evicted = max(start - group.window_size, 0), min(end - group.window_size, start)
+                if last_evicted > first_evicted:
+                    group.remove_many(*self._history.slice(first_evicted, last_evicted))
+
+            if self._windowed:
+                self._history.extend(i, j)
+
+        for m in self._unshared:
+            for yt, yp in zip(y_true, y_pred):
+                m.update(yt, yp)
+        return self
@@ -11,6 +11,10 @@ class FalsePositiveRate(BinaryMetric):
     pos_val
         Value to treat as "positive".
     """
+
+    @property
+    def bigger_is_better(self):
+        return False
     
     def get(self):
         fp = self.cm.false_positives(self.pos_val)
@@ -57,6 +57,7 @@ class MetricWrapper(ClassificationMetric):
                 raise ValueError("Not specified `collapse_classes` but given `collapse_label`. Both variables should be defined to correctly collapse multiclass dataset.")
 
             self.is_collapsed = True
+            self.__collapsed = {label: self.collapse_label for label in self.collapse_classes}
         elif len(collapse_classes) > 0:
             raise ValueError("Not specified `collapse_label` but given `collapse_classes`. Both variables should be defined to correctly collapse multiclass dataset.")
 
@@ -67,6 +68,15 @@ class MetricWrapper(ClassificationMetric):
                 
         self.name = name or self.__generate_name_str()
     
+    @property
+    def inner_metric(self) -> ClassificationMetric:
+        """The wrapped metric, without `Rolling`."""
+        return self.metric.obj if self.is_rolling else self.metric
+
+    @property
+    def bigger_is_better(self) -> bool:
+        return self.inner_metric.bigger_is_better
+
     @property
     def works_with_multiclass(self) -> bool:
         return self.is_multiclass or (self.is_binary and self.is_collapsed)
@@ -96,7 +106,7 @@ class MetricWrapper(ClassificationMetric):
 
     def __collapse_lookup(self, label: str) -> Optional[bool]:
         assert self.is_collapsed
-        return self.collapse_label if label in self.collapse_classes else (not self.collapse_label)
+        return self.__collapsed.get(label, not self.collapse_label)
     
     def __generate_name_str(self) -> str:
         params = []
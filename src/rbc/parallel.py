@@ -0,0 +1,141 @@
+import multiprocessing as mp
+import random
+from river import base, utils
+from .resampling import learn_resampled
+
+LEARN, PREDICT, GET_STATE, CLOSE = range(4)
+
+
+def shard_bounds(n_models: int, n_workers: int) -> list[tuple[int, int]]:
+    """Contiguous slices of `n_models` members, as even as possible, one per worker."""
+    n_workers = min(n_workers, n_models)
+    size, rest = divmod(n_models, n_workers)
+
+    bounds, start = [], 0
+    for i in range(n_workers):
+        end = start + size + (i < rest)
+        bounds.append((start, end))
+        start = end
+    return bounds
+
+
+def _member_rng(seed: int | tuple) -> random.Random:
+    """Random number generator of a member, from a seed or the state of a previous generator"""
+    rng = random.Random()
+    if isinstance(seed, tuple):
+        rng.setstate(seed)
+    else:
+        rng.seed(seed)
+    return rng
+
+
+def _serve_shard(connection, models: list[base.Classifier], seeds: list[int | tuple], weight_param: str | None):
+    """Main loop of a worker owning a slice of the ensemble, each member with its own RNG."""
+    rngs = [_member_rng(seed) for seed in seeds]
+
+    while True:
+        command, payload = connection.recv()
+
+        if command == LEARN:
+            for x, y, rate, kwargs in payload:
+                for model, rng in zip(models, rngs):
+                    learn_resampled(model, x, y, utils.random.poisson(rate, rng), weight_param, **kwargs)
+
+        elif command == PREDICT:
+            x, kwargs = payload
+            connection.send([model.predict_proba_one(x, **kwargs) for model in models])
+
+        elif command == GET_STATE:
+            connection.send((models, [rng.getstate() for rng in rngs]))
+
+        elif command == CLOSE:
+            connection.close()
+            return
+
+
+class ShardedEnsemble:
+    """Members of an ensemble sharded across persistent worker processes.
+
+    Samples to learn from are queued and broadcast to all workers in batches, every worker
+    applying them to its own members. Predictions flush the queue first, so they always reflect
+    every sample learned so far.
+
+    Parameters
+    ----------
+    models
+        The members of the ensemble.
+    seeds
+        Seeds of the members' random number generators, used for drawing the Poisson counts, or
+        states of previous generators, as returned by `state`.
+    n_workers
+        Number of worker processes, at most one per member.
+    batch_size
+        (default: 100) Maximum number of samples queued before they are broadcast.
+    weight_param
+        (optional) Name of the sample weight parameter of the members' `learn_one`, see
+        `learn_resampled`.
+
+    """
+
+    def __init__(self, models: list[base.Classifier], seeds: list[int | tuple], n_workers: int, batch_size: int = 100, weight_param: str = None) -> None:
+        self.batch_size = batch_size
+
+        self._pending = []
+        self._connections = []
+        self._processes = []
+
+        # Spawn rather than fork, so that threads of the parent (e.g. the tracker's) are not copied
+        context = mp.get_context("spawn")
+        for start, end in shard_bounds(len(models), n_workers):
+            connection, worker_connection = context.Pipe()
+            process = context.Process(target=_serve_shard, args=(worker_connection, models[start:end], seeds[start:end], weight_param), daemon=True)
+            process.start()
+            worker_connection.close()
+
+            self._connections.append(connection)
+            self._processes.append(process)
+
+    def learn_one(self, x: dict, y: base.typing.ClfTarget, rate: float, **kwargs) -> None:
+        """Queue `x` to be learned by every member `Poisson(rate)` times."""
+        self._pending.append((x, y, rate, kwargs))
+
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        if self._pending:
+            for connection in self._connections:
+                connection.send((LEARN, self._pending))
+            self._pending = []
+
+    def predict_proba_members(self, x: dict, **kwargs) -> list[dict]:
+        """Predictions of all members, in member order."""
+        self.flush()
+
+        for connection in self._connections:
+            connection.send((PREDICT, (x, kwargs)))
+        return [y_pred for connection in self._connections for y_pred in connection.recv()]
+
+    def state(self) -> tuple[list[base.Classifier], list[tuple]]:
+        """Copies of the current members and the states of their generators, in member order."""
+        self.flush()
+
+        for connection in self._connections:
+            connection.send((GET_STATE, None))
+
+        models, rng_states = [], []
+        for connection in self._connections:
+            shard_models, shard_rng_states = connection.recv()
+            models.extend(shard_models)
+            rng_states.extend(shard_rng_states)
+        return models, rng_states
+
+    def close(self) -> None:
+        for connection in self._connections:
+            connection.send((CLOSE, None))
+            connection.close()
+        for process in self._processes:
+            process.join()
+
+        self._connections.clear()
+        self._processes.clear()
@@ -1,7 +1,32 @@
+import collections
+import random
+import weakref
 from river import ensemble, utils, base
+from .parallel import ShardedEnsemble
+from .resampling import learn_resampled, sample_weight_param
+from utils import DecayedPriors
 
 
 class ResamplingBaggingClassifier(ensemble.BaggingClassifier):
+    """Bagging with oversampling or undersampling of the samples based on the decayed class priors.
+
+    Parameters
+    ----------
+    n_workers
+        (optional) If set, the members are sharded across this many persistent worker processes,
+        each member drawing its Poisson counts from its own random number generator. Results are
+        then the same for a given `seed` regardless of `n_workers`, but differ from those without
+        workers, where all members share a single generator. Call `close` once done, to stop the
+        workers and get the trained members back into `models`.
+    batch_size
+        (default: 100) With workers, the maximum number of samples queued before they are
+        broadcast to the workers. Predictions always see all samples learned before them.
+    use_sample_weight
+        (default: `True`) If the base model's `learn_one` takes a sample weight (`sample_weight`
+        or `w`), learn once with the drawn Poisson count as the weight, instead of repeating
+        `learn_one` that many times. This keeps the cost per sample bounded for rare classes.
+
+    """
 
     def __init__(
             self,
@@ -9,28 +34,82 @@ class ResamplingBaggingClassifier(ensemble.BaggingClassifier):
             n_models=10,
             seed=None,
             decay_factor=0.9,
-            resampling="oversampling"
+            resampling="oversampling",
+            n_workers=None,
+            batch_size=100,
+            use_sample_weight=True
     ) -> None:
         super().__init__(model=model, n_models=n_models, seed=seed)
         self.decay_factor: float = decay_factor
-        self._class_priors: dict[base.typing.ClfTarget, float] = {}
+        self._class_priors = DecayedPriors(decay_factor)
         self.resampling: str = resampling
 
+        if n_workers is not None and (not isinstance(n_workers, int) or n_workers <= 0):
+            raise ValueError(f"Invalid value {n_workers = }, only positive integers are supported")
+
+        self.n_workers = n_workers
+        self.batch_size = batch_size
+        self.use_sample_weight = use_sample_weight
+        self._weight_param = sample_weight_param(self.model) if use_sample_weight else None
+
+        member_rng = random.Random(seed)
+        self._member_seeds = [member_rng.getrandbits(64) for _ in range(n_models)]
+        self._shards: ShardedEnsemble | None = None
+
+    @property
+    def _sharded(self) -> ShardedEnsemble:
+        if self._shards is None:
+            self._shards = ShardedEnsemble(self.models, self._member_seeds, self.n_workers, self.batch_size, self._weight_param)
+            weakref.finalize(self, self._shards.close)
+        return self._shards
+
     def learn_one(self, x, y, **kwargs):
         if y not in self._class_priors:
             self._class_priors[y] = 0
 
-        for cls in self._class_priors:
-            self._class_priors[cls] = self.decay_factor * self._class_priors[cls] + ((1 - self.decay_factor) * (y == cls))
+        self._class_priors.step()
+        self._class_priors.add(y, 1 - self.decay_factor)
 
         if self.resampling == "undersampling":
-            min_prior = min(self._class_priors.values())
-            for model in self:
-                for _ in range(utils.random.poisson(min_prior / self._class_priors[y], self._rng)):
-                    model.learn_one(x, y, **kwargs)
+            rate = self._class_priors.min() / self._class_priors[y]
         else:
-            max_prior = max(self._class_priors.values())
-            for model in self:
-                for _ in range(utils.random.poisson(max_prior / self._class_priors[y], self._rng)):
-                    model.learn_one(x, y, **kwargs)
+            rate = self._class_priors.max() / self._class_priors[y]
+
+        if self.n_workers is not None:
+            self._sharded.learn_one(x, y, rate, **kwargs)
+            return self
+
+        for model in self:
+            learn_resampled(model, x, y, utils.random.poisson(rate, self._rng), self._weight_param, **kwargs)
         return self
+
+    def predict_proba_one(self, x, **kwargs):
+        if self.n_workers is None:
+            return super().predict_proba_one(x, **kwargs)
+
+        # Sum the votes in member order, as the sequential ensemble does
+        y_pred = collections.Counter()
+        for member_pred in self._sharded.predict_proba_members(x, **kwargs):
+            y_pred.update(member_pred)
+
+        total = sum(y_pred.values())
+        if total > 0:
+            return {label: proba / total for label, proba in y_pred.items()}
+        return y_pred
+
+    def close(self) -> None:
+        """Stop the workers, if any, keeping the trained members and their generators' state."""
+        if self._shards is not None:
+            self.data[:], self._member_seeds = self._shards.state()
+            self._shards.close()
+            self._shards = None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+
+        # Workers are restarted from the members' current state when needed
+        if self._shards is not None:
+            state["data"], state["_member_seeds"] = self._shards.state()
+        state["_shards"] = None
+
+        return state
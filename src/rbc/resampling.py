@@ -0,0 +1,23 @@
+import inspect
+from river import base
+
+# Names of the sample weight parameter of `learn_one` in river (trees and linear models)
+WEIGHT_PARAMS = ("sample_weight", "w")
+
+
+def sample_weight_param(model: base.Classifier) -> str | None:
+    """Name of the sample weight parameter of `model.learn_one`, or `None` if it has none."""
+    parameters = inspect.signature(model.learn_one).parameters
+    return next((name for name in WEIGHT_PARAMS if name in parameters), None)
+
+
+def learn_resampled(model: base.Classifier, x: dict, y: base.typing.ClfTarget, k: int, weight_param: str = None, **kwargs) -> None:
+    """Learn from `x` as if it was drawn `k` times, with a single `learn_one` weighted by `k` if
+    `weight_param` is given, or else by repeating `learn_one` `k` times."""
+    if weight_param is None:
+        for _ in range(k):
+            model.learn_one(x, y, **kwargs)
+
+    elif k:
+        kwargs[weight_param] = k * kwargs.get(weight_param, 1.0)
+        model.learn_one(x, y, **kwargs)
@@ -1,4 +1,5 @@
 from typing import Optional
+import numpy as np
 
 class EndOfClassError(Exception):
     pass
@@ -9,7 +10,9 @@ class ClassSampler:
     
     Args:
         label (str): Class label 
-        samples (list): Class examples which create a baseline for generation
+        samples (list | np.ndarray): Class examples which create a baseline for generation, either feature dicts
+            or a 2D array (e.g. memory-mapped) with one row per example, yielded as feature dicts
+            built only when drawn, since river models (e.g. linear ones) require plain dicts
         weight_func (callable): Function W(t), returns class "weight" (importance) in the stream at local (class) time t 
         stream_t_start (int): index in stream when class examples emerge
         max_samples (int | None): optional number of samples after which sampler raises EndOfClassSamples
@@ -17,11 +20,12 @@ class ClassSampler:
             'raise': raise EndOfClassError
             'loop': reset iterator, start from beginning
             'none': start returning None as class example
+        feature_names (tuple | None): names of the columns of `samples`, required when it is an array
     """
     
     EOC_STRATEGIES = ['raise', 'loop', 'none']
     
-    def __init__(self, label: str, samples: list, weight_func: callable, stream_t_start: int = 0, max_samples: int = None, eoc_strategy: str = 'raise'):
+    def __init__(self, label: str, samples: list, weight_func: callable, stream_t_start: int = 0, max_samples: int = None, eoc_strategy: str = 'raise', feature_names: tuple = None):
 
         if eoc_strategy not in ClassSampler.EOC_STRATEGIES:
             raise ValueError(f"Invalid eoc_strategy: {eoc_strategy} - does not match {ClassSampler.EOC_STRATEGIES}")
@@ -29,6 +33,12 @@ class ClassSampler:
         if len(samples) == 0:
             raise ValueError(f"Invalid samples: {samples} - list cannot be empty")
         
+        if isinstance(samples, np.ndarray):
+            if samples.ndim != 2:
+                raise ValueError(f"Invalid samples: array of shape {samples.shape} - must be 2D")
+            if feature_names is None or len(feature_names) != samples.shape[1]:
+                raise ValueError(f"Invalid feature_names: {feature_names} - must name each of the {samples.shape[1]} columns of samples")
+
         if max_samples is not None and max_samples < 0:
             raise ValueError("Number of samples cannot be less than 0")
 
@@ -41,14 +51,20 @@ class ClassSampler:
         self.stream_t_start = stream_t_start
         self.max_samples = max_samples
         self.eoc_strategy = eoc_strategy
-        self.sample_iter = iter(self.sample_list)
+        self.feature_names = tuple(feature_names) if feature_names is not None else None
+
+        # Position of the next example in `self.sample_list`
+        self.position = 0
         
         # Flag used currently only for eoc_strategy when set to True 
-        # iterating using `self.sample_iter` is disabled
+        # iterating over `self.sample_list` is disabled
         self.none_stream_started = False
 
         self.index = 0
         self.last_output = None
+
+        # Whether `weight_func` accepts an array of times, unknown until first tried
+        self._vectorized = None
         
     def __iter__(self):
         return self
@@ -71,24 +87,94 @@ class ClassSampler:
             raise ValueError("Weight function returned value below zero")
         return w
 
+    def weights(self, t_start: int, t_end: int) -> np.ndarray:
+        """Weights W(t) for every t in [t_start, t_end), as an array.
+
+        `weight_func` is called once with an array of times if it supports NumPy arrays, and once
+        per t otherwise. In the latter case, if it raises for some t after `t_start`, the weights
+        up to that t are returned. Negative weights are returned as they are.
+        """
+        n = t_end - t_start
+
+        if self._vectorized is not False:
+            try:
+                w = np.asarray(self.weight_func(np.arange(t_start, t_end)), dtype=np.float64)
+                if w.ndim == 0:
+                    w = np.full(n, w)
+                if w.shape == (n,):
+                    self._vectorized = True
+                    return w
+            except Exception:
+                # e.g. `math` functions or conditionals on `t`, only defined for scalars
+                pass
+            self._vectorized = False
+
+        weights = []
+        for t in range(t_start, t_end):
+            try:
+                weights.append(self.weight_func(t))
+            except Exception:
+                if not weights:
+                    raise
+                break
+        return np.array(weights, dtype=np.float64)
+
     def _advance_state(self):
         if self.end_of_iteration: 
             raise StopIteration(f"ClassSampler({self.label}) already produced {self.max_samples} samples") 
         
-        try:
-            if not self.none_stream_started:
-                self.last_output = next(self.sample_iter)
-        except StopIteration:
-            if self.eoc_strategy == 'none':
-                # Sets flag for in-a-loop endless None generation
-                self.none_stream_started = True
-                self.last_output = None
-            elif self.eoc_strategy == 'loop':
-                self.sample_iter = iter(self.sample_list)
-                # Possible of raising another exception when list is empty and 'loop' strategy applied
-                # currently checked in __init__, otherwise undefined behaviour 
-                self.last_output = next(self.sample_iter)
-            elif self.eoc_strategy == 'raise':
-                raise EndOfClassError(f"ClassSampler({self.label}) end of stream after advancing {self.index} samples")
+        if self.none_stream_started:
+            pass
+        elif self.position < len(self.sample_list):
+            self.last_output = self._sample(self.position)
+            self.position += 1
+        elif self.eoc_strategy == 'none':
+            # Sets flag for in-a-loop endless None generation
+            self.none_stream_started = True
+            self.last_output = None
+        elif self.eoc_strategy == 'loop':
+            # Empty samples, which would make 'loop' undefined, are rejected in __init__
+            self.last_output = self._sample(0)
+            self.position = 1
+        elif self.eoc_strategy == 'raise':
+            raise EndOfClassError(f"ClassSampler({self.label}) end of stream after advancing {self.index} samples")
 
         self.index += 1
+
+    def skip(self, n: int):
+        """Advance by `n` examples without producing them, as `n` calls to `next` would."""
+        if self.max_samples is not None and n > self.samples_left:
+            raise StopIteration(f"ClassSampler({self.label}) cannot skip {n} samples, only {self.samples_left} left")
+
+        n_samples = len(self.sample_list)
+        available = n_samples - self.position
+
+        if self.none_stream_started or n <= available:
+            if not self.none_stream_started:
+                self.position += n
+        elif self.eoc_strategy == 'none':
+            self.none_stream_started = True
+            self.position = n_samples
+            self.last_output = None
+        elif self.eoc_strategy == 'loop':
+            # After wrapping around, the position is in [1, n_samples], as with `next`
+            self.position = (self.position + n - 1) % n_samples + 1
+        elif self.eoc_strategy == 'raise':
+            self.index += available
+            self.position = n_samples
+            raise EndOfClassError(f"ClassSampler({self.label}) end of stream after advancing {self.index} samples")
+
+        self.index += n
+
+    def state(self) -> tuple:
+        """Position of the sampler in its examples, which `restore` returns to."""
+        return (self.position, self.index, self.none_stream_started)
+
+    def restore(self, state: tuple):
+        self.position, self.index, self.none_stream_started = state
+        self.last_output = None
+
+    def _sample(self, position: int):
+        if self.feature_names is None:
+            return self.sample_list[position]
+        return dict(zip(self.feature_names, self.sample_list[position].tolist()))
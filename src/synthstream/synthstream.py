@@ -1,4 +1,7 @@
 from random import Random
+import copy
+import heapq
+import numpy as np
 from .csampler import ClassSampler
 from river.datasets.base import MULTI_CLF, Dataset
 import re
@@ -27,6 +30,10 @@ class SyntheticStream(Dataset):
 
     """
 
+    # Number of steps for which the weights and choices of the active samplers are computed at
+    # once. Blocks also end when the set of active samplers changes.
+    BLOCK_SIZE = 1024
+
     def __init__(self, n_features: int, max_samples: int = None, seed: int = None, init_csamplers: list[ClassSampler] = []):
         super().__init__(task=MULTI_CLF, n_features=n_features, n_samples=max_samples)
         self._random = Random(seed)
@@ -35,10 +42,29 @@ class SyntheticStream(Dataset):
         self.t = 0 
         self.all_labels_set: set(str) = set()
 
-        self.last_class_probabilities = None
-        self.last_class_weights = None
         self.last_sample = None
         self.last_label = None
+
+        # All samplers, in order of addition, referred to by their index in snapshots
+        self._samplers: list[ClassSampler] = []
+
+        # Future samplers by activation time, then order of addition
+        self._activations: list[tuple[int, int, ClassSampler]] = []
+        self._n_added = 0
+
+        # The current block: its first step, active samplers, their weights and the choices
+        self._block_start = 0
+        self._block_samplers: list[ClassSampler] = []
+        self._block_weights = np.zeros((0, 0))
+        self._block_uniforms: list[float] = []
+        self._block_choices: list[int] = []
+        self._block_stale = False
+
+        # Uniform numbers drawn for a block, but not used before it was dropped
+        self._uniforms: list[float] = []
+
+        # Step of the current block of the last output, for `class_weights`
+        self._last_row = None
         
         for csampler in init_csamplers: 
             self._add_sampler(csampler)
@@ -117,16 +143,30 @@ class SyntheticStream(Dataset):
     
     @property
     def class_probabilities(self) -> dict:
-        return self.last_class_probabilities
+        weights = self.class_weights
+        if weights is None:
+            return None
+
+        weight_sum = sum(weights.values())
+        return {label: w / weight_sum for label, w in weights.items()}
     
     @property
     def class_weights(self) -> dict:
-        return self.last_class_weights
+        """Weights of all classes at the step of the last output, 0 for inactive ones."""
+        if self._last_row is None:
+            return None
+
+        weights = {label: 0.0 for label in self.all_labels_set}
+        for csampler, w in zip(self._block_samplers, self._block_weights[self._last_row].tolist()):
+            weights[csampler.label] = w
+        return weights
         
     def _add_sampler(self, csampler: ClassSampler):
         if csampler.stream_t_start < self.t:
             raise ValueError("Trying to add class sampler in the past")
-        elif csampler.stream_t_start == self.t:
+
+        self._samplers.append(csampler)
+        if csampler.stream_t_start == self.t:
             self._activate_sampler(csampler)
         elif csampler.stream_t_start > self.t:
             self._add_future_sampler(csampler)
@@ -140,11 +180,13 @@ class SyntheticStream(Dataset):
         
         print(f"[.]: Activating class sampler {csampler.label} at time {self.t}.")
         self.active_samplers[csampler.label] = csampler
+        self._block_stale = True
 
     def _remove_active_sampler(self, csampler: ClassSampler):
         assert csampler.label in self.active_samplers.keys()
         del self.active_samplers[csampler.label]
         print(f"[.]: Removing active class sampler {csampler.label} at time {self.t}.")
+        self._block_stale = True
         
     def _add_future_sampler(self, csampler: ClassSampler):
         """Add `csampler` with `stream_t_start` > current stream `t`, to use-in-the-future samplers list """
@@ -164,7 +206,59 @@ class SyntheticStream(Dataset):
             
         assert csampler.stream_t_start > self.t
         self.future_samplers.append(csampler)
+
+        heapq.heappush(self._activations, (csampler.stream_t_start, self._n_added, csampler))
+        self._n_added += 1
+        self._block_stale = True
     
+    def __drop_block(self):
+        """Discard the rest of the current block, keeping its unused uniform numbers."""
+        row = self.t - self._block_start
+        self._uniforms[:0] = self._block_uniforms[row:]
+        self._block_choices = self._block_uniforms = []
+        self._block_stale = False
+
+    def __compute_block(self):
+        """Compute the weights of the active samplers and the selected sampler for the next steps,
+        until the set of active samplers may change. Steps with invalid weights end the block
+        early, or raise if it is the current step."""
+        t_end = self.t + self.BLOCK_SIZE
+        if self._activations:
+            t_end = min(t_end, self._activations[0][0])
+        if self.n_samples is not None:
+            t_end = min(t_end, self.n_samples)
+
+        samplers = list(self.active_samplers.values())
+        columns = [csampler.weights(self.t, t_end) for csampler in samplers]
+        n_rows = min(len(column) for column in columns)
+        weights = np.column_stack([column[:n_rows] for column in columns])
+
+        # Same checks as for single steps, on the first invalid row
+        cumulative = np.cumsum(weights, axis=1)
+        invalid = (weights < 0).any(axis=1) | (cumulative[:, -1] < 1e-9)
+        if invalid.any():
+            n_rows = int(invalid.argmax())
+            if n_rows == 0:
+                if (weights[0] < 0).any():
+                    raise ValueError("Weight function returned value below zero")
+                raise ValueError("[!]: Sum of weights in active ClassSamplers is equal to 0.0")
+            weights, cumulative = weights[:n_rows], cumulative[:n_rows]
+
+        # One uniform number per step, drawn in order, and selection as in `Random.choices`
+        uniforms = self._uniforms[:n_rows]
+        del self._uniforms[:n_rows]
+        uniforms += [self._random.random() for _ in range(n_rows - len(uniforms))]
+
+        thresholds = np.array(uniforms) * cumulative[:, -1]
+        choices = np.minimum((cumulative <= thresholds[:, None]).sum(axis=1), len(samplers) - 1)
+
+        self._block_start = self.t
+        self._block_samplers = samplers
+        self._block_weights = weights
+        self._block_uniforms = uniforms
+        self._block_choices = choices.tolist()
+        self._block_stale = False
+
     def _advance_state(self):
         # Raise StopIteration to correctly handle `for x in stream` syntax
         if self.t == self.n_samples:
@@ -173,33 +267,22 @@ class SyntheticStream(Dataset):
         # Raise Exception if there is no samplers to sample from
         if len(self.active_samplers.items()) == 0:
             raise NoActiveSamplersError(f"[!]: No more samplers in the stream at time {self.t}")
-        
-        weights = [ csampler.weight(self.t) for csampler in self.active_samplers.values() ]
-        active_csamplers = list(self.active_samplers.values())
-        
-        weight_sum = sum(weights)
-        
-        if weight_sum < 1e-9:
-            raise ValueError("[!]: Sum of weights in active ClassSamplers is equal to 0.0")
 
-        # TODO: there is probably better way to allow both class_weights and class_probabilities 
-        # without code repetition
+        if self._block_stale:
+            self.__drop_block()
 
-        # Create dictionary with all classes, set probability to 0.0
-        self.last_class_probabilities = dict([(label, 0.0) for label in self.all_labels_set])
-        self.last_class_weights = dict([(label, 0.0) for label in self.all_labels_set])
+        row = self.t - self._block_start
+        if row >= len(self._block_choices):
+            self.__compute_block()
+            row = 0
 
-        # Store normalized results for every label
-        for w, csampler in zip(weights, active_csamplers):
-            self.last_class_weights[csampler.label] = w
-            self.last_class_probabilities[csampler.label] = w / weight_sum
-            
-        selected_csampler = self._random.choices(active_csamplers, weights, k=1)[0]
+        selected_csampler = self._block_samplers[self._block_choices[row]]
 
         # This may raise `EndOfClassError` and it is OK. 
         # It means it is an Error that user was prepared for while declaring ClassSampler strategy
         self.last_sample = next(selected_csampler)
         self.last_label = selected_csampler.label
+        self._last_row = row
 
         # This means we specified `n_samples` param inside ClassSampler
         # deactivate because we already sampled `n_samples` from it.
@@ -207,10 +290,121 @@ class SyntheticStream(Dataset):
         if selected_csampler.end_of_iteration:
             self._remove_active_sampler(selected_csampler)
             
-        # If future sampler is meant to start next round, activate it
+        # If future samplers are meant to start next round, activate them
+        while self._activations and self._activations[0][0] == self.t + 1:
+            _, _, csampler = heapq.heappop(self._activations)
+            self.future_samplers.remove(csampler)
+            self._activate_sampler(csampler)
+
+        self.t += 1
+
+    def snapshot(self) -> dict:
+        """Compact state of the stream: its time, the state of its random number generator and
+        the positions of its samplers in their examples. The examples themselves are not copied."""
+        index = {id(csampler): i for i, csampler in enumerate(self._samplers)}
+
+        # Uniform numbers drawn for the current block, but not used yet
+        row = self.t - self._block_start
+        uniforms = self._block_uniforms[row:] + self._uniforms
+
+        return {
+            "t": self.t,
+            "random": self._random.getstate(),
+            "uniforms": tuple(uniforms),
+            "active": tuple(index[id(csampler)] for csampler in self.active_samplers.values()),
+            "future": tuple(index[id(csampler)] for csampler in self.future_samplers),
+            "samplers": tuple(csampler.state() for csampler in self._samplers),
+        }
+
+    def restore(self, state: dict):
+        """Return to a `snapshot` of this stream, or of a stream with the same samplers. The
+        outputs then continue as they did after the snapshot, but the last output is not kept."""
+        if len(state["samplers"]) != len(self._samplers):
+            raise ValueError(f"Invalid state: {len(state['samplers'])} samplers, but the stream has {len(self._samplers)}")
+
+        self.t = state["t"]
+        self._random.setstate(state["random"])
+        self._uniforms = list(state["uniforms"])
+
+        for csampler, csampler_state in zip(self._samplers, state["samplers"]):
+            csampler.restore(csampler_state)
+
+        self.active_samplers = {self._samplers[i].label: self._samplers[i] for i in state["active"]}
+        self.future_samplers = [self._samplers[i] for i in state["future"]]
+
+        self._activations = []
+        self._n_added = 0
         for csampler in self.future_samplers:
-            if csampler.stream_t_start == self.t + 1:
+            heapq.heappush(self._activations, (csampler.stream_t_start, self._n_added, csampler))
+            self._n_added += 1
+
+        self._block_start = self.t
+        self._block_samplers = []
+        self._block_weights = np.zeros((0, 0))
+        self._block_uniforms = []
+        self._block_choices = []
+        self._block_stale = False
+
+        self.last_sample = None
+        self.last_label = None
+        self._last_row = None
+
+    def fork(self) -> "SyntheticStream":
+        """Independent copy of the stream at its current state. Its samplers share the examples
+        (and weight functions) of this stream's ones, only their positions are copied."""
+        stream = copy.copy(self)
+        stream._samplers = [copy.copy(csampler) for csampler in self._samplers]
+        stream._random = Random()
+        stream.all_labels_set = set(self.all_labels_set)
+        stream.restore(self.snapshot())
+        return stream
+
+    def seek(self, t: int):
+        """Advance the stream to time `t`, as if it was iterated over until then, without reading
+        the examples of the skipped steps. Their weights are still computed, once per block (for
+        all the steps at once if the weight functions support arrays). The last output is then the
+        one of step `t - 1`."""
+        if t < self.t:
+            raise ValueError(f"Invalid value {t = }, the stream is already at time {self.t}, restore a snapshot to go back")
+        if self.n_samples is not None and t > self.n_samples:
+            raise ValueError(f"Invalid value {t = }, the stream ends after {self.n_samples} samples")
+
+        while self.t < t - 1:
+            if len(self.active_samplers.items()) == 0:
+                raise NoActiveSamplersError(f"[!]: No more samplers in the stream at time {self.t}")
+
+            if self._block_stale:
+                self.__drop_block()
+
+            row = self.t - self._block_start
+            if row >= len(self._block_choices):
+                self.__compute_block()
+                row = 0
+
+            n = min(len(self._block_choices) - row, t - 1 - self.t)
+            choices = np.array(self._block_choices[row:row + n])
+
+            # Samplers are removed right after their last sample, which ends the block there
+            for i, csampler in enumerate(self._block_samplers):
+                if csampler.max_samples is not None:
+                    steps = np.flatnonzero(choices == i)
+                    last = max(csampler.samples_left, 1)
+                    if len(steps) >= last:
+                        n = min(n, int(steps[last - 1]) + 1)
+
+            counts = np.bincount(choices[:n], minlength=len(self._block_samplers))
+            for csampler, count in zip(self._block_samplers, counts.tolist()):
+                if count:
+                    csampler.skip(count)
+                    if csampler.end_of_iteration:
+                        self._remove_active_sampler(csampler)
+
+            self.t += n
+
+            while self._activations and self._activations[0][0] == self.t:
+                _, _, csampler = heapq.heappop(self._activations)
+                self.future_samplers.remove(csampler)
                 self._activate_sampler(csampler)
 
-        self.t += 1
-        
+        if self.t < t:
+            self._advance_state()
@@ -1,6 +1,127 @@
+from collections.abc import Mapping
 from pathlib import Path
+import bisect
+import math
 
 
 def get_project_root() -> Path:
     """Return Path object representing absolute path to the project root"""
     return Path(__file__).parent.parent
+
+
+class DecayedPriors(Mapping):
+    """Class priors which all decay by `decay_factor` on every `step`, in constant time.
+
+    Instead of multiplying every prior on each step, each prior is stored together with the step
+    it was last updated at, and its decayed value is computed when read. Since all priors decay
+    at the same rate, their order only changes when one of them is updated, so the classes are
+    also kept sorted by prior, making `min`, `max` and `ascending` cheap.
+
+    Parameters
+    ----------
+    decay_factor
+        Factor by which all priors are multiplied on every `step`.
+
+    """
+
+    # Steps after which the sort keys are rebased, to keep them small and precise
+    REBASE_INTERVAL = 1 << 12
+
+    def __init__(self, decay_factor: float) -> None:
+        if not 0 < decay_factor <= 1:
+            raise ValueError(f"Invalid value {decay_factor = }, it has to be in (0, 1]")
+
+        self.decay_factor = decay_factor
+        self._log_decay = math.log(decay_factor)
+
+        self._t = 0
+        self._epoch = 0
+
+        # Prior of each class at the step it was last updated, and that step
+        self._values: dict = {}
+        self._stamps: dict = {}
+
+        # Classes sorted by log of their current prior, shifted by the same amount for all of them
+        self._keys: list[float] = []
+        self._labels: list = []
+        self._label_keys: dict = {}
+
+    def __key(self, value: float, stamp: int) -> float:
+        return math.log(value) - (stamp - self._epoch) * self._log_decay if value > 0 else -math.inf
+
+    def __index(self, label) -> int:
+        i = bisect.bisect_left(self._keys, self._label_keys[label])
+        while self._labels[i] != label:
+            i += 1
+        return i
+
+    def __getitem__(self, label) -> float:
+        value = self._values[label]
+        return value * self.decay_factor ** (self._t - self._stamps[label]) if value else value
+
+    def __setitem__(self, label, value: float) -> None:
+        if value < 0:
+            raise ValueError(f"Invalid prior {value} of class {label}, it cannot be negative")
+
+        if label in self._values:
+            del self._keys[i := self.__index(label)], self._labels[i]
+
+        self._values[label] = value
+        self._stamps[label] = self._t
+
+        key = self._label_keys[label] = self.__key(value, self._t)
+        i = bisect.bisect_right(self._keys, key)
+        self._keys.insert(i, key)
+        self._labels.insert(i, label)
+
+    def __delitem__(self, label) -> None:
+        del self._keys[i := self.__index(label)], self._labels[i]
+        del self._values[label], self._stamps[label], self._label_keys[label]
+
+    def __iter__(self):
+        return iter(self._values)
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def __repr__(self) -> str:
+        return repr(dict(self))
+
+    def pop(self, label, *default):
+        if label not in self._values and default:
+            return default[0]
+
+        value = self[label]
+        del self[label]
+        return value
+
+    def add(self, label, amount: float) -> None:
+        """Add `amount` to the current prior of `label`."""
+        self[label] = self[label] + amount
+
+    def step(self) -> None:
+        """Decay all priors by `decay_factor`."""
+        self._t += 1
+
+        if self._t - self._epoch >= self.REBASE_INTERVAL:
+            shift = (self._t - self._epoch) * self._log_decay
+            self._keys = [key + shift for key in self._keys]
+            self._label_keys = {label: key + shift for label, key in self._label_keys.items()}
+            self._epoch = self._t
+
+    def min(self) -> float:
+        """Smallest prior, 0 included."""
+        if not self._labels:
+            raise ValueError("min() of empty DecayedPriors")
+        return self[self._labels[0]]
+
+    def max(self) -> float:
+        """Largest prior."""
+        if not self._labels:
+            raise ValueError("max() of empty DecayedPriors")
+        return self[self._labels[-1]]
+
+    def ascending(self, skip_zero: bool = False):
+        """Classes in ascending order of their priors. The priors must not be updated while iterating."""
+        start = bisect.bisect_right(self._keys, -math.inf) if skip_zero else 0
+        return iter(self._labels[i] for i in range(start, len(self._labels)))
@@ -1,7 +1,9 @@
 import random
-from river import linear_model, neighbors
+import pytest
+from river import datasets, linear_model, neighbors, optim, preprocessing
 from river.drift.binary import DDM
-from cbce import CBCE
+from cbce import CBCE, LinearCBCE
+from cbce.buffer import SampleBuffer
 
 class TestCBCE:
 
@@ -153,3 +155,163 @@ class TestCBCE:
             num_classes += len(model._class_priors)
 
         assert model.classifiers['A'] is not model_before_drift, "Failed to reinitialize model for class under drift"
+
+    def test_drift_prediction_reuses_scores(self):
+        """
+        Drift detectors should be updated with the same predictions as when the whole ensemble
+        predicts again after every update of a class model.
+        """
+
+        class FullPredictionCBCE(CBCE):
+            def _drift_prediction(self, x, scores):
+                return self.predict_one(x)
+
+        random.seed(42)
+
+        VALUE_BASE = [10, -10, 0]
+        LABEL = ["A", "B", "C"]
+        DATA = [({"x": random.uniform(-2.0, 2.0) + VALUE_BASE[i % 3] - 10 * (i > 300) * (i % 3 == 0)}, LABEL[i % 3]) for i in range(600)]
+
+        model = CBCE(linear_model.LogisticRegression(), drift_detector=DDM(), seed=42)
+        full_model = FullPredictionCBCE(linear_model.LogisticRegression(), drift_detector=DDM(), seed=42)
+
+        n_resets = 0
+        for x, y in DATA:
+            assert model.predict_proba_one(x) == full_model.predict_proba_one(x), "Predictions differ"
+
+            model_before = model.classifiers.get(y)
+            model.learn_one(x, y)
+            full_model.learn_one(x, y)
+            n_resets += model_before is not None and model.classifiers.get(y) is not model_before
+
+        assert n_resets > 0, "No drift occurred in the test data"
+        assert model._class_priors == full_model._class_priors
+
+
+class TestLinearCBCE:
+
+    def test_matches_cbce(self):
+        """
+        LinearCBCE should make the same predictions as CBCE with a LogisticRegression base model,
+        including the drift detector updates and model reinitializations.
+        """
+        scaler = preprocessing.StandardScaler()
+        DATA = []
+        for x, y in datasets.ImageSegments():
+            scaler.learn_one(x)
+            DATA.append((scaler.transform_one(x), y))
+
+        model = CBCE(linear_model.LogisticRegression(l2=0.001), drift_detector=DDM(), seed=42)
+        linear = LinearCBCE(linear_model.LogisticRegression(l2=0.001), drift_detector=DDM(), seed=42)
+
+        for x, y in DATA:
+            y_pred, y_pred_linear = model.predict_proba_one(x), linear.predict_proba_one(x)
+
+            assert y_pred.keys() == y_pred_linear.keys(), "Active classes differ"
+            assert all(abs(y_pred[label] - y_pred_linear[label]) < 1e-9 for label in y_pred), "Probabilities differ"
+
+            model.learn_one(x, y)
+            linear.learn_one(x, y)
+
+        assert model._class_priors == pytest.approx(linear._class_priors), "Class priors differ"
+
+    def test_sparse_features(self):
+        """
+        Features missing from a sample, or appearing later in the stream, should be handled like
+        in LogisticRegression.
+        """
+        DATA = [
+            ({"x": 1}, "A"),
+            ({"x": -1, "z": 2}, "B"),
+            ({"x": 2, "y": 1}, "A"),
+            ({"z": 1}, "B"),
+            ({"y": 3, "x": 1}, "A"),
+            ({"x": -2, "z": 1}, "B"),
+        ] * 5
+
+        model = CBCE(linear_model.LogisticRegression(), seed=42)
+        linear = LinearCBCE(seed=42)
+
+        for x, y in DATA:
+            model.learn_one(x, y)
+            linear.learn_one(x, y)
+
+        for x in [{"x": 1}, {"z": 1, "y": -1}, {"w": 1}]:
+            assert model.predict_proba_one(x) == pytest.approx(linear.predict_proba_one(x))
+
+    def test_unsupported_classifier(self):
+        """
+        Base models which cannot be represented by the shared weight matrix should be rejected.
+        """
+        with pytest.raises(ValueError):
+            LinearCBCE(neighbors.KNNClassifier())
+
+        with pytest.raises(ValueError):
+            LinearCBCE(linear_model.LogisticRegression(optimizer=optim.Adam()))
+
+
+class TestSampleBuffer:
+
+    def test_shared_buffers(self):
+        """
+        Every class should see the samples since it started buffering, each stored only once.
+        """
+        buffer = SampleBuffer()
+        SAMPLES = [{"x": i} for i in range(6)]
+
+        buffer.append(SAMPLES[0])
+        buffer.append(SAMPLES[1])
+        buffer.open("A")
+        buffer.append(SAMPLES[2])
+        buffer.append(SAMPLES[3])
+        buffer.open("B")
+        buffer.append(SAMPLES[4])
+
+        assert buffer.samples("A") == SAMPLES[1:5]
+        assert buffer.samples("B") == SAMPLES[3:5]
+        assert buffer.memory_stats() == {"open": 2, "stored": 4, "buffered": 6, "dropped": 0}
+
+        del buffer["A"]
+        buffer.append(SAMPLES[5])
+
+        assert "A" not in buffer
+        assert buffer.samples("B") == SAMPLES[3:6]
+        assert buffer.memory_stats()["stored"] == 3
+
+        buffer.pop("B")
+        assert buffer.memory_stats() == {"open": 0, "stored": 0, "buffered": 0, "dropped": 0}
+
+    def test_max_size(self):
+        """
+        Bounded buffers should keep their head and the most recent samples, but count all of them.
+        """
+        buffer = SampleBuffer(max_size=3)
+        SAMPLES = [{"x": i} for i in range(10)]
+
+        buffer.append(SAMPLES[0])
+        buffer.open("A")
+        for x in SAMPLES[1:]:
+            buffer.append(x)
+            if x["x"] == 8:
+                buffer.open("B")
+
+        assert buffer.samples("A") == [SAMPLES[0], SAMPLES[8], SAMPLES[9]]
+        assert buffer.samples("B") == SAMPLES[8:]
+        assert buffer.length("A") == 10
+        assert buffer.memory_stats() == {"open": 2, "stored": 2, "buffered": 12, "dropped": 7}
+
+    def test_bounded_cbce(self):
+        """
+        CBCE with a bounded buffer should still initialize models from both positive samples, and
+        use the full length of the buffer for the prior.
+        """
+        model = CBCE(linear_model.LogisticRegression(), max_buffer_size=4, seed=42)
+
+        DATA = [({"x": -1}, "majority")] * 2 + [({"x": 5}, "A")] + [({"x": -1}, "majority")] * 9 + [({"x": 6}, "A")]
+        for x, y in DATA:
+            model.learn_one(x, y)
+
+        # Initial prior of 1 / 10, then updated with the second positive sample
+        assert model._class_priors["A"] == pytest.approx(0.9 / 10 + 0.1), "Prior should use the full buffer length"
+        assert model.predict_one({"x": 7}) == "A", "Failed to learn from the buffered positive samples"
+        assert model._sample_buffer.memory_stats()["stored"] == 0, "Samples kept after buffering stopped"
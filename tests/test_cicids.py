@@ -1,8 +1,12 @@
 from cicids import CICIDS2017, predict_cicids_filename
+from cicids import cache
+from cicids.index import index_path
+from river import stream
 from cicids.preprocess import (
     _merge_cicids,
     _create_subset,
     _convert_attempted_to_benign,
+    preprocess_cicids,
 )
 import csv
 import pytest
@@ -10,6 +14,30 @@ import pytest
 SKIP_CICIDS_TEST = True
 
 
+def write_cicids_like(path, n_rows=300):
+    """Write a small csv with the full CICIDS2017 header and deterministic, typed values"""
+    converters = CICIDS2017.converters[0]
+
+    with open(path, "w", newline="") as dataset_csv:
+        csv_writer = csv.writer(dataset_csv)
+        csv_writer.writerow(CICIDS2017.features)
+
+        for i in range(n_rows):
+            row = []
+            for j, feature in enumerate(CICIDS2017.features):
+                if feature == CICIDS2017.LABEL_COLUMN_NAME:
+                    row.append(CICIDS2017.plain_classes[i % len(CICIDS2017.plain_classes)])
+                elif converters[feature] is int:
+                    row.append(str(i * 7 + j))
+                elif converters[feature] is float:
+                    row.append(str((i + 1) * j / 3))
+                else:
+                    row.append(f"{feature}-{i % 5}")
+            csv_writer.writerow(row)
+
+    return path
+
+
 class TestCICIDSPreprocess:
     def test_merge_cicids(self, tmp_path):
         days = tmp_path / "tmp-days"
@@ -152,6 +180,33 @@ class TestCICIDSPreprocess:
             for _ in range(100):
                 assert next(csv_reader)[0] == "C"
 
+    def test_parallel_pipeline_matches_sequential(self, tmp_path):
+        labels = ["BENIGN", "DDoS", "DDoS - Attempted", "Botnet - Attempted"]
+
+        for root in ["sequential", "parallel"]:
+            days = tmp_path / root / "days"
+            days.mkdir(parents=True)
+
+            for d, weekday in enumerate(["monday", "tuesday", "wednesday", "thursday", "friday"]):
+                with open(days / f"{weekday}.csv", "w", newline="") as dataset_csv:
+                    csv_writer = csv.writer(dataset_csv)
+                    csv_writer.writerow(["id", "Flow ID", "Label", "Attempted Category"])
+                    for idx in range(37 + d * 11):
+                        flow = f"10.0.0.{idx}-{weekday}" if idx % 9 else f"quoted, {idx}"
+                        csv_writer.writerow([str(idx), flow, labels[(idx + d) % 4], str(idx % 3)])
+
+        merged = _merge_cicids(dataset_path=tmp_path / "sequential")
+        noatt = _convert_attempted_to_benign(merged)
+        subset = _create_subset(noatt, start_sample=50, n_samples=120)
+        subset_att = _create_subset(merged, start_sample=10, n_samples=None)
+
+        parallel = tmp_path / "parallel"
+        assert preprocess_cicids(parallel, start_sample=50, n_samples=120, workers=3, chunk_size=200) == parallel / subset.name
+        assert preprocess_cicids(parallel, convert_attempted=False, start_sample=10, workers=2, chunk_size=64) == parallel / subset_att.name
+
+        for expected in [merged, noatt, subset, subset_att]:
+            assert (parallel / expected.name).read_bytes() == expected.read_bytes(), f"{expected.name} differs"
+
 
 class TestCICIDSDataset:
     @pytest.mark.skipif(SKIP_CICIDS_TEST, reason="Size of dataset and rarity of code changes means it's impractical to test this often")
@@ -200,3 +255,106 @@ class TestCICIDSDataset:
             if not attr.startswith('_'):
                 for feature in features:
                     assert feature in CICIDS2017.features, f"CICIDS2017.Features.{attr} includes '{feature}', which does not exist."
+
+    def test_projected_reader_matches_iter_csv(self, tmp_path):
+        write_cicids_like(tmp_path / "all_days_noatt.csv")
+
+        for features in [["Label"], CICIDS2017.Features.DEFAULT, CICIDS2017.features[:]]:
+            dataset = CICIDS2017(dataset_dir=tmp_path, used_features=features[:], use_cache=False)
+
+            expected = stream.iter_csv(
+                dataset.path,
+                target=CICIDS2017.LABEL_COLUMN_NAME,
+                converters={f: CICIDS2017.converters[0][f] for f in dataset.used_features},
+                drop=[f for f in CICIDS2017.features if f not in dataset.used_features],
+            )
+
+            n_rows = 0
+            for (x, y), (x_exp, y_exp) in zip(dataset, expected):
+                assert list(x.items()) == list(x_exp.items())
+                assert y == y_exp
+                n_rows += 1
+            assert n_rows == 300
+
+    def test_window_matches_full_file(self, tmp_path):
+        write_cicids_like(tmp_path / "all_days_noatt.csv")
+        full = list(CICIDS2017(dataset_dir=tmp_path, use_cache=False))
+
+        for start_sample, n_samples in [(0, 10), (50, 100), (250, None), (299, 5), (300, None)]:
+            dataset = CICIDS2017(dataset_dir=tmp_path, start_sample=start_sample, n_samples=n_samples, use_cache=False)
+            stop = None if n_samples is None else start_sample + n_samples
+            assert list(dataset) == full[start_sample:stop]
+
+        assert index_path(dataset.path).is_file(), "Row index was not stored alongside the dataset"
+
+        dataset.build_cache()
+        dataset.use_cache = True
+        for start_sample, n_samples in [(0, 10), (50, 100), (250, None)]:
+            dataset.start_sample, dataset._max_samples = start_sample, n_samples
+            stop = None if n_samples is None else start_sample + n_samples
+            assert list(dataset) == full[start_sample:stop]
+
+    def test_stale_row_index_is_rebuilt(self, tmp_path):
+        path = write_cicids_like(tmp_path / "all_days_noatt.csv")
+        full = list(CICIDS2017(dataset_dir=tmp_path, use_cache=False))
+        assert next(iter(CICIDS2017(dataset_dir=tmp_path, start_sample=20, use_cache=False))) == full[20]
+
+        # Drop the first 5 rows, shifting all offsets
+        with open(path, "r", newline="") as dataset_csv:
+            lines = dataset_csv.readlines()
+        with open(path, "w", newline="") as dataset_csv:
+            dataset_csv.writelines(lines[:1] + lines[6:])
+
+        assert next(iter(CICIDS2017(dataset_dir=tmp_path, start_sample=20, use_cache=False))) == full[25]
+
+
+class TestCICIDSCache:
+    def test_cache_matches_csv(self, tmp_path):
+        write_cicids_like(tmp_path / "all_days_noatt.csv")
+
+        for features in [None, CICIDS2017.Features.YULIANTO2019, CICIDS2017.features[:]]:
+            dataset = CICIDS2017(dataset_dir=tmp_path, used_features=features)
+            from_csv = list(dataset)
+
+            dataset.build_cache()
+            assert dataset.cache_path.is_dir()
+            from_cache = list(dataset)
+
+            assert len(from_cache) == len(from_csv) == 300
+            for (x_csv, y_csv), (x_cache, y_cache) in zip(from_csv, from_cache):
+                assert list(x_csv.items()) == list(x_cache.items())
+                assert y_csv == y_cache
+
+    def test_stale_cache_is_not_used(self, tmp_path):
+        write_cicids_like(tmp_path / "all_days_noatt.csv")
+        dataset = CICIDS2017(dataset_dir=tmp_path)
+        old_cache = dataset.build_cache()
+
+        write_cicids_like(tmp_path / "all_days_noatt.csv", n_rows=10)
+        assert not dataset.cache_path.is_dir(), "Cache of previous file contents was picked up"
+        assert len(list(dataset)) == 10
+
+        dataset.build_cache()
+        assert not old_cache.is_dir(), "Stale cache was not removed"
+        assert len(list(dataset)) == 10
+
+    def test_file_is_hashed_once(self, tmp_path, monkeypatch):
+        """The file is not hashed without a cache, and hashed once per version of it otherwise"""
+        calls = []
+        file_hash = cache.file_hash
+        monkeypatch.setattr(cache, "file_hash", lambda path: calls.append(path) or file_hash(path))
+
+        write_cicids_like(tmp_path / "all_days_noatt.csv")
+        assert len(list(CICIDS2017(dataset_dir=tmp_path))) == 300
+        assert calls == []
+
+        CICIDS2017(dataset_dir=tmp_path).build_cache()
+        assert len(calls) == 1
+
+        # New instances, e.g. in worker processes, use the stored fingerprint
+        assert len(list(CICIDS2017(dataset_dir=tmp_path))) == 300
+        assert len(calls) == 1
+
+        write_cicids_like(tmp_path / "all_days_noatt.csv", n_rows=10)
+        assert len(list(CICIDS2017(dataset_dir=tmp_path))) == 10
+        assert len(calls) == 2
@@ -1,4 +1,6 @@
 from synthstream import ClassSampler, EndOfClassError
+import math
+import numpy as np
 import pytest
 
 class TestClassSampler:
@@ -119,4 +121,57 @@ class TestClassSampler:
         with pytest.raises(StopIteration):
             next(csampler)
 
+    def test_weights_match_weight_func(self):
+        """Weights of a range of times are the same, whether `weight_func` supports arrays or not"""
+        weight_funcs = [
+            lambda t: 2,
+            lambda t: 1 + (t % 7) / 7,
+            lambda t: math.exp(-t / 10),
+            lambda t: 1 if t < 20 else 3,
+        ]
 
+        for weight_func in weight_funcs:
+            csampler = ClassSampler('test', [1], weight_func)
+            expected = [weight_func(t) for t in range(5, 45)]
+
+            np.testing.assert_allclose(csampler.weights(5, 45), expected)
+            np.testing.assert_allclose(csampler.weights(5, 6), expected[:1])
+
+    def test_weights_stop_before_failing_time(self):
+        csampler = ClassSampler('test', [1], lambda t: math.log(10 - t))
+
+        assert len(csampler.weights(0, 20)) == 10
+
+        with pytest.raises(ValueError):
+            csampler.weights(10, 20)
+
+    def test_array_samples_yield_dict_views(self):
+        """Rows of an array are yielded as feature dicts, with the same eoc strategies"""
+        names = ('a', 'b')
+        samples = np.arange(6, dtype=np.float64).reshape(3, 2)
+        dicts = [dict(zip(names, row)) for row in samples.tolist()]
+
+        looped = ClassSampler('test', samples, lambda t: 1, eoc_strategy='loop', feature_names=names)
+        views = [next(looped) for _ in range(7)]
+        assert views == dicts * 2 + dicts[:1]
+        assert type(views[0]) is dict and type(views[0]['b']) is float
+
+        none = ClassSampler('test', samples, lambda t: 1, eoc_strategy='none', feature_names=names)
+        assert [next(none) for _ in range(5)] == dicts + [None, None]
+
+        with pytest.raises(EndOfClassError):
+            raising = ClassSampler('test', samples, lambda t: 1, feature_names=names)
+            for _ in range(4):
+                next(raising)
+
+    def test_array_samples_require_feature_names(self):
+        samples = np.zeros((3, 2))
+
+        with pytest.raises(ValueError):
+            ClassSampler('test', samples, lambda t: 1)
+
+        with pytest.raises(ValueError):
+            ClassSampler('test', samples, lambda t: 1, feature_names=('a',))
+
+        with pytest.raises(ValueError):
+            ClassSampler('test', np.zeros(3), lambda t: 1, feature_names=('a',))
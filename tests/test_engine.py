@@ -0,0 +1,136 @@
+import random
+import numpy as np
+import pytest
+from metrics import MetricWrapper, SharedMetrics, FalsePositiveRate
+from metrics.batch import evaluate_many
+from river.metrics import F1, MacroF1, Accuracy, CohenKappa
+from river.metrics.base import Metrics
+from river.utils import Rolling
+
+def make_metrics():
+    collapse = dict(collapse_label=False, collapse_classes=[0])
+    return [
+        MetricWrapper(MacroF1()),
+        MetricWrapper(Accuracy(), window_size=20),
+        MetricWrapper(MacroF1(), window_size=20),
+        MetricWrapper(F1(), window_size=20, **collapse),
+        MetricWrapper(FalsePositiveRate(), window_size=20, **collapse),
+        MetricWrapper(FalsePositiveRate(), **collapse),
+        CohenKappa(),
+    ]
+
+def make_stream(n=500):
+    rng = random.Random(42)
+    return [(rng.randrange(4), rng.randrange(4)) for _ in range(n)]
+
+class TestSharedMetrics:
+
+    def test_shares_confusion_matrices(self):
+        metrics = SharedMetrics(make_metrics())
+
+        # Multiclass and binary (collapsed) metrics, each with and without a window
+        assert metrics.n_confusion_matrices == 4
+        assert metrics[1].inner_metric.cm is metrics[2].inner_metric.cm
+
+    def test_same_results_with_plain_metrics(self):
+        plain = Metrics(make_metrics())
+        shared = SharedMetrics(make_metrics())
+
+        for yt, yp in make_stream():
+            plain.update(yt, yp)
+            shared.update(yt, yp)
+
+            assert shared.get() == pytest.approx(plain.get())
+
+    def test_update_many(self):
+        """Bulk updates of any size end up in the same state as per-sample ones"""
+        stream = make_stream()
+        y_true, y_pred = map(np.array, zip(*stream))
+
+        plain = Metrics(make_metrics())
+        for yt, yp in stream:
+            plain.update(yt, yp)
+
+        shared = SharedMetrics(make_metrics())
+        for start, end in [(0, 5), (5, 6), (6, 200), (200, 500)]:
+            shared.update_many(y_true[start:end], y_pred[start:end])
+
+        assert shared.get() == pytest.approx(plain.get())
+
+    def test_windows_share_history(self):
+        """Windows of any size are served by a single history, as long as the largest one"""
+        window_sizes = [1, 3, 20, 64]
+        make = lambda: [MetricWrapper(MacroF1(), window_size=w) for w in window_sizes]
+        stream = make_stream()
+        y_true, y_pred = map(np.array, zip(*stream))
+
+        plain = Metrics(make())
+        shared = SharedMetrics(make())
+        assert shared._history.capacity == max(window_sizes)
+
+        # Mix per-sample and bulk updates, with batches shorter and longer than the windows
+        position = 0
+        for size in [1, 2, 30, 1, 100, 5, 200]:
+            for yt, yp in stream[position:position + size]:
+                plain.update(yt, yp)
+
+            if size % 2:
+                for yt, yp in stream[position:position + size]:
+                    shared.update(yt, yp)
+            else:
+                shared.update_many(y_true[position:position + size], y_pred[position:position + size])
+
+            position += size
+            assert shared.get() == pytest.approx(plain.get())
+
+        # The `Rolling` of the wrappers is not used
+        assert all(len(m.metric.window) == 0 for m in shared)
+
+    def test_revert(self):
+        """Reverting updates returns to the previous values, except for windowed metrics"""
+        make = lambda: [MetricWrapper(MacroF1()), MetricWrapper(Accuracy()), MetricWrapper(FalsePositiveRate(), collapse_label=False, collapse_classes=[0])]
+        stream = make_stream()
+
+        plain = Metrics(make())
+        shared = SharedMetrics(make())
+        for yt, yp in stream[:100]:
+            plain.update(yt, yp)
+            shared.update(yt, yp)
+        for yt, yp in stream[100:]:
+            shared.update(yt, yp)
+        for yt, yp in reversed(stream[100:]):
+            shared.revert(yt, yp)
+
+        assert shared.get() == pytest.approx(plain.get())
+
+        with pytest.raises(ValueError):
+            SharedMetrics(make_metrics()).revert(0, 1)
+
+    def test_non_integer_weight_raises_value_error(self):
+        with pytest.raises(ValueError):
+            SharedMetrics(make_metrics()).update(0, 1, sample_weight=0.5)
+
+class TestEvaluateMany:
+
+    def test_same_results_as_updates(self):
+        """Vectorised metrics, and the ones updated sample by sample, match a live group"""
+        stream = make_stream()
+        labels = [0, 1, 2, 3]
+        y_true, y_pred = map(np.array, zip(*stream))
+
+        # CohenKappa and Rolling are not computed from cumulative sums
+        group = [*make_metrics(), Rolling(MacroF1(), window_size=10)]
+        steps = np.arange(0, len(stream), 3)
+        values = evaluate_many(group, y_true, y_pred, labels, steps)
+
+        plain = Metrics([*make_metrics(), Rolling(MacroF1(), window_size=10)])
+        expected = []
+        for i, (yt, yp) in enumerate(stream):
+            plain.update(yt, yp)
+            if i % 3 == 0:
+                expected.append(plain.get())
+
+        np.testing.assert_allclose(np.column_stack(values), expected, atol=1e-12)
+
+        # The given metrics are left untouched
+        assert group[-1].get() == 0
@@ -0,0 +1,45 @@
+from framework.grid import grid, latin_hypercube, random_search, run_key, sweep
+from river import datasets, tree
+import pytest
+
+
+class TestParamsets:
+
+    def test_sweep_and_grid(self):
+        space = {"a": [1, 2], "b": ["x", "y", "z"]}
+
+        assert sweep(space) == [{"a": 1}, {"a": 2}, {"b": "x"}, {"b": "y"}, {"b": "z"}]
+        assert len(grid(space)) == 6
+        assert {"a": 2, "b": "y"} in grid(space)
+
+    def test_random_search_ranges(self):
+        space = {"choice": [1, 2, 3], "int": (1, 4), "float": (0.5, 1.0), "log": (1e-6, 1e-2, "log")}
+        paramsets = random_search(space, 200, seed=42)
+
+        assert paramsets == random_search(space, 200, seed=42)
+        assert {p["choice"] for p in paramsets} == {1, 2, 3}
+        assert {p["int"] for p in paramsets} == {1, 2, 3, 4}
+        assert all(0.5 <= p["float"] <= 1.0 for p in paramsets)
+        assert all(1e-6 <= p["log"] <= 1e-2 for p in paramsets)
+
+    def test_latin_hypercube_covers_every_stratum(self):
+        """Each of the `n` equally likely intervals of every range is used exactly once"""
+        n = 10
+        paramsets = latin_hypercube({"x": (0.0, 1.0), "y": (0, 9)}, n, seed=42)
+
+        assert sorted(int(p["x"] * n) for p in paramsets) == list(range(n))
+        assert sorted(p["y"] for p in paramsets) == list(range(n))
+
+
+class TestRunKey:
+
+    def test_key_depends_on_params_and_dataset(self):
+        model = tree.HoeffdingTreeClassifier()
+        key = run_key(model, datasets.Phishing())
+
+        assert key == run_key(model.clone(), datasets.Phishing())
+        assert key != run_key(model.clone(new_params={"grace_period": 100}), datasets.Phishing())
+        assert key != run_key(model, datasets.Bananas())
+
+        # Setting a parameter to its current value is the same run
+        assert key == run_key(model.clone(new_params={"grace_period": model.grace_period}), datasets.Phishing())
@@ -0,0 +1,32 @@
+from framework.profiler import PhaseProfiler
+import pytest
+
+
+class TestPhaseProfiler:
+
+    def test_sampled_phases_are_extrapolated(self):
+        """Phases timed for one sample in `every` are scaled to all samples, others are not"""
+        profiler = PhaseProfiler(every=10, curve_every=40)
+
+        for x in profiler.iterate(range(100)):
+            if profiler.due():
+                profiler.add("predict", 0.001, sampled=True)
+            if x % 50 == 0:
+                profiler.add("tracker", 0.5)
+
+        summary = profiler.summary()
+        assert 5 <= profiler.timed_samples <= 20
+        assert summary["samples"] == 100
+        assert summary["phases"]["predict"] == pytest.approx({"calls": 100, "time": 0.1, "share": summary["phases"]["predict"]["share"]})
+        assert summary["phases"]["tracker"]["calls"] == 2
+        assert summary["phases"]["tracker"]["time"] == pytest.approx(1.0)
+        assert summary["phases"]["dataset"]["calls"] == 100
+
+        # A point of the curve at least 40 samples apart, and a last one at the end
+        points = [point[0] for point in summary["throughput"]]
+        assert len(points) >= 2 and points[-1] == 100
+        assert all(b - a >= 40 for a, b in zip(points, points[1:-1]))
+
+    def test_invalid_every(self):
+        with pytest.raises(ValueError):
+            PhaseProfiler(every=0)
@@ -1,8 +1,32 @@
-from river import tree
+from itertools import islice
+from river import base, datasets, ensemble, tree
 from math import isclose
+import pickle
 from rbc import ResamplingBaggingClassifier
 
 
+class CountingClassifier(base.Classifier):
+    """Records the total weight it learned from, and how many times `learn_one` was called."""
+
+    def __init__(self):
+        self.n_calls = 0
+        self.total_weight = 0
+
+    def learn_one(self, x, y):
+        self.n_calls += 1
+        self.total_weight += 1
+
+    def predict_proba_one(self, x):
+        return {}
+
+
+class WeightedCountingClassifier(CountingClassifier):
+
+    def learn_one(self, x, y, sample_weight=1.0):
+        self.n_calls += 1
+        self.total_weight += sample_weight
+
+
 class TestMOOB:
 
     def test_default_oversampling(self):
@@ -76,3 +100,51 @@ class TestMOOB:
 
         assert isclose(model.predict_proba_one({'x': 1})['A'], 0.5, abs_tol=0.05)
         assert isclose(model.predict_proba_one({'x': 1})['B'], 0.5, abs_tol=0.05)
+
+    def test_workers_reproducible(self):
+        """
+        With workers, results should only depend on the seed, not on the number of workers, and
+        closing should keep the trained members.
+        """
+        DATA = list(islice(datasets.Phishing(), 300))
+
+        predictions = {}
+        for n_workers in [1, 2]:
+            model = ResamplingBaggingClassifier(tree.HoeffdingTreeClassifier(), n_models=4, seed=42, n_workers=n_workers, batch_size=7)
+
+            predictions[n_workers] = []
+            for x, y in DATA:
+                predictions[n_workers].append(model.predict_proba_one(x))
+                model.learn_one(x, y)
+
+            copy = pickle.loads(pickle.dumps(model))
+            model.close()
+
+            # Predict with the members in this process, without starting new workers
+            y_pred = ensemble.BaggingClassifier.predict_proba_one(model, DATA[0][0])
+            assert y_pred, "Trained members lost when closing the workers"
+            assert ensemble.BaggingClassifier.predict_proba_one(copy, DATA[0][0]) == y_pred, "Trained members lost when pickling"
+
+        assert predictions[1] == predictions[2]
+
+    def test_weighted_resampling(self):
+        """
+        Base models supporting sample weights should learn once per drawn sample, with the same
+        total weight as when repeating `learn_one`.
+        """
+        DATA = [({'x': 0}, 'B')] * 50 + [({'x': 1}, 'A')] + [({'x': 0}, 'B')] * 5 + [({'x': 1}, 'A')]
+
+        repeated = ResamplingBaggingClassifier(CountingClassifier(), seed=42)
+        weighted = ResamplingBaggingClassifier(WeightedCountingClassifier(), seed=42)
+        unweighted = ResamplingBaggingClassifier(WeightedCountingClassifier(), seed=42, use_sample_weight=False)
+
+        for x, y in DATA:
+            for model in [repeated, weighted, unweighted]:
+                model.learn_one(x, y)
+
+        for m_repeated, m_weighted, m_unweighted in zip(repeated, weighted, unweighted):
+            assert m_weighted.total_weight == m_repeated.total_weight == m_unweighted.total_weight
+            assert m_unweighted.n_calls == m_repeated.n_calls
+            assert m_weighted.n_calls <= len(DATA)
+
+        assert sum(m.n_calls for m in repeated) > sum(m.n_calls for m in weighted), "Rare class samples should be repeated"
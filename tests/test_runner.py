@@ -0,0 +1,454 @@
+from framework import ExperimentRunner, HyperparameterScanRunner, load_metrics, load_predictions, load_runs, recompute_metrics
+from framework.grid import grid
+from framework.multi import MultiModelRunner, SuccessiveHalvingRunner
+from framework.shared import MappedArray, SharedDataset
+from metrics import MetricWrapper
+from river import datasets, linear_model, metrics, optim, tree
+from river.metrics.base import Metrics
+from synthstream import ClassSampler, SyntheticStream
+import csv
+import json
+import numpy as np
+import pickle
+import pytest
+import time
+
+
+def make_metrics():
+    return Metrics([
+        MetricWrapper(metrics.Accuracy()),
+        MetricWrapper(metrics.F1(), window_size=50),
+    ])
+
+
+def constant_weight(t):
+    return 1
+
+
+class CrashingPhishing(datasets.Phishing):
+    """Phishing dataset whose iteration fails after `crash_after` samples"""
+
+    def __init__(self, crash_after: int):
+        super().__init__()
+        self.crash_after = crash_after
+
+    def __iter__(self):
+        for i, (x, y) in enumerate(super().__iter__()):
+            if i == self.crash_after:
+                raise RuntimeError("Crashed")
+            yield x, y
+
+
+def read_metrics_log(out_dir, name):
+    [path] = out_dir.glob(f"*_{name}_METRICS.csv")
+    with open(path, newline="") as file_metrics:
+        return list(csv.reader(file_metrics))
+
+
+class TestExperimentRunner:
+
+    def test_batched_fallback_matches_per_sample(self, tmp_path):
+        """
+        Models without `learn_many` should produce the exact same metrics log in batched mode.
+        """
+        for name, batch_size in [("single", None), ("batched", 64)]:
+            runner = ExperimentRunner(
+                tree.HoeffdingTreeClassifier(),
+                datasets.Phishing(),
+                make_metrics(),
+                str(tmp_path),
+                name=name,
+                enable_tracker=False,
+                batch_size=batch_size,
+            )
+            runner.run()
+
+        assert read_metrics_log(tmp_path, "single") == read_metrics_log(tmp_path, "batched")
+
+    def test_batched_mini_batch_model(self, tmp_path):
+        """
+        Models with `learn_many` should be evaluated on every sample of every block, and blocks
+        of a single sample should be equivalent to per-sample evaluation.
+        """
+        for name, batch_size in [("single", None), ("batched1", 1), ("batched", 100)]:
+            runner = ExperimentRunner(
+                linear_model.LogisticRegression(),
+                datasets.Phishing(),
+                make_metrics(),
+                str(tmp_path),
+                name=name,
+                enable_tracker=False,
+                batch_size=batch_size,
+            )
+            runner.run()
+
+        log = read_metrics_log(tmp_path, "batched")
+        assert log[0] == runner._metrics_names
+        assert len(log) - 1 == datasets.Phishing().n_samples
+
+        single, batched1 = read_metrics_log(tmp_path, "single"), read_metrics_log(tmp_path, "batched1")
+        assert len(single) == len(batched1)
+        for row, row_batched in zip(single[1:], batched1[1:]):
+            assert all(abs(float(a) - float(b)) < 1e-9 for a, b in zip(row, row_batched))
+
+    def test_decimated_log(self, tmp_path):
+        """
+        Decimated logs should contain every `log_every`-th row of the full log, plus the last one,
+        prefixed with the step.
+        """
+        for name, batch_size, log_every in [("full", None, 1), ("every", None, 100), ("every_batched", 64, 100)]:
+            runner = ExperimentRunner(
+                tree.HoeffdingTreeClassifier(),
+                datasets.Phishing(),
+                make_metrics(),
+                str(tmp_path),
+                name=name,
+                enable_tracker=False,
+                batch_size=batch_size,
+                log_every=log_every,
+                log_buffer_size=7,
+            )
+            runner.run()
+
+        full = read_metrics_log(tmp_path, "full")
+        n_rows = len(full) - 1
+        steps = [*range(0, n_rows, 100), n_rows - 1]
+
+        expected = [["step", *full[0]]] + [[str(step), *full[step + 1]] for step in steps]
+        assert read_metrics_log(tmp_path, "every") == expected
+        assert read_metrics_log(tmp_path, "every_batched") == expected
+
+    def test_log_on_change(self, tmp_path):
+        """
+        Logging on change should log every row in which a metric moved by more than the threshold.
+        """
+        for name, log_on_change in [("full", None), ("change", 0.05)]:
+            runner = ExperimentRunner(
+                tree.HoeffdingTreeClassifier(),
+                datasets.Phishing(),
+                make_metrics(),
+                str(tmp_path),
+                name=name,
+                enable_tracker=False,
+                log_every=1 if log_on_change is None else 10**9,
+                log_on_change=log_on_change,
+            )
+            runner.run()
+
+        full = [[float(v) for v in row] for row in read_metrics_log(tmp_path, "full")[1:]]
+        change = read_metrics_log(tmp_path, "change")[1:]
+
+        expected, last = [], None
+        for step, row in enumerate(full):
+            if last is None or any(abs(v - l) > 0.05 for v, l in zip(row, last)) or step == len(full) - 1:
+                expected.append(step)
+                last = row
+        assert [int(row[0]) for row in change] == expected
+        assert 1 < len(change) < len(full)
+
+    def test_invalid_log_options(self, tmp_path):
+        """
+        Invalid logging options should be rejected before the experiment starts.
+        """
+        for options in [{"log_every": 0}, {"log_interval": -1.0}, {"log_on_change": -0.1}]:
+            with pytest.raises(ValueError):
+                ExperimentRunner(tree.HoeffdingTreeClassifier(), datasets.Phishing(), make_metrics(), str(tmp_path), enable_tracker=False, **options)
+
+    def test_binary_metrics_log(self, tmp_path):
+        """
+        Binary metrics logs should hold the same values as the `.csv` ones, and be loadable by name
+        and across runs.
+        """
+        for name, metrics_format in [("text", "csv"), ("binary", "float64"), ("binary32", "float32")]:
+            runner = ExperimentRunner(
+                tree.HoeffdingTreeClassifier(),
+                datasets.Phishing(),
+                make_metrics(),
+                str(tmp_path),
+                name=name,
+                enable_tracker=False,
+                log_every=10,
+                metrics_format=metrics_format,
+            )
+            runner.run()
+
+        names = runner._metrics_names
+        runs = load_runs(tmp_path)
+        assert len(runs) == 3
+
+        text, = [m for run_id, m in runs.items() if run_id.endswith("_text")]
+        binary, = [m for run_id, m in runs.items() if run_id.endswith("_binary")]
+        binary32, = [m for run_id, m in runs.items() if run_id.endswith("_binary32")]
+
+        assert list(binary) == ["step", *names]
+        assert isinstance(binary[names[0]], np.memmap)
+        assert binary["step"].dtype == np.int64 and binary32[names[0]].dtype == np.float32
+        for column in ["step", *names]:
+            np.testing.assert_array_equal(text[column], binary[column])
+            np.testing.assert_allclose(text[column], binary32[column], rtol=1e-6)
+
+        [path] = tmp_path.glob("*_binary_METRICS")
+        assert list(load_metrics(path, names[1:])) == names[1:]
+        with pytest.raises(KeyError):
+            load_metrics(path, ["missing"])
+        assert len(load_runs(tmp_path, names=["missing"])) == 0
+
+    def test_recompute_metrics(self, tmp_path):
+        """
+        Metrics recomputed from the saved predictions should match the ones logged during the run.
+        """
+        runner = ExperimentRunner(
+            tree.HoeffdingTreeClassifier(),
+            datasets.Phishing(),
+            make_metrics(),
+            str(tmp_path),
+            enable_tracker=False,
+            log_every=7,
+            metrics_format="float64",
+            save_predictions=True,
+        )
+        runner.run()
+
+        [metrics_path] = tmp_path.glob("*_METRICS")
+        [predictions_path] = tmp_path.glob("*_PREDICTIONS")
+        logged = load_metrics(metrics_path)
+
+        y_true, y_pred, labels = load_predictions(predictions_path)
+        assert len(y_true) == len(y_pred) == logged["step"][-1] + 1
+        assert sorted(labels) == [False, True]
+
+        out_path = tmp_path / "recomputed_METRICS.csv"
+        recomputed = recompute_metrics(predictions_path, make_metrics(), every=7, out_path=out_path)
+
+        np.testing.assert_array_equal(recomputed["step"], logged["step"])
+        for name in runner._metrics_names:
+            np.testing.assert_allclose(recomputed[name], logged[name])
+        np.testing.assert_allclose(load_metrics(out_path)[runner._metrics_names[0]], logged[runner._metrics_names[0]])
+
+    def test_resume_from_checkpoint(self, tmp_path):
+        """
+        A run resumed from its last checkpoint should produce the same logs as an uninterrupted one.
+        """
+        for batch_size in [None, 64]:
+            make_runner = lambda dataset, **kwargs: ExperimentRunner(
+                tree.HoeffdingTreeClassifier(),
+                dataset,
+                make_metrics(),
+                str(tmp_path),
+                enable_tracker=False,
+                batch_size=batch_size,
+                log_every=3,
+                save_predictions=True,
+                **kwargs,
+            )
+
+            make_runner(datasets.Phishing(), name=f"full{batch_size}").run()
+
+            crashed = make_runner(CrashingPhishing(crash_after=550), name=f"crashed{batch_size}", checkpoint_every=100)
+            with pytest.raises(RuntimeError):
+                crashed.run()
+            assert (tmp_path / f"{crashed._id}_CHECKPOINT.pkl").is_file()
+
+            make_runner(datasets.Phishing(), resume=crashed._id).run()
+            assert not (tmp_path / f"{crashed._id}_CHECKPOINT.pkl").exists()
+
+            assert read_metrics_log(tmp_path, f"crashed{batch_size}") == read_metrics_log(tmp_path, f"full{batch_size}")
+            [full_predictions] = tmp_path.glob(f"*_full{batch_size}_PREDICTIONS")
+            [resumed_predictions] = tmp_path.glob(f"*_crashed{batch_size}_PREDICTIONS")
+            for full, resumed in zip(load_predictions(full_predictions), load_predictions(resumed_predictions)):
+                np.testing.assert_array_equal(full, resumed)
+
+    def test_profile(self, tmp_path):
+        """
+        Profiled runs log the same metrics, and the estimated phases of the profile in META.
+        """
+        for batch_size in [None, 64]:
+            for name, profile_every in [("plain", None), ("profiled", 10)]:
+                runner = ExperimentRunner(
+                    tree.HoeffdingTreeClassifier(),
+                    datasets.Phishing(),
+                    make_metrics(),
+                    str(tmp_path),
+                    name=f"{name}{batch_size}",
+                    enable_tracker=False,
+                    batch_size=batch_size,
+                    profile_every=profile_every,
+                )
+                runner.run()
+
+            assert read_metrics_log(tmp_path, f"profiled{batch_size}") == read_metrics_log(tmp_path, f"plain{batch_size}")
+
+            with open(runner._meta_path) as file_meta:
+                profile = json.load(file_meta)["profile"]
+            assert profile["samples"] == 1250
+            assert {"predict", "learn", "metrics", "logger", "metrics_log"} <= profile["phases"].keys()
+            assert profile["phases"]["predict"]["calls"] == 1250
+            assert sum(phase["share"] for phase in profile["phases"].values()) < 1.25
+            assert profile["throughput"][-1][0] == 1250
+
+    def test_resume_without_checkpoint(self, tmp_path):
+        with pytest.raises(ValueError):
+            ExperimentRunner(
+                tree.HoeffdingTreeClassifier(),
+                datasets.Phishing(),
+                make_metrics(),
+                str(tmp_path),
+                enable_tracker=False,
+                resume="missing",
+            )
+
+
+class TestHyperparameterScanRunner:
+
+    def test_finished_paramsets_are_skipped(self, tmp_path):
+        """Scanning again only runs the paramsets without a finished run"""
+        make_runner = lambda: HyperparameterScanRunner(
+            tree.HoeffdingTreeClassifier(),
+            datasets.Phishing(),
+            make_metrics(),
+            str(tmp_path),
+            enable_tracker=False,
+        )
+        paramsets = grid({"grace_period": [50, 100], "max_depth": [5, 10]})
+
+        make_runner().run(paramsets[:3], cost=lambda p: p["grace_period"])
+        assert len(list(tmp_path.glob("*_META.json"))) == 3
+
+        make_runner().run(paramsets)
+        assert len(list(tmp_path.glob("*_META.json"))) == 4
+
+    def test_stopped_paramsets_are_run_again(self, tmp_path):
+        """Runs stopped by successive halving are only skipped by successive halving scans"""
+        make_runner = lambda: HyperparameterScanRunner(
+            linear_model.LogisticRegression(),
+            datasets.Phishing(),
+            make_metrics(),
+            str(tmp_path),
+            enable_tracker=False,
+        )
+        paramsets = [{"optimizer": optim.SGD(lr)} for lr in [0.0001, 0.003, 0.03, 0.3]]
+
+        make_runner().run_successive_halving(paramsets, "Accuracy", min_samples=200)
+        metas = [json.loads(path.read_text()) for path in tmp_path.glob("*_META.json")]
+        assert sorted(meta["stopped"] for meta in metas) == [False, True, True, True]
+
+        make_runner().run_successive_halving(paramsets, "Accuracy", min_samples=200)
+        assert len(list(tmp_path.glob("*_META.json"))) == 4
+
+        # The 3 stopped runs are run to the end, the complete one is skipped. Run ids are unique
+        # to the second
+        time.sleep(1)
+        make_runner().run(paramsets)
+        metas = [json.loads(path.read_text()) for path in tmp_path.glob("*_META.json")]
+        assert len(metas) == 7
+        assert sorted(meta["samples"] for meta in metas if not meta["stopped"]) == [1250] * 4
+
+    def test_single_pass(self, tmp_path):
+        """A single pass scan logs the same metrics as separate runs"""
+        make_runner = lambda out_dir: HyperparameterScanRunner(
+            tree.HoeffdingTreeClassifier(),
+            datasets.Phishing(),
+            make_metrics(),
+            str(out_dir),
+            enable_tracker=False,
+        )
+        paramsets = grid({"grace_period": [50, 100], "max_depth": [5, 10]})
+        (tmp_path / "separate").mkdir()
+        (tmp_path / "single").mkdir()
+
+        make_runner(tmp_path / "separate").run(paramsets)
+        make_runner(tmp_path / "single").run(paramsets, single_pass=True)
+
+        # Runs are matched on the key of their paramset, as their ids start with the time
+        load = lambda out_dir: {run_id.split("_hp-")[1]: run for run_id, run in load_runs(out_dir).items()}
+        runs, single_runs = load(tmp_path / "separate"), load(tmp_path / "single")
+        assert len(runs) == 4 and runs.keys() == single_runs.keys()
+        for key, run in runs.items():
+            for name, values in run.items():
+                np.testing.assert_array_equal(single_runs[key][name], values)
+
+
+class TestMultiModelRunner:
+
+    def make_runners(self, dataset, out_dir, prefix):
+        return [
+            ExperimentRunner(tree.HoeffdingTreeClassifier(), dataset, make_metrics(), out_dir, name=f"{prefix}tree", enable_tracker=False),
+            ExperimentRunner(linear_model.LogisticRegression(), dataset, make_metrics(), out_dir, name=f"{prefix}linear", enable_tracker=False, batch_size=64),
+            ExperimentRunner(tree.HoeffdingTreeClassifier(grace_period=50), dataset, make_metrics(), out_dir, name=f"{prefix}tree50", enable_tracker=False, log_every=7),
+        ]
+
+    @pytest.mark.parametrize("n_workers", [None, 2])
+    def test_same_logs_as_separate_runs(self, tmp_path, n_workers):
+        """
+        Runners fed from a single scan should log the same metrics as when run on their own,
+        whatever their batch size relative to the blocks read from the dataset.
+        """
+        for runner in self.make_runners(datasets.Phishing(), str(tmp_path), "single-"):
+            runner.run()
+
+        MultiModelRunner(self.make_runners(datasets.Phishing(), str(tmp_path), "multi-"), n_workers=n_workers, batch_size=100).run()
+
+        for name in ["tree", "linear", "tree50"]:
+            assert read_metrics_log(tmp_path, f"multi-{name}") == read_metrics_log(tmp_path, f"single-{name}")
+
+    def test_different_datasets(self, tmp_path):
+        runners = [
+            ExperimentRunner(tree.HoeffdingTreeClassifier(), datasets.Phishing(), make_metrics(), str(tmp_path), enable_tracker=False)
+            for _ in range(2)
+        ]
+        with pytest.raises(ValueError):
+            MultiModelRunner(runners)
+
+
+class TestSuccessiveHalvingRunner:
+
+    def test_worst_runs_are_stopped(self, tmp_path):
+        """
+        Runs are stopped at every rung, worst first, and the best one goes on with its model
+        as if it was run on its own.
+        """
+        learning_rates = [0.0001, 0.003, 0.03, 0.3]
+        make_runners = lambda dataset, prefix: [
+            ExperimentRunner(linear_model.LogisticRegression(optimizer=optim.SGD(lr)), dataset, make_metrics(), str(tmp_path), name=f"{prefix}{i}", enable_tracker=False)
+            for i, lr in enumerate(learning_rates)
+        ]
+        for runner in make_runners(datasets.Phishing(), "single"):
+            runner.run()
+
+        halving = SuccessiveHalvingRunner(make_runners(datasets.Phishing(), "halving"), "Accuracy", min_samples=200, batch_size=64)
+        halving.run()
+
+        # 4 runs learn 200 samples, 2 of them 400, the best one all 1250
+        samples = {int(run_id.split("halving")[-1]): n for run_id, n in halving.samples.items()}
+        assert samples == {0: 200, 1: 200, 2: 400, 3: 1250}
+        assert read_metrics_log(tmp_path, "halving3") == read_metrics_log(tmp_path, "single3")
+        assert read_metrics_log(tmp_path, "halving0") == read_metrics_log(tmp_path, "single0")[:201]
+
+    def test_invalid_options(self, tmp_path):
+        runners = [ExperimentRunner(tree.HoeffdingTreeClassifier(), datasets.Phishing(), make_metrics(), str(tmp_path), enable_tracker=False)]
+        with pytest.raises(ValueError):
+            SuccessiveHalvingRunner(runners, "missing", min_samples=100)
+        with pytest.raises(ValueError):
+            SuccessiveHalvingRunner(runners, "Accuracy", min_samples=100, keep=1)
+
+
+class TestSharedDataset:
+
+    def test_synthetic_stream_pickled_without_samples(self, tmp_path):
+        """Array samples are memory-mapped once, and not copied along with the stream"""
+        rng = np.random.default_rng(42)
+        stream = SyntheticStream(n_features=4, max_samples=500, seed=42, init_csamplers=[
+            ClassSampler(label, rng.random((10_000, 4)), constant_weight, eoc_strategy='loop', feature_names=('a', 'b', 'c', 'd'))
+            for label in ['A', 'B']
+        ])
+        expected = list(stream.fork())
+
+        with SharedDataset(stream, directory=str(tmp_path)) as shared:
+            data = pickle.dumps(shared)
+            assert len(data) < 10_000
+            assert list(pickle.loads(data)) == expected
+            assert all(isinstance(csampler.sample_list, MappedArray) for csampler in shared._samplers)
+
+        # The files are unmapped before they are removed, as required on Windows
+        assert not any(isinstance(csampler.sample_list, MappedArray) for csampler in shared._samplers)
+        assert list(tmp_path.iterdir()) == []
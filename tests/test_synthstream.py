@@ -172,7 +172,73 @@ class TestSyntheticStream:
         assert ss.sparse is False
         assert str(ss).replace(' ', '') == TEST_SS_REP_BANNER.replace(' ', '')
 
+    def test_invalid_weights_raise_at_their_step(self):
+        """Weights are computed ahead, but errors are only raised on the step they occur"""
+        sampler_a = ClassSampler(
+            label='A', samples=[1], weight_func=lambda t: 1 if t < 5 else -1,
+            eoc_strategy='loop'
+        )
+        ss = SyntheticStream(n_features=1, seed=42, init_csamplers=[sampler_a])
+
+        for _ in range(5):
+            assert next(ss) == (1, 'A')
+
+        with pytest.raises(ValueError):
+            next(ss)
+
+    def test_many_future_samplers(self):
+        """Future samplers are activated at their start, whatever the order they were added in"""
+        samplers = [
+            ClassSampler(
+                label=str(t_start), samples=[t_start], weight_func=lambda t: 1,
+                stream_t_start=t_start, max_samples=1
+            )
+            for t_start in [3, 0, 4, 1, 2]
+        ]
+        ss = SyntheticStream(n_features=1, seed=42, init_csamplers=samplers)
+
+        assert [x for x, _ in ss.take(5)] == [0, 1, 2, 3, 4]
+        assert ss.future_samplers == []
+
+    def make_varied_stream(self):
+        return SyntheticStream(n_features=1, max_samples=3000, seed=42, init_csamplers=[
+            ClassSampler(label='A', samples=list(range(37)), weight_func=lambda t: 1 + (t % 50) / 50, eoc_strategy='loop'),
+            ClassSampler(label='B', samples=list(range(100)), weight_func=lambda t: 2 if t < 1000 else 1, eoc_strategy='none'),
+            ClassSampler(label='C', samples=list(range(500)), weight_func=lambda t: 2, stream_t_start=700, max_samples=150),
+            ClassSampler(label='C', samples=list(range(-500, 0)), weight_func=lambda t: 1, stream_t_start=1500, eoc_strategy='loop'),
+        ])
+
+    def test_seek_skips_to_same_outputs(self):
+        expected = list(self.make_varied_stream())
+
+        for t in [1, 699, 700, 701, 1234, 1500, 2999, 3000]:
+            ss = self.make_varied_stream()
+            ss.seek(t)
+
+            assert ss.t == t
+            assert ss.output == expected[t - 1]
+            assert list(ss) == expected[t:]
+
+        with pytest.raises(ValueError):
+            ss.seek(10)
+
+    def test_snapshot_restore_and_fork(self):
+        ss = self.make_varied_stream()
+        for _ in range(900):
+            next(ss)
 
+        snapshot = ss.snapshot()
+        fork = ss.fork()
+        expected = [next(ss) for _ in range(1000)]
 
+        # The fork is independent from the stream it was made from, but shares its samples
+        assert [next(fork) for _ in range(1000)] == expected
+        assert fork._samplers[0].sample_list is ss._samplers[0].sample_list
 
+        ss.restore(snapshot)
+        assert [next(ss) for _ in range(1000)] == expected
 
+        # Snapshots can be restored on a fresh stream with the same samplers
+        fresh = self.make_varied_stream()
+        fresh.restore(snapshot)
+        assert [next(fresh) for _ in range(1000)] == expected
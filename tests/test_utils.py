@@ -0,0 +1,54 @@
+import random
+import pytest
+from utils import DecayedPriors
+
+
+class TestDecayedPriors:
+
+    def test_matches_eager_decay(self):
+        """
+        Priors should match decaying every prior on every step, including min, max and their order,
+        also after the sort keys are rebased.
+        """
+        rng = random.Random(42)
+        DECAY = 0.9
+
+        priors = DecayedPriors(DECAY)
+        expected = {}
+
+        for _ in range(2 * DecayedPriors.REBASE_INTERVAL + 10):
+            y = min(int(rng.expovariate(0.5)), 9)
+            if y not in priors:
+                priors[y] = 0
+                expected[y] = 0
+
+            priors.step()
+            priors.add(y, 1 - DECAY)
+            expected = {cls: DECAY * prior + (1 - DECAY) * (y == cls) for cls, prior in expected.items()}
+
+        assert dict(priors) == pytest.approx(expected, rel=1e-9)
+        assert priors.min() == pytest.approx(min(expected.values()), rel=1e-9)
+        assert priors.max() == pytest.approx(max(expected.values()), rel=1e-9)
+        assert list(priors.ascending()) == sorted(expected, key=expected.get)
+
+    def test_zero_priors(self):
+        """
+        Priors set to 0 should not decay, and be skipped on request when iterating in order.
+        """
+        priors = DecayedPriors(0.5)
+        priors["A"] = 0.8
+        priors["B"] = 0.4
+        priors["C"] = 0
+
+        priors.step()
+
+        assert priors["A"] == 0.4 and priors["B"] == 0.2 and priors["C"] == 0
+        assert priors.min() == 0
+        assert list(priors.ascending()) == ["C", "B", "A"]
+        assert list(priors.ascending(skip_zero=True)) == ["B", "A"]
+
+        priors["B"] = 0
+        assert priors.pop("A") == 0.4
+        assert priors.pop("A", None) is None
+        assert priors.max() == 0
+        assert dict(priors) == {"B": 0, "C": 0}
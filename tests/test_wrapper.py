@@ -1,5 +1,5 @@
 import pytest
-from metrics import MetricWrapper
+from metrics import MetricWrapper, FalsePositiveRate
 from river.metrics import F1, MacroF1
 from river.utils import Rolling
 
@@ -65,4 +65,8 @@ class TestMetricWrapper:
             mw.update(yt, yp)
             m.update(cyt, cyp)
             
-            assert m.get() == mw.get()
\ No newline at end of file
+            assert m.get() == mw.get()
+
+    def test_bigger_is_better_of_wrapped_metric(self):
+        assert MetricWrapper(F1(), window_size=3).bigger_is_better
+        assert not MetricWrapper(FalsePositiveRate(), collapse_label=True, collapse_classes=[0]).bigger_is_better